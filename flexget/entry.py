@@ -3,6 +3,7 @@ from exceptions import Exception, UnicodeDecodeError, TypeError, KeyError
 import logging
 import copy
 import functools
+from datetime import datetime, date, timedelta
 
 from flexget.plugin import PluginError
 from flexget.utils.imdb import extract_id, make_url
@@ -10,6 +11,14 @@ from flexget.utils.template import render_from_entry
 
 log = logging.getLogger('entry')
 
+# Values of these types are replaced rather than modified, snapshots share them with the entry instead of copying
+IMMUTABLE_TYPES = (unicode, str, int, long, float, bool, type(None), datetime, date, timedelta)
+
+HOOK_ACTIONS = ('accept', 'reject', 'fail', 'complete')
+
+# Attributes stored under a different name by entries pickled before Entry had __slots__
+LEGACY_STATE_NAMES = {'traces': '_traces', 'snapshots': '_snapshots'}
+
 
 class EntryUnicodeError(Exception):
     """This exception is thrown when trying to set non-unicode compatible field value to entry."""
@@ -68,11 +77,14 @@ class Entry(dict):
     and trigger :meth:`~flexget.task.Task.abort`.
     """
 
+    # Tasks can hold a lot of entries, keep the bookkeeping small. Traces, snapshots and hooks are allocated on use.
+    __slots__ = ('_traces', '_snapshots', '_state', '_hooks', 'task')
+
     def __init__(self, *args, **kwargs):
-        self.traces = []
-        self.snapshots = {}
+        self._traces = None
+        self._snapshots = None
         self._state = 'undecided'
-        self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
+        self._hooks = None
         self.task = None
 
         if len(args) == 2:
@@ -98,6 +110,20 @@ class Entry(dict):
         if item not in self.traces:
             self.traces.append(item)
 
+    @property
+    def traces(self):
+        """List of (plugin, operation, message) tuples added by :meth:`trace`."""
+        if self._traces is None:
+            self._traces = []
+        return self._traces
+
+    @property
+    def snapshots(self):
+        """Dict of snapshots taken by :meth:`take_snapshot`, by name."""
+        if self._snapshots is None:
+            self._snapshots = {}
+        return self._snapshots
+
     def run_hooks(self, action, **kwargs):
         """
         Run hooks that have been registered for given ``action``.
@@ -105,7 +131,9 @@ class Entry(dict):
         :param action: Name of action to run hooks for
         :param kwargs: Keyword arguments that should be passed to the registered functions
         """
-        for func in self._hooks[action]:
+        if self._hooks is None:
+            return
+        for func in self._hooks.get(action, []):
             func(self, **kwargs)
 
     def add_hook(self, action, func, **kwargs):
@@ -117,10 +145,11 @@ class Entry(dict):
         :param kwargs: Keyword arguments that should be passed to ``func``
         :raises: ValueError when given an invalid ``action``
         """
-        try:
-            self._hooks[action].append(functools.partial(func, **kwargs))
-        except KeyError:
+        if action not in HOOK_ACTIONS:
             raise ValueError('`%s` is not a valid entry action' % action)
+        if self._hooks is None:
+            self._hooks = {}
+        self._hooks.setdefault(action, []).append(functools.partial(func, **kwargs))
 
     def on_accept(self, func, **kwargs):
         """
@@ -363,12 +392,14 @@ class Entry(dict):
     def take_snapshot(self, name):
         """
         Takes a snapshot of the entry under *name*. Snapshots can be accessed via :attr:`.snapshots`.
+        Immutable values are shared with the entry, only mutable ones are copied.
+
         :param string name: Snapshot name
         """
         snapshot = {}
         for field, value in self.iteritems():
             try:
-                snapshot[field] = copy.deepcopy(value)
+                snapshot[field] = value if type(value) in IMMUTABLE_TYPES else copy.deepcopy(value)
             except TypeError:
                 log.warning('Unable to take `%s` snapshot for field `%s` in `%s`' % (name, field, self['title']))
         if snapshot:
@@ -414,6 +445,23 @@ class Entry(dict):
         log.trace('rendering: %s' % template)
         return render_from_entry(template, self)
 
+    @classmethod
+    def _slot_names(cls):
+        """Names of the bookkeeping attributes defined by this class and the classes it extends."""
+        return [name for klass in cls.__mro__ for name in getattr(klass, '__slots__', ())]
+
+    def __getstate__(self):
+        return dict((name, getattr(self, name, None)) for name in self._slot_names())
+
+    def __setstate__(self, state):
+        self._traces = self._snapshots = self._hooks = self.task = None
+        self._state = 'undecided'
+        slots = self._slot_names()
+        for name, value in state.iteritems():
+            name = LEGACY_STATE_NAMES.get(name, name)
+            if name in slots:
+                setattr(self, name, value)
+
     def __eq__(self, other):
         return self.get('title') == other.get('title') and self.get('original_url') == other.get('original_url')
 
@@ -422,3 +470,53 @@ class Entry(dict):
 
     def __repr__(self):
         return '<Entry(title=%s,state=%s)>' % (self['title'], self._state)
+
+
+class DeferredEntry(Entry):
+    """
+    Copy of an entry that is processed by a worker thread. Accepting, rejecting or failing the copy only records
+    the decision, :meth:`apply` copies field changes and decisions back to the original entry from the task thread.
+    """
+
+    __slots__ = ('original', 'fields', 'decisions')
+
+    def __init__(self, entry, resolve=()):
+        """
+        :param entry: Entry to copy
+        :param resolve: Lazy fields that should be resolved now, on the calling thread
+        """
+        Entry.__init__(self, entry)
+        self.task = entry.task
+        self.original = entry
+        self.decisions = []
+        for field in resolve:
+            if self.is_lazy(field):
+                self[field] = entry[field]
+        self.fields = dict(self)
+
+    def accept(self, reason=None, **kwargs):
+        if not self.rejected:
+            self._state = 'accepted'
+        self.decisions.append(('accept', reason, kwargs))
+
+    def reject(self, reason=None, **kwargs):
+        if not self.get('immortal'):
+            self._state = 'rejected'
+        self.decisions.append(('reject', reason, kwargs))
+
+    def fail(self, reason=None, **kwargs):
+        if not self.failed:
+            self._state = 'failed'
+            self.decisions.append(('fail', reason, kwargs))
+
+    def apply(self):
+        """Copies field changes and decisions made to this copy back to the original entry."""
+        entry = self.original
+        for key in self.fields:
+            if key not in self and key in entry:
+                del entry[key]
+        for key, value in dict.iteritems(self):
+            if key not in self.fields or self.fields[key] is not value:
+                entry[key] = value
+        for action, reason, kwargs in self.decisions:
+            getattr(entry, action)(reason, **kwargs)
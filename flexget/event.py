@@ -7,6 +7,8 @@ import logging
 log = logging.getLogger('event')
 
 _events = {}
+# Incremented whenever handlers are added, removed or reprioritized, allows caching anything derived from them
+_version = 0
 
 
 class Event(object):
@@ -15,7 +17,16 @@ class Event(object):
     def __init__(self, name, func, priority=128):
         self.name = name
         self.func = func
-        self.priority = priority
+        self._priority = priority
+
+    @property
+    def priority(self):
+        return self._priority
+
+    @priority.setter
+    def priority(self, value):
+        self._priority = value
+        _handlers_changed(self.name)
 
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
@@ -52,10 +63,31 @@ def get_events(name):
     """
     if not name in _events:
         raise KeyError('No such event %s' % name)
-    _events[name].sort(reverse=True)
     return _events[name]
 
 
+def get_event_names():
+    """
+    :return: List of names of all events which have handlers registered
+    """
+    return _events.keys()
+
+
+def get_handlers_version():
+    """
+    :return: Number which changes whenever any event handler is added, removed or has its priority changed
+    """
+    return _version
+
+
+def _handlers_changed(name):
+    """Keeps handlers of event `name` sorted by priority, so firing does not need to sort them."""
+    global _version
+    _version += 1
+    if name in _events:
+        _events[name].sort(reverse=True)
+
+
 def add_event_handler(name, func, priority=128):
     """
     :param string name: Event name
@@ -72,12 +104,14 @@ def add_event_handler(name, func, priority=128):
     log.trace('registered function %s to event %s' % (func.__name__, name))
     event = Event(name, func, priority)
     events.append(event)
+    _handlers_changed(name)
     return event
 
 
 def remove_event_handlers(name):
     """Removes all handlers for given event `name`."""
     _events.pop(name, None)
+    _handlers_changed(name)
 
 
 def remove_event_handler(name, func):
@@ -85,6 +119,7 @@ def remove_event_handler(name, func):
     for e in list(_events.get(name, [])):
         if e.func is func:
             _events[name].remove(e)
+            _handlers_changed(name)
 
 
 def fire_event(name, *args, **kwargs):
@@ -95,7 +130,5 @@ def fire_event(name, *args, **kwargs):
     :param args: List of arguments passed to handler function
     :param kwargs: Key Value arguments passed to handler function
     """
-    if not name in _events:
-        return
-    for event in get_events(name):
+    for event in _events.get(name, ()):
         event(*args, **kwargs)
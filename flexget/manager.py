@@ -105,8 +105,8 @@ class Manager(object):
         self.initialize()
 
         # cannot be imported at module level because of circular references
-        from flexget.utils.simple_persistence import SimplePersistence
-        self.persist = SimplePersistence('manager')
+        from flexget.utils.simple_persistence import CachedPersistence
+        self.persist = CachedPersistence('manager')
 
         log.debug('sys.defaultencoding: %s' % sys.getdefaultencoding())
         log.debug('sys.getfilesystemencoding: %s' % sys.getfilesystemencoding())
@@ -224,7 +224,7 @@ class Manager(object):
                 signal.signal(signal.SIGTERM, self._handle_sigterm)
                 self.ipc_server.start()
                 fire_event('manager.daemon.started', self)
-                self.scheduler.start()
+                self.scheduler.start(workers=options.workers)
                 try:
                     self.scheduler.wait()
                 except KeyboardInterrupt:
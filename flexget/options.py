@@ -307,6 +307,9 @@ class ArgumentParser(ArgParser):
         """
         if not self.subparsers:
             raise TypeError('This parser does not have subparsers')
+        if hasattr(self.subparsers.choices.get(name), 'lazy_loader'):
+            # Replacing the placeholder of a command whose plugin has not been imported yet
+            self.subparsers._choices_actions = [a for a in self.subparsers._choices_actions if a.dest != name]
         if self.subparsers.scoped_namespaces:
             kwargs.setdefault('nested_namespace_name', name)
         result = self.subparsers.add_parser(name, **kwargs)
@@ -323,13 +326,17 @@ class ArgumentParser(ArgParser):
         return p
 
     def _get_values(self, action, arg_strings):
-        """Complete the full name for partial subcommands"""
+        """Complete the full name for partial subcommands, and import plugins providing the chosen one"""
         if action.nargs == PARSER and self.subparsers:
             subcommand = arg_strings[0]
             if subcommand not in self.subparsers.choices:
                 matches = [x for x in self.subparsers.choices if x.startswith(subcommand)]
                 if len(matches) == 1:
                     arg_strings[0] = matches[0]
+            # Placeholder for a command provided by a plugin which has not been imported yet
+            lazy_loader = getattr(self.subparsers.choices.get(arg_strings[0]), 'lazy_loader', None)
+            if lazy_loader:
+                lazy_loader()
         return super(ArgumentParser, self)._get_values(action, arg_strings)
 
     def _debug_tb_callback(self, *dummy):
@@ -402,6 +409,8 @@ class CoreArgumentParser(ArgumentParser):
         daemon_parser.add_subparsers(title='actions', metavar='<action>', dest='action')
         start_parser = daemon_parser.add_subparser('start', help='start the daemon')
         start_parser.add_argument('-d', '--daemonize', action='store_true', help=daemonize_help)
+        start_parser.add_argument('--workers', type=int, default=1, metavar='N',
+                                  help='number of tasks which may execute at the same time (default: %(default)s)')
         daemon_parser.add_subparser('stop', help='shutdown the running daemon')
         daemon_parser.add_subparser('status', help='check if a daemon is running')
         daemon_parser.set_defaults(loglevel='info')
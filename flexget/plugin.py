@@ -5,16 +5,20 @@ from __future__ import unicode_literals, division, absolute_import
 import sys
 import os
 import re
+import json
 import logging
+import threading
 import time
 import pkgutil
 import warnings
+from importlib import import_module
 from itertools import ifilter
 
 from requests import RequestException
 
 from flexget import config_schema
-from flexget.event import add_event_handler as add_phase_handler, fire_event, remove_event_handlers
+from flexget.event import (add_event_handler as add_phase_handler, remove_event_handlers, get_events,
+                           get_event_names, get_handlers_version, Event)
 from flexget import plugins as plugins_pkg
 
 log = logging.getLogger('plugin')
@@ -179,6 +183,15 @@ _loaded_plugins = {}
 _plugin_options = []
 _new_phase_queue = {}
 
+# Bump when the contents of the plugin manifest change
+MANIFEST_VERSION = 1
+# Held while importing plugins on demand
+_load_lock = threading.RLock()
+# Mapping of CLI command to (module, help) for commands of plugin modules which have not been imported
+_lazy_commands = {}
+# Incremented when phases are added, plugins registered or builtin flags changed, see get_registry_version
+_registry_changes = 0
+
 
 def register_task_phase(name, before=None, after=None):
     """Adds a new task phase to the available phases."""
@@ -194,8 +207,10 @@ def register_task_phase(name, before=None, after=None):
             return False
         if not after is None and not after in task_phases:
             return False
+        global _registry_changes
         # add method name to phase -> method lookup table
         phase_methods[phase_name] = 'on_task_' + phase_name
+        _registry_changes += 1
         # place phase in phase list
         if before is None:
             task_phases.insert(task_phases.index(after) + 1, phase_name)
@@ -268,12 +283,14 @@ class PluginInfo(dict):
         self.plugin_class = plugin_class
         self.instance = None
 
-        if self.name in plugins:
+        if self.name in plugins and not isinstance(plugins[self.name], LazyPluginInfo):
             PluginInfo.dupe_counter += 1
             log.critical('Error while registering plugin %s. %s' %
                          (self.name, ('A plugin with the name %s is already registered' % self.name)))
         else:
+            global _registry_changes
             plugins[self.name] = self
+            _registry_changes += 1
 
     def initialize(self):
         if self.instance is not None:
@@ -331,6 +348,9 @@ class PluginInfo(dict):
         return dict.__getattribute__(self, attr)
 
     def __setattr__(self, attr, value):
+        global _registry_changes
+        if attr == 'builtin' and attr in self:
+            _registry_changes += 1
         self[attr] = value
 
     def __str__(self):
@@ -342,6 +362,75 @@ class PluginInfo(dict):
 register = PluginInfo
 
 
+class LazyEvent(Event):
+    """Phase handler of a :class:`LazyPluginInfo`, imports the plugin when called."""
+
+    def __init__(self, plugin, phase, priority):
+        super(LazyEvent, self).__init__('plugin.%s.%s' % (plugin.name, phase), None, priority)
+        self.plugin = plugin
+        self.phase = phase
+
+    def __call__(self, *args, **kwargs):
+        return self.plugin.load().phase_handlers[self.phase](*args, **kwargs)
+
+    def __str__(self):
+        return '<LazyEvent(name=%s,priority=%s)>' % (self.name, self.priority)
+
+    __repr__ = __str__
+
+
+class LazyPluginInfo(PluginInfo):
+    """
+    Stands in for a plugin described in the plugin manifest whose module has not been imported yet.
+    The information stored in the manifest is available as usual, anything else imports the module and is
+    taken from the real :class:`PluginInfo`.
+    """
+
+    def __init__(self, name, module, info):
+        dict.__init__(self)
+        self.name = name
+        self.module = module
+        self.api_ver = info['api_ver']
+        self.groups = info['groups']
+        self.builtin = info['builtin']
+        self.debug = info['debug']
+        self.contexts = info['contexts']
+        self.category = info['category']
+        self.phase_handlers = dict((phase, LazyEvent(self, phase, priority))
+                                   for phase, priority in info['phases'].iteritems())
+        self.schema = None
+        if info['schema']:
+            location = '/schema/plugin/%s' % name
+            self.schema = {'id': location, '$ref': location}
+            config_schema.register_schema(location, lambda: self.load().schema)
+        plugins[name] = self
+
+    def load(self):
+        """Imports the module of this plugin and returns the real :class:`PluginInfo`."""
+        _load_lazy_module(self.module)
+        plugin = plugins.get(self.name)
+        if plugin is None or isinstance(plugin, LazyPluginInfo):
+            raise DependencyError(issued_by=self.module, missing=self.name,
+                                  message='Plugin %s could not be loaded from %s' % (self.name, self.module))
+        return plugin
+
+    def initialize(self):
+        pass
+
+    def __getattr__(self, attr):
+        if attr in self:
+            return self[attr]
+        if attr.startswith('__'):
+            # Don't import the plugin for things like copy and pickle probing for special methods
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __str__(self):
+        return '<LazyPluginInfo(name=%s)>' % self.name
+
+    __repr__ = __str__
+
+
 def _strip_trailing_sep(path):
     return path.rstrip("\\/")
 
@@ -365,74 +454,316 @@ def _get_standard_plugins_path():
     return paths
 
 
-def _load_plugins_from_dirs(dirs):
+def _get_manifest_path():
+    """
+    :returns: Path of the plugin manifest file.
+    """
+    env_path = os.environ.get('FLEXGET_PLUGIN_MANIFEST')
+    if env_path:
+        return env_path
+    return os.path.join(os.path.expanduser('~'), '.flexget', 'plugin_manifest.json')
+
+
+def _find_plugin_modules(dirs):
     """
     :param list dirs: Directories from where plugins are loaded from
+    :returns: List of (module name, loader) tuples for all plugin modules, without importing them
     """
 
     log.debug('Trying to load plugins from: %s' % dirs)
     # add all dirs to plugins_pkg load path so that plugins are loaded from flexget and from ~/.flexget/plugins/
     plugins_pkg.__path__ = map(_strip_trailing_sep, dirs)
+    modules = []
     for importer, name, ispkg in pkgutil.walk_packages(dirs, plugins_pkg.__name__ + '.'):
         if ispkg:
             continue
-        # Don't load any plugins again if they are already loaded
-        # This can happen if one plugin imports from another plugin
-        if name in sys.modules:
-            continue
         loader = importer.find_module(name)
         # Don't load from pyc files
         if not loader.filename.endswith('.py'):
             continue
-        try:
+        modules.append((name, loader))
+    return modules
+
+
+def _import_plugin_module(name, loader=None):
+    """
+    Imports a plugin module, logging any problems.
+
+    :returns: False if the module could not be imported
+    """
+    try:
+        if loader:
             loaded_module = loader.load_module(name)
-        except DependencyError as e:
-            if e.has_message():
-                msg = e.message
-            else:
-                msg = 'Plugin `%s` requires `%s` to load.' % (e.issued_by or name, e.missing or 'N/A')
-            if not e.silent:
-                log.warning(msg)
-            else:
-                log.debug(msg)
-        except ImportError as e:
-            log.critical('Plugin `%s` failed to import dependencies' % name)
-            log.exception(e)
-        except Exception as e:
-            log.critical('Exception while loading plugin %s' % name)
-            log.exception(e)
-            raise
         else:
-            log.trace('Loaded module %s from %s' % (name, loaded_module.__file__))
+            loaded_module = import_module(name)
+    except DependencyError as e:
+        if e.has_message():
+            msg = e.message
+        else:
+            msg = 'Plugin `%s` requires `%s` to load.' % (e.issued_by or name, e.missing or 'N/A')
+        if not e.silent:
+            log.warning(msg)
+        else:
+            log.debug(msg)
+    except ImportError as e:
+        log.critical('Plugin `%s` failed to import dependencies' % name)
+        log.exception(e)
+    except Exception as e:
+        log.critical('Exception while loading plugin %s' % name)
+        log.exception(e)
+        raise
+    else:
+        log.trace('Loaded module %s from %s' % (name, loaded_module.__file__))
+        return True
+    return False
 
-    if _new_phase_queue:
-        for phase, args in _new_phase_queue.iteritems():
-            log.error('Plugin %s requested new phase %s, but it could not be created at requested '
-                      'point (before, after). Plugin is not working properly.' % (args[0], phase))
 
+def _registry_sizes():
+    """Sizes of the global registries which can't be traced back to the plugin module adding to them."""
+    return len(task_phases) + len(_new_phase_queue), len(config_schema.schema_paths)
 
-def load_plugins():
-    """Load plugins from the standard plugin paths."""
+
+def _defining_modules():
+    """
+    :returns: Set of modules which define database tables, or event handlers which are not about registering plugins
+        or CLI options.
+    """
+    from flexget.manager import Base
+    modules = set(cls.__module__ for cls in Base._decl_class_registry.values() if isinstance(cls, type))
+    for name in get_event_names():
+        # Phase handlers of plugins are also events, named plugin.<name>.<phase>
+        if not name.startswith('plugin.') and name != 'options.register':
+            modules.update(handler.func.__module__ for handler in get_events(name))
+    return modules
+
+
+def _register_plugins(manifest=None):
+    """
+    Registers and initializes the plugins of all imported modules which have not been registered yet.
+
+    :param dict manifest: If given, the plugins are recorded under the module registering them.
+    """
+    if 'plugin.register' in get_event_names():
+        for handler in get_events('plugin.register'):
+            registered = set(plugins)
+            handler()
+            if manifest and handler.func.__module__ in manifest:
+                manifest[handler.func.__module__]['plugins'].update(dict.fromkeys(set(plugins) - registered))
+        # Plugins should only be registered once, remove their handlers after
+        remove_event_handlers('plugin.register')
+    # After they have all been registered, instantiate them
+    for plugin in plugins.values():
+        plugin.initialize()
+
+
+def _load_all_plugins(modules, record=False):
+    """
+    Imports all plugin `modules` and registers their plugins.
+
+    :param bool record: Build a manifest describing what each module registers.
+    :returns: The manifest, a dict keyed by module name
+    """
+    manifest = {}
+    preloaded = set(sys.modules)
+    for name, loader in modules:
+        # Modules which fail to import are never made lazy, so they keep getting retried
+        manifest[name] = {'mtime': os.path.getmtime(loader.filename), 'eager': True, 'plugins': {},
+                          'commands': {}}
+        # Don't load any plugins again if they are already loaded
+        # This can happen if one plugin imports from another plugin
+        if name in sys.modules:
+            # What we don't know about modules imported before plugin loading started could be anything
+            manifest[name]['eager'] = name in preloaded
+            continue
+        before = _registry_sizes()
+        if _import_plugin_module(name, loader):
+            manifest[name]['eager'] = _registry_sizes() != before
+    _register_plugins(manifest if record else None)
+    if not record:
+        return manifest
+    defining = _defining_modules()
+    for name, record in manifest.iteritems():
+        if name in defining:
+            record['eager'] = True
+        for plugin_name in record['plugins']:
+            plugin = plugins[plugin_name]
+            record['plugins'][plugin_name] = {
+                'api_ver': plugin.api_ver,
+                'groups': plugin.groups,
+                'builtin': plugin.builtin,
+                'debug': plugin.debug,
+                'contexts': plugin.contexts,
+                'category': plugin.category,
+                'phases': dict((phase, handler.priority) for phase, handler in plugin.phase_handlers.iteritems()),
+                'schema': plugin.schema is not None}
+            # Builtins run in every task anyway
+            if plugin.builtin:
+                record['eager'] = True
+    return manifest
+
+
+def _parser_sizes(parser, path=()):
+    """Number of arguments on `parser` and all its nested subcommand parsers."""
+    sizes = {path: len(parser._actions)}
+    if parser.subparsers:
+        for name, subparser in parser.subparsers.choices.iteritems():
+            sizes.update(_parser_sizes(subparser, path + (name,)))
+    return sizes
+
+
+def _record_commands(manifest):
+    """Builds the CLI parser, recording into `manifest` which commands each plugin module adds."""
+    from flexget import options
+    if options.core_parser or 'options.register' not in get_event_names():
+        return
+    parser = options.core_parser = options.CoreArgumentParser()
+    # Add all plugin options to the parser, one module at a time
+    for handler in get_events('options.register'):
+        before = _parser_sizes(parser)
+        handler()
+        record = manifest.get(handler.func.__module__)
+        if not record:
+            continue
+        after = _parser_sizes(parser)
+        if any(after[path] != size for path, size in before.iteritems()):
+            # Options added to existing commands are needed whatever command is run
+            record['eager'] = True
+        for action in parser.subparsers._choices_actions:
+            if (action.dest,) in after and (action.dest,) not in before:
+                record['commands'][action.dest] = action.help
+
+
+def _read_manifest(path, dirs, modules):
+    """
+    :returns: The manifest stored at `path`, or None if it does not exist or is out of date for `modules`.
+    """
+    import flexget
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (IOError, ValueError) as e:
+        log.debug('Unable to read plugin manifest %s: %s' % (path, e))
+        return None
+    if (data.get('version') != MANIFEST_VERSION or data.get('flexget') != flexget.__version__ or
+            data.get('dirs') != dirs):
+        log.debug('Plugin manifest was built for another installation')
+        return None
+    manifest = data['modules']
+    if set(manifest) != set(name for name, loader in modules):
+        log.debug('Plugin modules have been added or removed since the plugin manifest was built')
+        return None
+    for name, loader in modules:
+        if manifest[name]['mtime'] != os.path.getmtime(loader.filename):
+            log.debug('Plugin module %s has been modified since the plugin manifest was built' % name)
+            return None
+    return manifest
+
+
+def _write_manifest(path, dirs, manifest):
+    import flexget
+    data = {'version': MANIFEST_VERSION, 'flexget': flexget.__version__, 'dirs': dirs, 'modules': manifest}
+    try:
+        # The config may live elsewhere, in which case ~/.flexget does not exist yet
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    except (IOError, OSError) as e:
+        log.verbose('Unable to write plugin manifest %s, plugins will not be loaded lazily: %s' % (path, e))
+    else:
+        log.debug('Wrote plugin manifest to %s' % path)
+
+
+def _load_from_manifest(modules, manifest):
+    """Imports the plugin modules which are always needed, the rest are represented by lazy placeholders."""
+    for name, loader in modules:
+        if name not in sys.modules and manifest[name]['eager']:
+            _import_plugin_module(name, loader)
+    _register_plugins()
+    for name, record in manifest.iteritems():
+        if name in sys.modules:
+            continue
+        for plugin_name, info in record['plugins'].iteritems():
+            LazyPluginInfo(plugin_name, name, info)
+        for command, help in record['commands'].iteritems():
+            _lazy_commands[command] = (name, help)
+    if _lazy_commands:
+        add_phase_handler('options.register', _register_lazy_commands)
+
+
+def _load_lazy_module(name):
+    """Imports a plugin module which was skipped at startup, and registers its plugins."""
+    with _load_lock:
+        if name not in sys.modules:
+            log.debug('Importing plugin module %s on demand' % name)
+            _import_plugin_module(name)
+        _register_plugins()
+
+
+def _register_lazy_commands():
+    """Adds placeholders for commands of plugin modules which have not been imported."""
+    from flexget.options import get_parser
+    for command, (module, help) in _lazy_commands.iteritems():
+        subparser = get_parser().add_subparser(command, help=help)
+        subparser.lazy_loader = lambda module=module: _load_lazy_command(module)
+
+
+def _load_lazy_command(module):
+    """Imports a module defining a CLI command, replacing the placeholder parser with the real one."""
+    with _load_lock:
+        registered = set(id(handler) for handler in get_events('options.register'))
+        _load_lazy_module(module)
+        for handler in get_events('options.register'):
+            if id(handler) not in registered:
+                handler()
+
+
+def load_plugins(lazy=True):
+    """
+    Load plugins from the standard plugin paths.
+
+    :param bool lazy: Only import the plugin modules which are needed at startup, according to the plugin manifest.
+        Other plugins are imported once they are used. The manifest is rebuilt, importing all plugins, when it is
+        missing or out of date.
+    """
     global plugins_loaded
 
     # suppress DeprecationWarning's
     warnings.simplefilter('ignore', DeprecationWarning)
 
     start_time = time.time()
-    # Import all the plugins
-    _load_plugins_from_dirs(_get_standard_plugins_path())
-    # Register them
-    fire_event('plugin.register')
-    # Plugins should only be registered once, remove their handlers after
-    remove_event_handlers('plugin.register')
-    # After they have all been registered, instantiate them
-    for plugin in plugins.values():
-        plugin.initialize()
+    dirs = _get_standard_plugins_path()
+    modules = _find_plugin_modules(dirs)
+    manifest_path = _get_manifest_path()
+    manifest = lazy and _read_manifest(manifest_path, dirs, modules)
+    if manifest:
+        _load_from_manifest(modules, manifest)
+    else:
+        # Import all the plugins
+        manifest = _load_all_plugins(modules, record=lazy)
+        if lazy:
+            _record_commands(manifest)
+            _write_manifest(manifest_path, dirs, manifest)
+
+    if _new_phase_queue:
+        for phase, args in _new_phase_queue.iteritems():
+            log.error('Plugin %s requested new phase %s, but it could not be created at requested '
+                      'point (before, after). Plugin is not working properly.' % (args[0], phase))
+
     took = time.time() - start_time
     plugins_loaded = True
     log.debug('Plugins took %.2f seconds to load' % took)
 
 
+def get_registry_version():
+    """
+    :return: Value which changes whenever phases are added, plugins are registered, or plugins change their phase
+      handlers, handler priorities or builtin status. Anything derived from those can be cached until it changes.
+    """
+    return get_handlers_version(), _registry_changes
+
+
 def get_plugins(phase=None, group=None, context=None, category=None, min_api=None):
     """
     Query other plugins characteristics.
@@ -512,4 +843,6 @@ def get_plugin_by_name(name, issued_by='???'):
     """Get plugin by name, preferred way since this structure may be changed at some point."""
     if not name in plugins:
         raise DependencyError(issued_by=issued_by, missing=name, message='Unknown plugin %s' % name)
+    if isinstance(plugins[name], LazyPluginInfo):
+        return plugins[name].load()
     return plugins[name]
@@ -14,12 +14,25 @@ _start = {}
 
 query_count = 0
 
+#: Named counters plugins may increment, they are reported with the results when --debug-perf is used
+counters = {}
+
 
 def log_query_count(name_point):
     """Debugging purposes, allows logging number of executed queries at :name_point:"""
     log.info('At point named `%s` total of %s queries were ran' % (name_point, query_count))
 
 
+def increment_counter(name, amount=1):
+    """Increases named performance counter :name: by :amount:"""
+    counters[name] = counters.get(name, 0) + amount
+
+
+def set_counter(name, value):
+    """Sets named performance counter :name: to :value:"""
+    counters[name] = value
+
+
 @event('manager.execute.started')
 def startup(manager):
     if manager.options.execute.debug_perf:
@@ -65,6 +78,10 @@ def startup(manager):
                     queries = results['queries']
                     if took > 0.1 or queries > 10:
                         log.info('%-15s took %0.2f sec (%s queries)' % (keyword, took, queries))
+            if counters:
+                log.info('Performance counters:')
+                for name, value in sorted(counters.iteritems()):
+                    log.info('%-30s %s' % (name, value))
 
 
 @event('options.register')
@@ -9,9 +9,8 @@ from flexget.manager import Session
 from flexget.utils.tools import console
 
 try:
-    from flexget.plugins.filter.series import (Series, Episode, Release, SeriesTask, forget_series,
-                                               forget_series_episode, set_series_begin, normalize_series_name,
-                                               new_eps_after, get_latest_download)
+    from flexget.plugins.filter.series import (Series, Episode, SeriesProgress, forget_series,
+                                               forget_series_episode, set_series_begin, normalize_series_name)
 except ImportError:
     raise plugin.DependencyError(issued_by='cli_series', missing='series',
                                  message='Series commandline interface not loaded')
@@ -39,20 +38,20 @@ def display_summary(options):
 
     session = Session()
     try:
-        query = (session.query(Series).outerjoin(Series.episodes).outerjoin(Episode.releases).
-                 outerjoin(Series.in_tasks).group_by(Series.id))
+        query = session.query(Series, SeriesProgress).outerjoin(SeriesProgress,
+                                                                SeriesProgress.series_id == Series.id)
         if options.configured == 'configured':
-            query = query.having(func.count(SeriesTask.id) >= 1)
+            query = query.filter(Series.in_tasks.any())
         elif options.configured == 'unconfigured':
-            query = query.having(func.count(SeriesTask.id) < 1)
+            query = query.filter(~Series.in_tasks.any())
         if options.premieres:
-            query = (query.having(func.max(Episode.season) <= 1).having(func.max(Episode.number) <= 2).
-                     having(func.count(SeriesTask.id) < 1)).filter(Release.downloaded == True)
+            query = (query.filter(SeriesProgress.season <= 1).filter(SeriesProgress.number <= 2).
+                     filter(~Series.in_tasks.any()))
         if options.new:
-            query = query.having(func.max(Episode.first_seen) > datetime.now() - timedelta(days=options.new))
+            query = query.filter(SeriesProgress.last_seen > datetime.now() - timedelta(days=options.new))
         if options.stale:
-            query = query.having(func.max(Episode.first_seen) < datetime.now() - timedelta(days=options.stale))
-        for series in query.order_by(Series.name).yield_per(10):
+            query = query.filter(SeriesProgress.last_seen < datetime.now() - timedelta(days=options.stale))
+        for series, progress in query.order_by(Series.name).yield_per(10):
             series_name = series.name
             if len(series_name) > 30:
                 series_name = series_name[:27] + '...'
@@ -62,14 +61,13 @@ def display_summary(options):
             status = 'N/A'
             age = 'N/A'
             episode_id = 'N/A'
-            latest = get_latest_download(series)
-            if latest:
-                if latest.first_seen > datetime.now() - timedelta(days=2):
+            if progress and progress.episode_id:
+                if progress.first_seen > datetime.now() - timedelta(days=2):
                     new_ep = '>'
-                behind = new_eps_after(latest)
-                status = get_latest_status(latest)
-                age = latest.age
-                episode_id = latest.identifier
+                behind = progress.behind
+                status = progress.status
+                age = progress.age
+                episode_id = progress.identifier
 
             if behind:
                 episode_id += ' +%s' % behind
@@ -136,24 +134,6 @@ def forget(manager, options):
     manager.config_changed()
 
 
-def get_latest_status(episode):
-    """
-    :param episode: Instance of Episode
-    :return: Status string for given episode
-    """
-    status = ''
-    for release in sorted(episode.releases, key=lambda r: r.quality):
-        if not release.downloaded:
-            continue
-        status += release.quality.name
-        if release.proper_count > 0:
-            status += '-proper'
-            if release.proper_count > 1:
-                status += str(release.proper_count)
-        status += ', '
-    return status.rstrip(', ') if status else None
-
-
 def display_details(name):
     """Display detailed series information, ie. series show NAME"""
 
@@ -1,26 +1,56 @@
 from __future__ import unicode_literals, division, absolute_import
 import __builtin__
+import ast
 import logging
-import re
 import datetime
-from copy import copy
 
 from flexget import plugin
 from flexget.event import event
 from flexget.task import Task
 from flexget.entry import Entry
+from flexget.utils.tools import LayeredDict
 
 log = logging.getLogger('if')
 
 
+# Builtins available in if statements
+SAFE_BUILTINS = dict((name, getattr(__builtin__, name)) for name in
+                     ['True', 'False', 'str', 'unicode', 'int', 'float', 'len', 'any', 'all', 'sorted'])
+
+# Compiled code of checked statements, statements come from config so this stays small
+_compiled = {}
+
+
+def compile_statement(statement):
+    """
+    Parses `statement` into code that can be evaluated, after making sure it does not access anything with `__`
+    in its name or define lambdas. Results are remembered, statements are checked and compiled only once.
+
+    :raises SyntaxError: If `statement` is not a valid python expression.
+    :raises ValueError: If `statement` is not allowed.
+    """
+    try:
+        return _compiled[statement]
+    except KeyError:
+        pass
+    # eval ignores leading whitespace, ast does not
+    tree = ast.parse(statement.lstrip(' \t'), mode='eval')
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Lambda):
+            raise ValueError('`__`, lambda or try blocks not allowed in if statements.')
+        # Strings can reach attributes through str.format, eg. '{0.__class__}'.format(title)
+        for name in (getattr(node, 'id', None), getattr(node, 'attr', None), getattr(node, 'arg', None),
+                     node.s if isinstance(node, ast.Str) else None):
+            if name and '__' in name:
+                raise ValueError('`__`, lambda or try blocks not allowed in if statements.')
+    code = compile(tree, '<if>', 'eval')
+    _compiled[statement] = code
+    return code
+
+
 def safer_eval(statement, locals):
-    """A safer eval function. Does not allow __ or try statements, only includes certain 'safe' builtins."""
-    allowed_builtins = ['True', 'False', 'str', 'unicode', 'int', 'float', 'len', 'any', 'all', 'sorted']
-    for name in allowed_builtins:
-        locals[name] = getattr(__builtin__, name)
-    if re.search(r'__|try\s*:|lambda', statement):
-        raise ValueError('`__`, lambda or try blocks not allowed in if statements.')
-    return eval(statement, {'__builtins__': None}, locals)
+    """A safer eval function. Does not allow __ or lambdas, only includes certain 'safe' builtins."""
+    return eval(compile_statement(statement), {'__builtins__': None}, LayeredDict(locals, dict(SAFE_BUILTINS)))
 
 
 class FilterIf(object):
@@ -44,14 +74,12 @@ class FilterIf(object):
     def check_condition(self, condition, entry):
         """Checks if a given `entry` passes `condition`"""
         # Make entry fields and other utilities available in the eval namespace
-        # We need our namespace to be an Entry instance for lazy loading to work
-        eval_locals = copy(entry)
-        eval_locals.update({'has_field': lambda f: f in entry,
-                            'timedelta': datetime.timedelta,
-                            'now': datetime.datetime.now()})
+        # Lookups need to go through the Entry for lazy loading to work
+        eval_locals = LayeredDict(entry, dict(SAFE_BUILTINS, has_field=lambda f: f in entry,
+                                              timedelta=datetime.timedelta, now=datetime.datetime.now()))
         try:
             # Restrict eval namespace to have no globals and locals only from eval_locals
-            passed = safer_eval(condition, eval_locals)
+            passed = eval(compile_statement(condition), {'__builtins__': None}, eval_locals)
             if passed:
                 log.debug('%s matched requirement %s' % (entry['title'], condition))
             return passed
@@ -77,6 +105,12 @@ class FilterIf(object):
                 'fail': Entry.fail}
             for item in config:
                 requirement, action = item.items()[0]
+                try:
+                    compile_statement(requirement)
+                except (SyntaxError, ValueError) as e:
+                    # Report once, instead of for every entry
+                    log.error('Error occured while evaluating statement `%s`. (%s)' % (requirement, e))
+                    continue
                 passed_entries = [e for e in task.entries if self.check_condition(requirement, e)]
                 if isinstance(action, basestring):
                     if not phase == 'filter':
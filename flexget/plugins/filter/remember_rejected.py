@@ -2,7 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import Column, Integer, String, Unicode, DateTime, ForeignKey, and_, Index
+from sqlalchemy import Column, Integer, String, Unicode, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relation
 
 from flexget import db_schema, plugin
@@ -73,6 +73,18 @@ class FilterRememberRejected(object):
         entry.reject('message', remember=True)
     """
 
+    def __init__(self):
+        # Remembered rejections of running tasks by task name, {(title, url): (rejected_by, reason)}
+        self.remembered = {}
+
+    def load_remembered(self, task, task_id):
+        """Loads remembered rejections of the task into memory with one query."""
+        query = task.session.query(RememberEntry.title, RememberEntry.url, RememberEntry.rejected_by,
+                                   RememberEntry.reason).filter(RememberEntry.task_id == task_id)
+        remembered = dict(((title, url), (rejected_by, reason)) for title, url, rejected_by, reason in query)
+        self.remembered[task.name] = (task_id, remembered)
+        log.debug('loaded %s remembered rejections' % len(remembered))
+
     @plugin.priority(0)
     def on_task_start(self, task, config):
         """Purge remembered entries if the config has changed."""
@@ -84,7 +96,8 @@ class FilterRememberRejected(object):
             old_task = None
         if not old_task:
             # Create this task in the db if not present
-            task.session.add(RememberTask(name=task.name))
+            old_task = RememberTask(name=task.name)
+            task.session.add(old_task)
         elif not task.is_rerun:
             # Delete expired items if this is not a rerun
             deleted = task.session.query(RememberEntry).filter(RememberEntry.task_id == old_task.id).\
@@ -93,6 +106,7 @@ class FilterRememberRejected(object):
                 log.debug('%s entries have expired from remember_rejected table.' % deleted)
                 task.config_changed()
         task.session.commit()
+        self.load_remembered(task, old_task.id)
 
     @plugin.priority(-255)
     def on_task_input(self, task, config):
@@ -102,19 +116,26 @@ class FilterRememberRejected(object):
     @plugin.priority(255)
     def on_task_filter(self, task, config):
         """Reject any remembered entries from previous runs"""
-        (task_id,) = task.session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
-        reject_entries = task.session.query(RememberEntry).filter(RememberEntry.task_id == task_id)
-        if reject_entries.count():
-            # Reject all the remembered entries
-            for entry in task.entries:
-                if not entry.get('url'):
-                    # We don't record or reject any entries without url
-                    continue
-                reject_entry = reject_entries.filter(and_(RememberEntry.title == entry['title'],
-                                                          RememberEntry.url == entry['original_url'])).first()
-                if reject_entry:
-                    entry.reject('Rejected on behalf of %s plugin: %s' %
-                        (reject_entry.rejected_by, reject_entry.reason))
+        if task.name not in self.remembered:
+            (task_id,) = task.session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
+            self.load_remembered(task, task_id)
+        task_id, remembered = self.remembered[task.name]
+        if not remembered:
+            return
+        # Reject all the remembered entries
+        for entry in task.entries:
+            if not entry.get('url'):
+                # We don't record or reject any entries without url
+                continue
+            reject_entry = remembered.get((entry['title'], entry['original_url']))
+            if reject_entry:
+                entry.reject('Rejected on behalf of %s plugin: %s' % reject_entry)
+
+    @plugin.priority(-255)
+    def on_task_exit(self, task, config):
+        self.remembered.pop(task.name, None)
+
+    on_task_abort = on_task_exit
 
     def on_entry_reject(self, entry, task=None, remember=None, remember_time=None, **kwargs):
         # We only remember rejections that specify the remember keyword argument
@@ -128,15 +149,27 @@ class FilterRememberRejected(object):
         if not entry.get('title') or not entry.get('original_url'):
             log.debug('Can\'t remember rejection for entry without title or url.')
             return
+        key = (entry['title'], entry['original_url'])
+        if task.name in self.remembered:
+            remember_task_id, remembered = self.remembered[task.name]
+            if key in remembered:
+                log.debug('Rejection of `%s` is already remembered' % entry['title'])
+                return
+        else:
+            # Rejected outside of task execution
+            (remember_task_id,) = task.session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
+            remembered = None
         message = 'Remembering rejection of `%s`' % entry['title']
         if remember_time:
             message += ' for %i minutes' % (remember_time.seconds / 60)
         log.info(message)
-        (remember_task_id,) = task.session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
         task.session.add(RememberEntry(title=entry['title'], url=entry['original_url'], task_id=remember_task_id,
                                        rejected_by=task.current_plugin, reason=kwargs.get('reason'), expires=expires))
-        # The test stops passing when this is taken out for some reason...
-        task.session.flush()
+        if remembered is None:
+            # Not rejected during task execution, write the row right away
+            task.session.flush()
+        else:
+            remembered[key] = (task.current_plugin, kwargs.get('reason'))
 
 
 @event('manager.db_cleanup')
@@ -6,25 +6,37 @@ forget (string)
     Given string can be task name, remembered field (url, imdb_url) or a title. If given value is a
     task name then everything in that task will be forgotten. With title all learned fields from it and the
     title will be forgotten. With field value only that particular field is forgotten.
+
+Config keys:
+
+seen_index (boolean)
+
+    Keep an in-memory hash index of all seen values, so entries which have certainly not been seen are never
+    looked up from the database. Mostly useful for daemon mode, the index is snapshotted next to the database
+    so restarts do not need to rebuild it.
 """
 
 from __future__ import unicode_literals, division, absolute_import
+import hashlib
 import logging
+import os
+import struct
 from datetime import datetime, timedelta
 
-from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index
+from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index, func
 from sqlalchemy.orm import relation
 from sqlalchemy.schema import ForeignKey
 
-from flexget import db_schema, options, plugin
+from flexget import config_schema, db_schema, options, plugin
 from flexget.event import event
 from flexget.manager import Session
+from flexget.plugins.cli.performance import increment_counter
 from flexget.utils.imdb import is_imdb_url, extract_id
 from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
-from flexget.utils.tools import console
+from flexget.utils.tools import console, chunked
 
 log = logging.getLogger('seen')
-Base = db_schema.versioned_base('seen', 4)
+Base = db_schema.versioned_base('seen', 5)
 
 
 @db_schema.upgrade('seen')
@@ -51,6 +63,19 @@ def upgrade(ver, session):
         entry_table = table_schema('seen_entry', session)
         session.execute(update(entry_table, entry_table.c.local == None, {'local': False}))
         ver = 4
+    if ver == 4:
+        # sqlite can only add AUTOINCREMENT by creating the table again
+        log.info('Rebuilding seen_field table so that ids of removed fields are never reused.')
+        session.execute('ALTER TABLE seen_field RENAME TO seen_field_old')
+        indexes = session.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND "
+                                  "tbl_name = 'seen_field_old' AND sql IS NOT NULL").fetchall()
+        for (index,) in indexes:
+            session.execute('DROP INDEX %s' % index)
+        SeenField.__table__.create(bind=session.bind)
+        session.execute('INSERT INTO seen_field (id, seen_entry_id, field, value, added) '
+                        'SELECT id, seen_entry_id, field, value, added FROM seen_field_old')
+        session.execute('DROP TABLE seen_field_old')
+        ver = 5
 
     return ver
 
@@ -82,6 +107,8 @@ class SeenEntry(Base):
 class SeenField(Base):
 
     __tablename__ = 'seen_field'
+    # Ids are never reused, the seen index relies on new values always getting higher ids
+    __table_args__ = {'sqlite_autoincrement': True}
 
     id = Column(Integer, primary_key=True)
     seen_entry_id = Column(Integer, ForeignKey('seen_entry.id'), nullable=False, index=True)
@@ -98,6 +125,118 @@ class SeenField(Base):
         return '<SeenField(field=%s,value=%s,added=%s)>' % (self.field, self.value, self.added)
 
 
+class SeenIndex(object):
+    """
+    In-memory set of 64-bit hashes of all :class:`SeenField` values.
+
+    A value missing from the index has certainly not been seen, so it does not need to be looked up from the
+    database. Values found from the index still need to be verified from the database, hash collisions and
+    rolled back or forgotten values only cause an extra lookup, never a wrongly accepted entry.
+
+    The index is synced incrementally by :class:`SeenField` id before each use, which also picks up values added
+    by other processes. Ids are never reused (the table is AUTOINCREMENT), so new rows always have ids above the
+    highest one indexed. Values deleted by other processes only leave stale hashes behind, so deletions are
+    checked only when a snapshot is loaded: if its row count does not match the database the index is rebuilt.
+    """
+
+    magic = b'FGSEEN'
+    version = 2
+    header = struct.Struct(b'<6sHQQQ')
+
+    def __init__(self):
+        self.database_uri = None
+        self.hashes = set()
+        self.max_id = 0
+        self.count = 0
+        self.dirty = False
+
+    @staticmethod
+    def hash(value):
+        return struct.unpack(b'<Q', hashlib.md5(value.encode('utf-8')).digest()[:8])[0]
+
+    def __contains__(self, value):
+        return self.hash(value) in self.hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, value):
+        self.hashes.add(self.hash(value))
+
+    def clear(self):
+        """Empties the index, it will be rebuilt on next :meth:`sync`."""
+        self.hashes = set()
+        self.max_id = 0
+        self.count = 0
+        self.dirty = True
+
+    def sync(self, manager, session):
+        """Makes sure the index contains all values from the database of `manager`."""
+        if manager.database_uri != self.database_uri:
+            self.clear()
+            self.database_uri = manager.database_uri
+            snapshot = self.snapshot_path(manager)
+            if snapshot and os.path.exists(snapshot) and self.load(snapshot):
+                known = session.query(func.count(SeenField.id)).filter(SeenField.id <= self.max_id).scalar()
+                if known != self.count:
+                    log.debug('seen index snapshot out of sync (%s rows indexed, %s in database), rebuilding' %
+                              (self.count, known))
+                    self.clear()
+        self._load_rows(session)
+
+    def _load_rows(self, session):
+        added = 0
+        for field_id, value in session.query(SeenField.id, SeenField.value).filter(SeenField.id > self.max_id):
+            if value is not None:
+                self.add(value)
+            self.max_id = max(self.max_id, field_id)
+            added += 1
+        if added:
+            log.debug('added %s values to seen index' % added)
+            self.count += added
+            self.dirty = True
+
+    @staticmethod
+    def snapshot_path(manager):
+        if manager.db_filename:
+            return manager.db_filename + '.seen-index'
+
+    def save(self, filename):
+        """Writes a snapshot of the index into `filename`."""
+        hashes = sorted(self.hashes)
+        temp = filename + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(self.header.pack(self.magic, self.version, self.max_id, self.count, len(hashes)))
+            f.write(struct.pack(b'<%dQ' % len(hashes), *hashes))
+        if os.name == 'nt' and os.path.exists(filename):
+            os.remove(filename)
+        os.rename(temp, filename)
+        self.dirty = False
+        log.debug('saved seen index with %s values to %s' % (len(hashes), filename))
+
+    def load(self, filename):
+        """Loads snapshot written by :meth:`save`, invalid snapshots are ignored. Returns True if it was loaded."""
+        try:
+            with open(filename, 'rb') as f:
+                magic, version, max_id, count, length = self.header.unpack(f.read(self.header.size))
+                if magic != self.magic or version != self.version:
+                    log.debug('ignoring seen index snapshot %s with unknown format' % filename)
+                    return
+                data = f.read(length * 8)
+                hashes = struct.unpack(b'<%dQ' % length, data)
+        except (IOError, struct.error) as e:
+            log.debug('unable to load seen index snapshot %s: %s' % (filename, e))
+            return
+        self.hashes = set(hashes)
+        self.max_id = max_id
+        self.count = count
+        self.dirty = False
+        log.debug('loaded seen index with %s values from %s' % (length, filename))
+        return True
+
+
+seen_index = SeenIndex()
+
 @event('forget')
 def forget(value):
     """
@@ -123,6 +262,9 @@ def forget(value):
             count += 1
             log.debug('forgetting %s' % se)
             session.delete(se)
+        if count:
+            # forgotten values may still be in use by other entries, rebuild the index on next use
+            seen_index.clear()
         return count, field_count
     finally:
         session.commit()
@@ -161,29 +303,71 @@ class FilterSeen(object):
         fields = self.fields
         local = config == 'local'
 
+        # construct list of values looked for each entry
+        entry_values = []
         for entry in task.entries:
-            # construct list of values looked
             values = []
             for field in fields:
                 if field not in entry:
                     continue
-                if entry[field] not in values and entry[field]:
+                if entry[field] and unicode(entry[field]) not in values:
                     values.append(unicode(entry[field]))
             if values:
-                log.trace('querying for: %s' % ', '.join(values))
-                # check if SeenField.value is any of the values
-                found = task.session.query(SeenField).join(SeenEntry).filter(SeenField.value.in_(values))
-                if local:
-                    found = found.filter(SeenEntry.task == task.name)
-                else:
-                    found = found.filter(SeenEntry.local == False)
-                found = found.first()
-                if found:
-                    log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], found.value))
-                    se = task.session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
-                    entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
-                                 (found.field, found.value, se.task, se.added.strftime('%Y-%m-%d %H:%M')),
-                                remember=remember_rejected)
+                entry_values.append((entry, values))
+
+        use_index = task.manager.config.get('seen_index', False)
+        if use_index:
+            # skip entries which certainly have not been seen
+            seen_index.sync(task.manager, task.session)
+            candidates = [(entry, values) for entry, values in entry_values
+                          if any(value in seen_index for value in values)]
+            increment_counter('seen_index miss', len(entry_values) - len(candidates))
+            entry_values = candidates
+
+        if not entry_values:
+            return
+        all_values = set()
+        for entry, values in entry_values:
+            all_values.update(values)
+        seen = self.find_seen(task, all_values, local=local)
+        for entry, values in entry_values:
+            for value in values:
+                if value not in seen:
+                    continue
+                field, seen_task, added = seen[value]
+                log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], value))
+                entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
+                             (field, value, seen_task, added.strftime('%Y-%m-%d %H:%M')),
+                             remember=remember_rejected)
+                if use_index:
+                    increment_counter('seen_index hit')
+                break
+            else:
+                if use_index:
+                    increment_counter('seen_index false positive')
+
+    def find_seen(self, task, values, local=False):
+        """
+        Looks up which of the given values have been marked as seen. Values are resolved in chunked IN queries,
+        so the cost is one query per ~900 values instead of one per entry.
+
+        :param task: Task whose session is used, also used for local seen lookups
+        :param values: Iterable of unicode values to look for
+        :param bool local: Only match values seen in this task
+        :return: Dict mapping each seen value to a (field, task name, added) tuple
+        """
+        found = {}
+        for chunk in chunked(sorted(values)):
+            log.trace('querying for %s values' % len(chunk))
+            query = task.session.query(SeenField.field, SeenField.value, SeenEntry.task, SeenEntry.added).\
+                filter(SeenField.seen_entry_id == SeenEntry.id).filter(SeenField.value.in_(chunk))
+            if local:
+                query = query.filter(SeenEntry.task == task.name)
+            else:
+                query = query.filter(SeenEntry.local == False)
+            for field, value, seen_task, added in query:
+                found.setdefault(value, (field, seen_task, added))
+        return found
 
     @plugin.priority(-255)
     def on_task_output(self, task, config):
@@ -218,6 +402,8 @@ class FilterSeen(object):
             remembered.append(entry[field])
             sf = SeenField(unicode(field), unicode(entry[field]))
             se.fields.append(sf)
+            if task.manager.config.get('seen_index', False):
+                seen_index.add(sf.value)
             log.debug("Learned '%s' (field: %s)" % (entry[field], field))
         # Only add the entry to the session if it has one of the required fields
         if se.fields:
@@ -299,11 +485,30 @@ def seen_search(options):
         session.close()
 
 
+@event('manager.shutdown')
+def save_seen_index(manager):
+    if seen_index.database_uri != manager.database_uri:
+        return
+    snapshot = SeenIndex.snapshot_path(manager)
+    if snapshot and seen_index.dirty:
+        try:
+            seen_index.save(snapshot)
+        except (IOError, OSError) as e:
+            log.warning('Unable to save seen index snapshot: %s' % e)
+    # next manager may have a different database behind the same uri (eg. in memory databases)
+    seen_index.database_uri = None
+
+
 @event('plugin.register')
 def register_plugin():
     plugin.register(FilterSeen, 'seen', builtin=True, api_ver=2)
 
 
+@event('config.register')
+def register_config_key():
+    config_schema.register_config_key('seen_index', {'type': 'boolean'})
+
+
 @event('options.register')
 def register_parser_arguments():
     parser = options.register_command('seen', do_cli, help='view or forget entries remembered by the seen plugin')
@@ -2,12 +2,16 @@ from __future__ import unicode_literals, division, absolute_import
 import logging
 import re
 import time
+from itertools import chain
 from copy import copy
 from datetime import datetime, timedelta
 
 from sqlalchemy import (Column, Integer, String, Unicode, DateTime, Boolean,
-                        desc, select, update, delete, ForeignKey, Index, func, and_, not_)
+                        desc, select, update, delete, ForeignKey, Index, func, and_, not_, inspect)
+from sqlalchemy import event as sqla_event
 from sqlalchemy.orm import relation, backref
+from sqlalchemy.orm.session import Session as OrmSession
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 from sqlalchemy.exc import OperationalError
 
@@ -17,13 +21,13 @@ from flexget.event import event
 from flexget.manager import Session
 from flexget.utils import qualities
 from flexget.utils.log import log_once
-from flexget.utils.titles import SeriesParser, ParseWarning, ID_TYPES
+from flexget.utils.titles import SeriesParser, SeriesNameIndex, ParseWarning, ID_TYPES, get_parser
 from flexget.utils.sqlalchemy_utils import (table_columns, table_exists, drop_tables, table_schema, table_add_column,
                                             create_index)
-from flexget.utils.tools import merge_dict_from_to, parse_timedelta
+from flexget.utils.tools import merge_dict_from_to, parse_timedelta, chunked
 from flexget.utils.database import quality_property
 
-SCHEMA_VER = 11
+SCHEMA_VER = 12
 
 log = logging.getLogger('series')
 Base = db_schema.versioned_base('series', SCHEMA_VER)
@@ -140,6 +144,10 @@ def upgrade(ver, session):
         log.verbose('Repairing series_tasks table data')
         session.execute(delete(series_tasks, ~series_tasks.c.series_id.in_(select([series_table.c.id]))))
         ver = 11
+    if ver == 11:
+        log.info('Building series progress summary, this may take a while ...')
+        rebuild_progress(session)
+        ver = 12
 
     return ver
 
@@ -160,6 +168,8 @@ def db_cleanup(session):
     result = session.query(Series).filter(~Series.episodes.any()).filter(~Series.in_tasks.any()).delete(False)
     if result:
         log.verbose('Removed %d series without episodes.', result)
+    # Bulk deletes bypass the session, so progress has to be summarized again
+    rebuild_progress(session)
 
 
 @event('manager.lock-acquired')
@@ -213,6 +223,23 @@ def normalize_series_name(name):
     return name
 
 
+def format_age(first_seen):
+    """
+    :param first_seen: Datetime or None
+    :return: Pretty string representing age since `first_seen`. eg "23d 12h" or "No releases seen"
+    """
+    if not first_seen:
+        return 'No releases seen'
+    diff = datetime.now() - first_seen
+    age_days = diff.days
+    age_hours = diff.seconds // 60 // 60
+    age = ''
+    if age_days:
+        age += '%sd ' % age_days
+    age += '%sh' % age_hours
+    return age
+
+
 class NormalizedComparator(Comparator):
     def operate(self, op, other):
         return op(self.__clause_element__(), normalize_series_name(other))
@@ -287,16 +314,7 @@ class Episode(Base):
         """
         :return: Pretty string representing age of episode. eg "23d 12h" or "No releases seen"
         """
-        if not self.first_seen:
-            return 'No releases seen'
-        diff = datetime.now() - self.first_seen
-        age_days = diff.days
-        age_hours = diff.seconds // 60 // 60
-        age = ''
-        if age_days:
-            age += '%sd ' % age_days
-        age += '%sh' % age_hours
-        return age
+        return format_age(self.first_seen)
 
     @property
     def is_premiere(self):
@@ -382,6 +400,42 @@ class SeriesTask(Base):
         self.name = name
 
 
+class SeriesProgress(Base):
+    """
+    Summary of the latest download of a series, so that series can be listed without going through their history.
+    Rows are rewritten whenever the episodes, releases or identified_by of a series change, see :func:`update_progress`.
+    """
+
+    __tablename__ = 'series_progress'
+
+    series_id = Column(Integer, ForeignKey('series.id'), primary_key=True)
+    # The latest downloaded episode. Not a foreign key, the episode may be deleted before the row is rewritten.
+    episode_id = Column(Integer)
+    identifier = Column(String)
+    season = Column(Integer)
+    number = Column(Integer)
+    status = Column(Unicode)
+    first_seen = Column(DateTime)
+    # Number of episodes seen after the latest download
+    behind = Column(Integer, default=0)
+    # When the newest episode of the series was first seen
+    last_seen = Column(DateTime)
+
+    episode = relation(Episode, primaryjoin='SeriesProgress.episode_id == Episode.id', foreign_keys=[episode_id],
+                       viewonly=True)
+
+    @property
+    def age(self):
+        return format_age(self.first_seen)
+
+    def __unicode__(self):
+        return '<SeriesProgress(series_id=%s,identifier=%s,status=%s,behind=%s)>' % \
+            (self.series_id, self.identifier, self.status, self.behind)
+
+    def __repr__(self):
+        return unicode(self).encode('ascii', 'replace')
+
+
 def get_latest_episode(series):
     """Return latest known identifier in dict (season, episode, name) for series name"""
     session = Session.object_session(series)
@@ -477,9 +531,9 @@ def new_eps_after(since_ep):
                       series.name)
             return series_eps.filter(Episode.first_seen > since_ep.first_seen).count()
         return series_eps.filter((Episode.identified_by == 'ep') &
-                                 (((Episode.season == since_ep.season) & Episode.number > since_ep.number) |
-                                  Episode.season > since_ep.season)).count()
-    elif series.identified_by == 'seq':
+                                 (((Episode.season == since_ep.season) & (Episode.number > since_ep.number)) |
+                                  (Episode.season > since_ep.season))).count()
+    elif series.identified_by == 'sequence':
         return series_eps.filter(Episode.number > since_ep.number).count()
     elif series.identified_by == 'id':
         return series_eps.filter(Episode.first_seen > since_ep.first_seen).count()
@@ -488,13 +542,151 @@ def new_eps_after(since_ep):
         return 0
 
 
-def store_parser(session, parser, series=None):
+def get_latest_status(episode):
+    """
+    :param episode: Instance of Episode
+    :return: Status string for given episode
+    """
+    status = ''
+    for release in sorted(episode.releases, key=lambda r: r.quality):
+        if not release.downloaded:
+            continue
+        status += release.quality.name
+        if release.proper_count > 0:
+            status += '-proper'
+            if release.proper_count > 1:
+                status += str(release.proper_count)
+        status += ', '
+    return status.rstrip(', ') if status else None
+
+
+def update_progress(session, series):
+    """
+    Rewrites the :class:`SeriesProgress` rows of given series from their current episodes.
+
+    :param session: Database session to use, changes are executed immediately
+    :param series: List of Series
+    """
+    table = SeriesProgress.__table__
+    for s in series:
+        seen = session.query(func.min(Release.first_seen)).join(Release.episode).\
+            filter(Episode.series_id == s.id).group_by(Episode.id).all()
+        values = {'episode_id': None, 'identifier': None, 'season': None, 'number': None, 'status': None,
+                  'first_seen': None, 'behind': 0, 'last_seen': max(row[0] for row in seen) if seen else None}
+        latest = get_latest_download(s)
+        if latest:
+            values.update(episode_id=latest.id, identifier=latest.identifier, season=latest.season,
+                          number=latest.number, status=get_latest_status(latest), first_seen=latest.first_seen,
+                          behind=new_eps_after(latest))
+        if not session.execute(update(table, table.c.series_id == s.id, values)).rowcount:
+            values['series_id'] = s.id
+            session.execute(table.insert(), values)
+        # Make sure an already loaded row is not stale
+        progress = session.identity_map.get(session.identity_key(SeriesProgress, s.id))
+        if progress is not None:
+            session.expire(progress)
+
+
+def rebuild_progress(session):
+    """Rewrites the :class:`SeriesProgress` rows of all series."""
+    session.execute(delete(SeriesProgress.__table__))
+    update_progress(session, session.query(Series).all())
+
+
+# Listen on all sessions, the web ui has a session factory of its own
+@sqla_event.listens_for(OrmSession, 'before_flush')
+def collect_progress(session, flush_context, instances):
+    """Finds the series whose progress is changed by the flush."""
+    changed = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Release):
+            obj = obj.episode
+        if isinstance(obj, Episode):
+            obj = obj.series
+        elif isinstance(obj, Series):
+            if obj in session.deleted:
+                if obj.id is not None:
+                    table = SeriesProgress.__table__
+                    session.execute(delete(table, table.c.series_id == obj.id))
+                continue
+            if not inspect(obj).attrs.identified_by.history.has_changes():
+                continue
+        if isinstance(obj, Series):
+            changed.add(obj)
+    if changed:
+        flush_context.attributes['series_progress'] = changed
+
+
+@sqla_event.listens_for(OrmSession, 'after_flush_postexec')
+def store_progress(session, flush_context):
+    changed = flush_context.attributes.get('series_progress')
+    if changed:
+        update_progress(session, [series for series in changed if inspect(series).persistent])
+
+
+def load_series(session, names):
+    """
+    Loads series with any of the given `names` from the database.
+
+    :param session: Database session to use
+    :param names: List of series names
+    :return: Dict mapping normalized series names to Series
+    """
+    normalized = sorted(set(normalize_series_name(name) for name in names))
+    found = {}
+    for chunk in chunked(normalized):
+        for series in session.query(Series).filter(Series._name_normalized.in_(chunk)):
+            found[series._name_normalized] = series
+    return found
+
+
+def load_episodes(session, series_parsers):
+    """
+    Loads the existing episodes for the given parsers, and all releases of those episodes, for use with
+    :func:`store_parser`. The releases collections of the episodes are populated, so they can be used without
+    further queries.
+
+    :param session: Database session to use
+    :param series_parsers: List of (Series, parser) tuples
+    :return: Dict mapping (Series, identifier) to Episode
+    """
+    series_by_id = {}
+    identifiers = set()
+    for series, parser in series_parsers:
+        # Series which are not in the database yet cannot have any episodes either
+        if series.id is not None:
+            series_by_id[series.id] = series
+            identifiers.update(parser.identifiers)
+    episodes = {}
+    if not series_by_id:
+        return episodes
+    for id_chunk in chunked(sorted(series_by_id), 450):
+        for identifier_chunk in chunked(sorted(identifiers), 450):
+            query = session.query(Episode).filter(Episode.series_id.in_(id_chunk)).\
+                filter(Episode.identifier.in_(identifier_chunk))
+            for episode in query:
+                episodes.setdefault((series_by_id[episode.series_id], episode.identifier), episode)
+
+    # Populate release collections of the loaded episodes, unless they happen to be loaded already
+    unloaded = dict((episode.id, episode) for episode in episodes.itervalues() if 'releases' not in episode.__dict__)
+    releases = dict((episode_id, []) for episode_id in unloaded)
+    for chunk in chunked(sorted(unloaded)):
+        for release in session.query(Release).filter(Release.episode_id.in_(chunk)).order_by(Release.id):
+            releases[release.episode_id].append(release)
+    for episode_id, episode_releases in releases.iteritems():
+        set_committed_value(unloaded[episode_id], 'releases', episode_releases)
+    return episodes
+
+
+def store_parser(session, parser, series=None, episodes=None):
     """
     Push series information into database. Returns added/existing release.
 
     :param session: Database session to use
     :param parser: parser for release that should be added to database
     :param series: Series in database to add release to. Will be looked up if not provided.
+    :param episodes: Optional dict from :func:`load_episodes`. When given, episodes and releases are looked up
+        from it instead of the database, and new episodes are added into it.
     :return: List of Releases
     """
     if not series:
@@ -512,9 +704,12 @@ def store_parser(session, parser, series=None):
     releases = []
     for ix, identifier in enumerate(parser.identifiers):
         # if episode does not exist in series, add new
-        episode = session.query(Episode).filter(Episode.series_id == series.id).\
-            filter(Episode.identifier == identifier).\
-            filter(Episode.series_id != None).first()
+        if episodes is not None:
+            episode = episodes.get((series, identifier))
+        else:
+            episode = session.query(Episode).filter(Episode.series_id == series.id).\
+                filter(Episode.identifier == identifier).\
+                filter(Episode.series_id != None).first()
         if not episode:
             log.debug('adding episode %s into series %s', identifier, parser.name)
             episode = Episode()
@@ -527,7 +722,12 @@ def store_parser(session, parser, series=None):
             elif parser.id_type == 'sequence':
                 episode.season = 0
                 episode.number = parser.id + ix
-            series.episodes.append(episode)  # pylint:disable=E1103
+            if episodes is not None:
+                # setting the parent does not load all the episodes of the series
+                episode.series = series
+                episodes[(series, identifier)] = episode
+            else:
+                series.episodes.append(episode)  # pylint:disable=E1103
             log.debug('-> added %s' % episode)
 
         # if release does not exists in episode, add new
@@ -537,11 +737,19 @@ def store_parser(session, parser, series=None):
         # filter(Release.episode_id != None) fixes weird bug where release had/has been added
         # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
         # perhaps a bug in sqlalchemy?
-        release = session.query(Release).filter(Release.episode_id == episode.id).\
-            filter(Release.title == parser.data).\
-            filter(Release.quality == parser.quality).\
-            filter(Release.proper_count == parser.proper_count).\
-            filter(Release.episode_id != None).first()
+        if episodes is not None:
+            for release in episode.releases:
+                if (release.title == parser.data and release._quality == parser.quality.name and
+                        release.proper_count == parser.proper_count):
+                    break
+            else:
+                release = None
+        else:
+            release = session.query(Release).filter(Release.episode_id == episode.id).\
+                filter(Release.title == parser.data).\
+                filter(Release.quality == parser.quality).\
+                filter(Release.proper_count == parser.proper_count).\
+                filter(Release.episode_id != None).first()
         if not release:
             log.debug('adding release %s into episode', parser)
             release = Release()
@@ -642,6 +850,14 @@ def forget_series_episode(name, identifier):
         session.close()
 
 
+def get_as_array(config, key):
+    """Return configuration key as array, even if given as a single string"""
+    v = config.get(key, [])
+    if isinstance(v, basestring):
+        return [v]
+    return v
+
+
 def populate_entry_fields(entry, parser):
     entry['series_parser'] = copy(parser)
     # add series, season and episode to entry
@@ -893,11 +1109,19 @@ class FilterSeries(FilterSeriesBase):
     def on_task_metainfo(self, task, config):
         config = self.prepare_config(config)
         self.auto_exact(config)
+        # Only parse entries with series which could possibly match them
+        index = self.build_name_index(config)
+        candidates = {}
+        for entry in task.entries:
+            for series_name in self.entry_candidates(index, entry):
+                candidates.setdefault(series_name, []).append(entry)
         for series_item in config:
             series_name, series_config = series_item.items()[0]
+            if series_name not in candidates:
+                continue
             log.trace('series_name: %s series_config: %s', series_name, series_config)
             start_time = time.clock()
-            self.parse_series(task.session, task.entries, series_name, series_config)
+            self.parse_series(task.session, candidates[series_name], series_name, series_config)
             took = time.clock() - start_time
             log.trace('parsing %s took %s', series_name, took)
 
@@ -913,27 +1137,40 @@ class FilterSeries(FilterSeriesBase):
             if entry.get('series_name') and entry.get('series_id') is not None and entry.get('series_parser'):
                 found_series.setdefault(entry['series_name'], []).append(entry)
 
+        filtered_series = []
         for series_item in config:
             series_name, series_config = series_item.items()[0]
             if series_config.get('parse_only'):
                 log.debug('Skipping filtering of series %s because of parse_only', series_name)
                 continue
             # Make sure number shows (e.g. 24) are turned into strings
-            series_name = unicode(series_name)
-            db_series = task.session.query(Series).filter(Series.name == series_name).first()
-            if not db_series:
+            filtered_series.append((unicode(series_name), series_config))
+
+        # Load all configured series, and the episodes and releases found this run, with a few bulk queries
+        all_db_series = load_series(task.session, [series_name for series_name, series_config in filtered_series])
+        for series_name, series_config in filtered_series:
+            if normalize_series_name(series_name) not in all_db_series:
                 log.debug('adding series %s into db', series_name)
                 db_series = Series()
                 db_series.name = series_name
                 db_series.identified_by = series_config.get('identified_by', 'auto')
                 task.session.add(db_series)
+                all_db_series[normalize_series_name(series_name)] = db_series
                 log.debug('-> added %s' % db_series)
+        episodes = load_episodes(task.session, [(all_db_series[normalize_series_name(series_name)],
+                                                 entry['series_parser'])
+                                                for series_name, series_config in filtered_series
+                                                for entry in found_series.get(series_name, [])])
+
+        stored_series = []
+        for series_name, series_config in filtered_series:
             if not series_name in found_series:
                 continue
+            db_series = all_db_series[normalize_series_name(series_name)]
             series_entries = {}
             for entry in found_series[series_name]:
                 # store found episodes into database and save reference for later use
-                releases = store_parser(task.session, entry['series_parser'], series=db_series)
+                releases = store_parser(task.session, entry['series_parser'], series=db_series, episodes=episodes)
                 entry['series_releases'] = releases
                 series_entries.setdefault(releases[0].episode, []).append(entry)
 
@@ -954,7 +1191,12 @@ class FilterSeries(FilterSeriesBase):
             if not series_entries:
                 log.trace('No entries found for %s this run.', series_name)
                 continue
+            stored_series.append((db_series, series_entries, series_name, series_config))
 
+        # All new series, episodes and releases go to the database at once
+        task.session.flush()
+
+        for db_series, series_entries, series_name, series_config in stored_series:
             # configuration always overrides everything
             if series_config.get('identified_by', 'auto') != 'auto':
                 db_series.identified_by = series_config['identified_by']
@@ -973,6 +1215,24 @@ class FilterSeries(FilterSeriesBase):
             took = time.clock() - start_time
             log.trace('processing %s took %s', series_name, took)
 
+    def build_name_index(self, config):
+        """Returns :class:`SeriesNameIndex` for all series in prepared `config`."""
+        index = SeriesNameIndex()
+        for series_item in config:
+            series_name, series_config = series_item.items()[0]
+            index.add(series_name, [series_name] + get_as_array(series_config, 'alternate_name'),
+                      name_regexps=get_as_array(series_config, 'name_regexp'))
+        return index
+
+    def entry_candidates(self, index, entry):
+        """Returns set of series names which might be parsed from fields of `entry`."""
+        candidates = set()
+        for field in ('title', 'description'):
+            data = entry.get(field)
+            if isinstance(data, basestring) and data:
+                candidates.update(index.candidates(data))
+        return candidates
+
     def parse_series(self, session, entries, series_name, config):
         """
         Search for `series_name` and populate all `series_*` fields in entries when successfully parsed
@@ -983,13 +1243,6 @@ class FilterSeries(FilterSeriesBase):
         :param config: Series config being processed
         """
 
-        def get_as_array(config, key):
-            """Return configuration key as array, even if given as a single string"""
-            v = config.get(key, [])
-            if isinstance(v, basestring):
-                return [v]
-            return v
-
         # set parser flags flags based on config / database
         identified_by = config.get('identified_by', 'auto')
         if identified_by == 'auto':
@@ -1009,7 +1262,7 @@ class FilterSeries(FilterSeriesBase):
         for id_type in ID_TYPES:
             params[id_type + '_regexps'] = get_as_array(config, id_type + '_regexp')
 
-        parser = SeriesParser(**params)
+        parser = get_parser(**params)
 
         for entry in entries:
             # skip processed entries
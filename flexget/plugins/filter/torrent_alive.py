@@ -1,6 +1,5 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
-import threading
 import socket
 from urlparse import urlparse, SplitResult, urlsplit, urlunsplit
 import struct
@@ -11,42 +10,63 @@ from urllib2 import URLError
 
 from flexget import plugin
 from flexget.event import event
-from flexget.utils.tools import urlopener
+from flexget.utils.pool import run_jobs
+from flexget.utils.tools import urlopener, chunked, TimedDict
 from flexget.utils.bittorrent import bdecode
 
 log = logging.getLogger('torrent_alive')
 
+# Most trackers scraped at the same time
+SCRAPE_THREADS = 10
+# Most info hashes in one scrape request, udp trackers take at most 74 (BEP 15)
+UDP_BATCH = 74
+HTTP_BATCH = 50
 
-class TorrentAliveThread(threading.Thread):
+# Trackers which did not answer a multi-hash scrape for all of the hashes, they are scraped one hash at a time
+single_hash_trackers = set()
+# Seeds found recently, keyed by (tracker, info_hash). Keeps task reruns from scraping the same torrents again.
+seed_cache = TimedDict(cache_time='10 minutes')
 
-    def __init__(self, tracker, info_hash):
-        threading.Thread.__init__(self)
-        self.tracker = tracker
-        self.info_hash = info_hash
-        self.tracker_seeds = 0
 
-    def run(self):
-        self.tracker_seeds = get_tracker_seeds(self.tracker, self.info_hash)
-        log.debug('%s seeds found from %s' % (self.tracker_seeds, get_scrape_url(self.tracker, self.info_hash)))
-
-
-def max_seeds_from_threads(threads):
+def scrape_seeds(torrents, task=None):
     """
-    Joins the threads and returns the maximum seeds found from any of them.
+    Scrapes seeds for many torrents at once. Info hashes are batched into one request per tracker, requests to
+    different trackers are made by a pool of threads. Results are cached in `seed_cache`.
 
-    :param threads: A list of started `TorrentAliveThread`
-    :return: Maximum seeds found from any of the threads
+    :param torrents: Iterable of (tracker, info_hash) pairs
+    :param task: Task the torrents are scraped for
+    :return: Dict mapping (tracker, info_hash) to seeds, pairs that could not be scraped are missing
     """
-    seeds = 0
-    for background in threads:
-        log.debug('Coming up next: %s' % background.tracker)
-        background.join()
-        seeds = max(seeds, background.tracker_seeds)
-        log.debug('Current hightest number of seeds found: %s' % seeds)
-    return seeds
-
-
-def get_scrape_url(tracker_url, info_hash):
+    results = {}
+    wanted = {}
+    for tracker, info_hash in torrents:
+        if (tracker, info_hash) in seed_cache:
+            results[(tracker, info_hash)] = seed_cache[(tracker, info_hash)]
+        else:
+            wanted.setdefault(tracker, set()).add(info_hash)
+
+    jobs = []
+    for tracker, info_hashes in wanted.iteritems():
+        batch = UDP_BATCH if tracker.startswith('udp') else HTTP_BATCH
+        jobs.extend((tracker, info_hash_batch) for info_hash_batch in chunked(sorted(info_hashes), batch))
+
+    scraped = {}
+
+    def scrape(job):
+        tracker, info_hashes = job
+        for info_hash, count in scrape_tracker(tracker, info_hashes).iteritems():
+            log.debug('%s seeds found for %s from %s' % (count, info_hash, tracker))
+            scraped[(tracker, info_hash)] = count
+
+    run_jobs(scrape, jobs, SCRAPE_THREADS, task=task, name='scrape')
+    seed_cache.update(scraped)
+    results.update(scraped)
+    return results
+
+
+def get_scrape_url(tracker_url, info_hashes):
+    if isinstance(info_hashes, basestring):
+        info_hashes = [info_hashes]
     if 'announce' in tracker_url:
         v = urlsplit(tracker_url)
         sr = SplitResult(v.scheme, v.netloc, v.path.replace('announce', 'scrape'),
@@ -57,18 +77,23 @@ def get_scrape_url(tracker_url, info_hash):
         result = tracker_url + '/scrape'
 
     result += '&' if '?' in result else '?'
-    result += 'info_hash=%s' % quote(info_hash.decode('hex'))
+    result += '&'.join('info_hash=%s' % quote(info_hash.decode('hex')) for info_hash in info_hashes)
     return result
 
 
-def get_udp_seeds(url, info_hash):
+def scrape_udp(url, info_hashes):
+    """
+    Scrapes seeds for up to `UDP_BATCH` torrents from an udp tracker with one request.
+
+    :return: Dict mapping info hash to seeds, empty if scraping failed
+    """
     parsed_url = urlparse(url)
     port = None
     try:
         port = parsed_url.port
     except ValueError as ve:
         log.error('UDP Port Error, url was %s' % url)
-        return 0
+        return {}
 
     log.debug('Checking for seeds from %s' % url)
 
@@ -77,11 +102,11 @@ def get_udp_seeds(url, info_hash):
 
     if port is None:
         log.error('UDP Port Error, port was None')
-        return 0
+        return {}
 
     if port < 0 or port > 65535:
         log.error('UDP Port Error, port was %s' % port)
-        return 0
+        return {}
 
     # Create the socket
     try:
@@ -98,68 +123,121 @@ def get_udp_seeds(url, info_hash):
         # check recieved packet for response
         action, transaction_id, connection_id = struct.unpack(b">LLQ", res)
 
-        #build packet hash out of decoded info_hash
-        packet_hash = info_hash.decode('hex')
+        #build packet hash out of decoded info_hashes
+        packet_hash = b''.join(info_hash.decode('hex') for info_hash in info_hashes)
 
-        # construct packet for scrape with decoded info_hash setting action byte to 2 for scape
+        # construct packet for scrape with decoded info_hashes setting action byte to 2 for scape
         packet = struct.pack(b">QLL", connection_id, 2, transaction_id) + packet_hash
 
         clisocket.send(packet)
-        # set recieve size of 8 + 12 bytes
-        res = clisocket.recv(20)
+        # set recieve size of 8 + 12 bytes per torrent
+        res = clisocket.recv(8 + 12 * len(info_hashes))
+        clisocket.close()
 
-    except IOError as e:
+    except (IOError, struct.error) as e:
         log.warning('Socket Error: %s', e)
-        return 0
+        return {}
     # Check for UDP error packet
     (action,) = struct.unpack(b">L", res[:4])
     if action == 3:
         log.error('There was a UDP Packet Error 3')
-        return 0
+        return {}
+
+    # first 8 bytes are followed by seeders, completed and leechers for each requested torrent, in request order
+    seeds = {}
+    for i, info_hash in enumerate(info_hashes):
+        offset = 8 + 12 * i
+        if len(res) < offset + 12:
+            break
+        seeders, completed, leechers = struct.unpack(b">LLL", res[offset:offset + 12])
+        seeds[info_hash] = seeders
+    log.debug('scrape_udp is returning: %s', seeds)
+    return seeds
 
-    # first 8 bytes are followed by seeders, completed and leechers for requested torrent
-    seeders, completed, leechers = struct.unpack(b">LLL", res[8:20])
-    log.debug('get_udp_seeds is returning: %s', seeders)
-    clisocket.close()
-    return seeders
 
+def scrape_http(url, info_hashes):
+    """
+    Scrapes seeds for `info_hashes` from a http tracker with one request.
 
-def get_http_seeds(url, info_hash):
-    url = get_scrape_url(url, info_hash)
+    :return: Dict mapping info hash to seeds, hashes not in the answer are missing
+    """
+    url = get_scrape_url(url, info_hashes)
     if not url:
         log.debug('if not url is true returning 0')
-        return 0
+        return {}
     log.debug('Checking for seeds from %s' % url)
     data = None
     try:
         data = bdecode(urlopener(url, log, retries=1, timeout=10).read()).get('files')
     except URLError as e:
         log.debug('Error scraping: %s' % e)
-        return 0
+        return {}
     except SyntaxError as e:
         log.warning('Error decoding tracker response: %s' % e)
-        return 0
+        return {}
     except BadStatusLine as e:
         log.warning('Error BadStatusLine: %s' % e)
-        return 0
+        return {}
     except IOError as e:
         log.warning('Server error: %s' % e)
-        return 0
+        return {}
     if not data:
         log.debug('No data received from tracker scrape.')
-        return 0
-    log.debug('get_http_seeds is returning: %s' % data.values()[0]['complete'])
-    return data.values()[0]['complete']
+        return {}
+    if len(info_hashes) == 1 and len(data) == 1:
+        # Some trackers do not key a single result by the requested hash
+        seeds = {info_hashes[0]: data.values()[0]['complete']}
+    else:
+        seeds = dict((info_hash, data[info_hash.decode('hex')]['complete']) for info_hash in info_hashes
+                     if info_hash.decode('hex') in data)
+    log.debug('scrape_http is returning: %s' % seeds)
+    return seeds
 
 
-def get_tracker_seeds(url, info_hash):
+def scrape_tracker(url, info_hashes):
+    """
+    Scrapes seeds for several torrents from a tracker with one request. Many trackers only answer for the first of
+    several info hashes, or refuse to answer at all. Hashes missing from the answer are scraped one at a time, and if
+    that works so is everything from that tracker later.
+
+    :return: Dict mapping info hash to seeds, hashes that could not be scraped are missing
+    """
     if url.startswith('udp'):
-        return get_udp_seeds(url, info_hash)
+        scrape = scrape_udp
     elif url.startswith('http'):
-        return get_http_seeds(url, info_hash)
+        scrape = scrape_http
     else:
         log.warning('There has beena problem with the get_tracker_seeds')
-        return 0
+        return {}
+    if len(info_hashes) > 1 and url in single_hash_trackers:
+        seeds = {}
+        for info_hash in info_hashes:
+            seeds.update(scrape(url, [info_hash]))
+        return seeds
+    seeds = scrape(url, info_hashes)
+    missing = [info_hash for info_hash in info_hashes if info_hash not in seeds]
+    if len(info_hashes) > 1 and missing:
+        log.debug('%s did not answer for %s of %s torrents, scraping them one at a time' %
+                  (url, len(missing), len(info_hashes)))
+        single_seeds = {}
+        for info_hash in missing:
+            single_seeds.update(scrape(url, [info_hash]))
+        if single_seeds:
+            single_hash_trackers.add(url)
+        seeds.update(single_seeds)
+    return seeds
+
+
+def get_udp_seeds(url, info_hash):
+    return scrape_udp(url, [info_hash]).get(info_hash, 0)
+
+
+def get_http_seeds(url, info_hash):
+    return scrape_http(url, [info_hash]).get(info_hash, 0)
+
+
+def get_tracker_seeds(url, info_hash):
+    return scrape_tracker(url, [info_hash]).get(info_hash, 0)
 
 
 class TorrentAlive(object):
@@ -201,52 +279,40 @@ class TorrentAlive(object):
         config = self.prepare_config(config)
         min_seeds = config['min_seeds']
 
+        checks = []
         for entry in task.accepted:
             # If torrent_seeds is filled, we will have already filtered in filter phase
             if entry.get('torrent_seeds'):
                 log.debug('Not checking trackers for seeds, as torrent_seeds is already filled.')
                 continue
-            log.debug('Checking for seeds for %s:' % entry['title'])
             torrent = entry.get('torrent')
             if torrent:
-                seeds = 0
-                info_hash = torrent.info_hash
                 announce_list = torrent.content.get('announce-list')
                 if announce_list:
                     # Multitracker torrent
-                    threadlist = []
-                    for tier in announce_list:
-                        for tracker in tier:
-                            background = TorrentAliveThread(tracker, info_hash)
-                            try:
-                                background.start()
-                                threadlist.append(background)
-                            except threading.ThreadError:
-                                # If we can't start a new thread, wait for current ones to complete and continue
-                                log.debug('Reached max threads, finishing current threads.')
-                                seeds = max(seeds, max_seeds_from_threads(threadlist))
-                                background.start()
-                                threadlist = [background]
-                            log.debug('Started thread to scrape %s with info hash %s' % (tracker, info_hash))
-
-                    seeds = max(seeds, max_seeds_from_threads(threadlist))
-                    log.debug('Highest number of seeds found: %s' % seeds)
+                    trackers = [tracker for tier in announce_list for tracker in tier]
                 else:
                     # Single tracker
-                    tracker = torrent.content['announce']
-                    try:
-                        seeds = get_tracker_seeds(tracker, info_hash)
-                    except URLError as e:
-                        log.debug('Error scraping %s: %s' % (tracker, e))
-
-                # Reject if needed
-                if seeds < min_seeds:
-                    entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
-                                 remember_time=config['reject_for'])
-                    # Maybe there is better match that has enough seeds
-                    task.rerun()
-                else:
-                    log.debug('Found %i seeds from trackers' % seeds)
+                    trackers = [torrent.content['announce']]
+                checks.append((entry, torrent.info_hash, trackers))
+
+        # Scrape all torrents at once, so trackers get one request for all the torrents they share
+        found = scrape_seeds(((tracker, info_hash) for entry, info_hash, trackers in checks for tracker in trackers),
+                             task=task)
+
+        for entry, info_hash, trackers in checks:
+            # Torrents missing from multi-hash answers have been scraped on their own, so a tracker without a result
+            # could not be scraped or does not know the torrent, which counts as no seeds like it always has
+            seeds = max([found.get((tracker, info_hash), 0) for tracker in trackers] or [0])
+            log.debug('Highest number of seeds found for %s: %s' % (entry['title'], seeds))
+            # Reject if needed
+            if seeds < min_seeds:
+                entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
+                             remember_time=config['reject_for'])
+                # Maybe there is better match that has enough seeds
+                task.rerun()
+            else:
+                log.debug('Found %i seeds from trackers' % seeds)
 
 
 @event('plugin.register')
@@ -1,25 +1,33 @@
 from __future__ import unicode_literals, division, absolute_import
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import logging
 import re
 from datetime import datetime
 
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, subqueryload
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.schema import Table, ForeignKey
-from sqlalchemy import Column, Integer, DateTime, Unicode, Index
+from sqlalchemy.sql import table, column, literal_column, select, func
+from sqlalchemy import Column, Integer, DateTime, Unicode, Index, event as sqla_event
+from sqlalchemy.exc import OperationalError
 
 from flexget import db_schema, options, plugin
 from flexget.event import event
 from flexget.entry import Entry
 from flexget.options import ParseExtrasAction, get_parser
 from flexget.utils.sqlalchemy_utils import table_schema, get_index_by_name
-from flexget.utils.tools import console, strip_html
+from flexget.utils.simple_persistence import SimplePersistence
+from flexget.utils.tools import console, strip_html, chunked
 from flexget.manager import Session
 
 log = logging.getLogger('archive')
 
-SCHEMA_VER = 0
+SCHEMA_VER = 1
+
+# Full text index of archive titles, an external content table so titles are not stored twice
+FTS_TABLE = 'archive_title_fts'
+# Number of existing archive entries added to the full text index per task exit when upgrading a database
+BACKFILL_CHUNK = 20000
 
 Base = db_schema.versioned_base('archive', SCHEMA_VER)
 
@@ -82,6 +90,95 @@ class ArchiveSource(Base):
         return '<ArchiveSource(id=%s,name=%s)>' % (self.id, self.name)
 
 
+fts_table = table(FTS_TABLE, column('rowid', Integer), column('title', Unicode))
+
+
+def create_fts_index(bind):
+    """
+    Creates the full text index for archive titles, using the best FTS module the SQLite library has.
+
+    :param bind: SQLite connection or session to create the index with
+    :return: Name of the FTS module used, or None if full text search is not available
+    """
+    modules = [('fts5', 'title, content=archive_entry, content_rowid=id'),
+               ('fts4', 'title, content="archive_entry", tokenize=unicode61')]
+    for module, args in modules:
+        try:
+            bind.execute('CREATE VIRTUAL TABLE IF NOT EXISTS %s USING %s(%s)' % (FTS_TABLE, module, args))
+        except OperationalError as e:
+            log.debug('Unable to use %s for the archive index: %s' % (module, e))
+            continue
+        log.debug('Created archive full text index using %s' % module)
+        return module
+    log.info('SQLite has no full text search support, archive searches will be slow')
+
+
+@sqla_event.listens_for(ArchiveEntry.__table__, 'after_create')
+def after_archive_create(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        create_fts_index(connection)
+
+
+def fts_module(session, complete=True):
+    """
+    :param session: SQLAlchemy session
+    :param bool complete: Return None if existing archive entries are still being added into the index
+    :return: Name of the FTS module archive titles are indexed with, or None if there is no usable index
+    """
+    if session.bind.dialect.name != 'sqlite':
+        return None
+    sql = session.execute(select([literal_column('sql')]).select_from(table('sqlite_master')).
+                          where(literal_column('name') == FTS_TABLE)).scalar()
+    if not sql:
+        return None
+    if complete and SimplePersistence('archive', session=session).get('fts_backfill'):
+        # Search would miss entries that are not yet indexed
+        return None
+    return 'fts5' if 'fts5' in sql.lower() else 'fts4'
+
+
+def index_entries(session, rows):
+    """
+    Adds new archive entries into the full text index.
+
+    The index is an external content table, SQLite does not update it when archive entries change. Entries are
+    only ever added here and removed by :func:`consolidate`, which rebuilds the index. Anything else deleting
+    archive entries or changing their titles has to update the index too.
+
+    :param session: SQLAlchemy session
+    :param list rows: (id, title) tuples of archive entries not yet in the index
+    """
+    if rows and fts_module(session, complete=False):
+        session.execute(fts_table.insert(), [{'rowid': id, 'title': title} for id, title in rows])
+
+
+def backfill_index(session, limit=BACKFILL_CHUNK):
+    """
+    Adds next `limit` archive entries that existed before the full text index into it.
+    Search keeps using the old slow method until all of them are indexed.
+
+    :param session: SQLAlchemy session
+    :param int limit: Maximum number of entries to add
+    """
+    persistence = SimplePersistence('archive', session=session)
+    state = persistence.get('fts_backfill')
+    if not state:
+        return
+    position, end = state
+    ids = select([ArchiveEntry.id]).where(ArchiveEntry.id > position).where(ArchiveEntry.id <= end).\
+        order_by(ArchiveEntry.id).limit(limit).alias('ids')
+    last = session.execute(select([func.max(ids.c.id)])).scalar()
+    if last is not None:
+        session.execute('INSERT INTO %s(rowid, title) SELECT id, title FROM archive_entry '
+                        'WHERE id > :position AND id <= :last' % FTS_TABLE, {'position': position, 'last': last})
+    if last is None or last >= end:
+        log.verbose('Archive full text index is complete')
+        del persistence['fts_backfill']
+    else:
+        log.verbose('Added archive entries up to id %s of %s into the full text index' % (last, end))
+        persistence['fts_backfill'] = (last, end)
+
+
 def get_source(name, session):
     """
     :param string name: Source name
@@ -108,6 +205,68 @@ def get_tag(name, session):
         return source
 
 
+def archive_entries(session, source_name, entries, tag_names=None):
+    """
+    Adds entries into the archive in bulk. Entries which are already archived get the source and tags added instead.
+
+    :param session: SQLAlchemy session
+    :param string source_name: Name of the source (task) of the entries
+    :param list entries: Entries to archive, entries with same title and url are archived once
+    :param list tag_names: Optional list of tags for the entries
+    :return: Number of new archive entries
+    """
+    pending = OrderedDict()
+    for entry in entries:
+        pending.setdefault((entry['title'], entry['url']), entry)
+    if not pending:
+        return 0
+
+    # Ids of new sources and tags are needed for the bulk inserts
+    source = get_source(source_name, session)
+    tags = [get_tag(tag_name, session) for tag_name in sorted(set(tag_names or []))]
+    session.add(source)
+    session.add_all(tags)
+    session.flush()
+
+    # add (missing) sources and tags to already archived entries
+    titles = sorted(set(title for title, url in pending))
+    for chunk in chunked(titles):
+        query = session.query(ArchiveEntry).filter(ArchiveEntry.title.in_(chunk)).\
+            options(subqueryload(ArchiveEntry.sources), subqueryload(ArchiveEntry.tags))
+        for ae in query:
+            if pending.pop((ae.title, ae.url), None) is None:
+                continue
+            if source not in ae.sources:
+                log.debug('Adding `%s` into `%s` sources' % (source_name, ae))
+                ae.sources.append(source)
+            for tag in tags:
+                if tag not in ae.tags:
+                    log.debug('Adding tag %s into %s' % (tag.name, ae))
+                    ae.tags.append(tag)
+    if not pending:
+        return 0
+
+    now = datetime.now()
+    session.execute(ArchiveEntry.__table__.insert(),
+                    [{'title': title, 'url': url, 'description': entry.get('description'), 'feed': source_name,
+                      'added': now} for (title, url), entry in pending.iteritems()])
+    # Read back ids of the new rows, nothing else was archived with these titles and urls
+    ids = {}
+    for chunk in chunked(titles):
+        for id, title, url in session.query(ArchiveEntry.id, ArchiveEntry.title, ArchiveEntry.url).\
+                filter(ArchiveEntry.title.in_(chunk)):
+            if (title, url) in pending:
+                ids[(title, url)] = id
+    session.execute(archive_sources_table.insert(),
+                    [{'entry_id': id, 'source_id': source.id} for id in ids.itervalues()])
+    if tags:
+        session.execute(archive_tags_table.insert(),
+                        [{'entry_id': id, 'tag_id': tag.id} for id in ids.itervalues() for tag in tags])
+    index_entries(session, [(id, title) for (title, url), id in ids.iteritems()])
+    log.debug('Added %i entries with %i tags to archive' % (len(ids), len(tags)))
+    return len(ids)
+
+
 @db_schema.upgrade('archive')
 def upgrade(ver, session):
     if ver is None:
@@ -134,6 +293,13 @@ def upgrade(ver, session):
             log.critical('one time when you have time, it may take hours')
             log.critical('----------------------------------------------')
         ver = 0
+    if ver == 0:
+        if session.bind.dialect.name == 'sqlite' and create_fts_index(session):
+            end = session.query(func.max(ArchiveEntry.id)).scalar()
+            if end:
+                log.info('Existing archive entries will be added to the full text index over the next task runs')
+                SimplePersistence('archive', session=session)['fts_backfill'] = (0, end)
+        ver = 1
     return ver
 
 
@@ -161,51 +327,10 @@ class Archive(object):
         else:
             tag_names = config
 
-        tags = []
-        for tag_name in set(tag_names):
-            tags.append(get_tag(tag_name, task.session))
-
-        count = 0
-        processed = []
-        for entry in task.entries + task.rejected + task.failed:
-            # I think entry can be in multiple of those lists .. not sure though!
-            if entry in processed:
-                continue
-            else:
-                processed.append(entry)
-
-            ae = task.session.query(ArchiveEntry).\
-                filter(ArchiveEntry.title == entry['title']).\
-                filter(ArchiveEntry.url == entry['url']).first()
-            if ae:
-                # add (missing) sources
-                source = get_source(task.name, task.session)
-                if not source in ae.sources:
-                    log.debug('Adding `%s` into `%s` sources' % (task.name, ae))
-                    ae.sources.append(source)
-                # add (missing) tags
-                for tag_name in tag_names:
-                    atag = get_tag(tag_name, task.session)
-                    if not atag in ae.tags:
-                        log.debug('Adding tag %s into %s' % (tag_name, ae))
-                        ae.tags.append(atag)
-            else:
-                # create new archive entry
-                ae = ArchiveEntry()
-                ae.title = entry['title']
-                ae.url = entry['url']
-                if 'description' in entry:
-                    ae.description = entry['description']
-                ae.task = task.name
-                ae.sources.append(get_source(task.name, task.session))
-                if tags:
-                    # note, we're extending empty list
-                    ae.tags.extend(tags)
-                log.debug('Adding `%s` with %i tags to archive' % (ae, len(tags)))
-                task.session.add(ae)
-                count += 1
+        count = archive_entries(task.session, task.name, task.entries + task.rejected + task.failed, tag_names)
         if count:
             log.verbose('Added %i new entries to archive' % count)
+        backfill_index(task.session)
 
     def on_task_abort(self, task, config):
         """
@@ -303,6 +428,10 @@ def consolidate():
             log.info('Consolidated %i items, removing duplicates ...' % len(duplicates))
             for id in duplicates:
                 session.query(ArchiveEntry).filter(ArchiveEntry.id == id).delete()
+            if fts_module(session, complete=False):
+                log.info('Rebuilding full text index ...')
+                session.execute('INSERT INTO %s(%s) VALUES(\'rebuild\')' % (FTS_TABLE, FTS_TABLE))
+                SimplePersistence('archive', session=session).pop('fts_backfill', None)
         session.commit()
         log.info('Completed! This does NOT need to be ran again.')
     except KeyboardInterrupt:
@@ -354,7 +483,8 @@ def search(session, text, tags=None, sources=None, desc=False):
     """
     Search from the archive.
 
-    :param string text: Search text, spaces and dots are tried to be ignored.
+    :param string text: Search text. Titles have to start with it, spaces and dots in it match any one
+        character that is not a letter or a digit. The last word may be incomplete.
     :param Session session: SQLAlchemy session, should not be closed while iterating results.
     :param list tags: Optional list of acceptable tags
     :param list sources: Optional list of acceptable sources
@@ -362,10 +492,18 @@ def search(session, text, tags=None, sources=None, desc=False):
     :return: ArchiveEntries responding to query
     """
     keyword = unicode(text).replace(' ', '%').replace('.', '%')
-    # clean the text from any unwanted regexp, convert spaces and keep dots as dots
-    normalized_re = re.escape(text.replace('.', ' ')).replace('\\ ', ' ').replace(' ', '.')
-    find_re = re.compile(normalized_re, re.IGNORECASE)
-    query = session.query(ArchiveEntry).filter(ArchiveEntry.title.like('%' + keyword + '%'))
+    # clean the text from any unwanted regexp, spaces and dots separate words like they do in the full text index
+    normalized_re = re.escape(text.replace('.', ' ')).replace('\\ ', ' ').replace(' ', r'[\W_]')
+    find_re = re.compile(normalized_re, re.IGNORECASE | re.UNICODE)
+    query = session.query(ArchiveEntry)
+    # Titles have to start with the text, so all its words are in the title and the last one may be incomplete
+    words = re.findall(r'[^\W_]+', unicode(text).lower(), re.UNICODE)
+    if words and fts_module(session):
+        match = ' '.join('%s*' % word for word in words)
+        query = query.join(fts_table, fts_table.c.rowid == ArchiveEntry.id).\
+            filter(literal_column(FTS_TABLE).op('MATCH')(match))
+    else:
+        query = query.filter(ArchiveEntry.title.like('%' + keyword + '%'))
     if tags:
         query = query.filter(ArchiveEntry.tags.any(ArchiveTag.name.in_(tags)))
     if sources:
@@ -374,7 +512,7 @@ def search(session, text, tags=None, sources=None, desc=False):
         query = query.order_by(ArchiveEntry.added.desc())
     else:
         query = query.order_by(ArchiveEntry.added.asc())
-    for a in query.yield_per(5):
+    for a in query.yield_per(100):
         if find_re.match(a.title):
             yield a
         else:
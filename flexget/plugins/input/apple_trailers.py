@@ -98,4 +98,4 @@ class AppleTrailers(InputRSS):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(AppleTrailers, 'apple_trailers', api_ver=2)
+    plugin.register(AppleTrailers, 'apple_trailers', groups=['reusable_input'], api_ver=2)
@@ -196,4 +196,4 @@ def query_series(api_key, user_token, member_name=None):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(BetaSeriesList, 'betaseries_list', api_ver=2)
+    plugin.register(BetaSeriesList, 'betaseries_list', groups=['reusable_input'], api_ver=2)
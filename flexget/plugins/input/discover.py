@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 import datetime
 import logging
 import random
+from urlparse import urlparse
 
 from sqlalchemy import Column, Integer, DateTime, Unicode, Index
 
@@ -9,6 +10,7 @@ from flexget import options, plugin
 from flexget.event import event
 from flexget.plugin import get_plugin_by_name, PluginError, PluginWarning
 from flexget import db_schema
+from flexget.utils.pool import run_jobs
 from flexget.utils.tools import parse_timedelta, multiply_timedelta
 
 log = logging.getLogger('discover')
@@ -42,6 +44,12 @@ def db_cleanup(session):
         session.delete(de)
 
 
+def search_host(plugin_config):
+    """Returns host name a search plugin is configured to query, None when the config does not tell."""
+    if isinstance(plugin_config, dict) and isinstance(plugin_config.get('url'), basestring):
+        return urlparse(plugin_config['url']).hostname
+
+
 class Discover(object):
     """
     Discover content based on other inputs material.
@@ -55,6 +63,19 @@ class Discover(object):
           - piratebay
         interval: [1 hours|days|weeks]
         ignore_estimations: [yes|no]
+
+    Searches are made one at a time by default. Raise `workers` to search
+    in parallel, `workers_per_plugin` and `workers_per_host` limit how many
+    of those searches may use the same search plugin, or the same site for
+    plugins configured with an `url`.
+
+    Example::
+
+      discover:
+        ...
+        workers: 8
+        workers_per_plugin: 4
+        workers_per_host: 2
     """
 
     schema = {
@@ -68,7 +89,10 @@ class Discover(object):
             }},
             'interval': {'type': 'string', 'format': 'interval', 'default': '5 hours'},
             'ignore_estimations': {'type': 'boolean', 'default': False},
-            'limit': {'type': 'integer', 'minimum': 1}
+            'limit': {'type': 'integer', 'minimum': 1},
+            'workers': {'type': 'integer', 'minimum': 1, 'default': 1},
+            'workers_per_plugin': {'type': 'integer', 'minimum': 1},
+            'workers_per_host': {'type': 'integer', 'minimum': 1}
         },
         'required': ['what', 'from'],
         'additionalProperties': False
@@ -114,14 +138,15 @@ class Discover(object):
                     entry_urls.update(urls)
         return entries
 
-    def execute_searches(self, config, entries):
+    def execute_searches(self, config, entries, task=None):
         """
         :param config: Discover plugin config
         :param entries: List of pseudo entries to search
+        :param task: Current task
         :return: List of entries found from search engines listed under `from` configuration
         """
 
-        result = []
+        jobs = []
         for item in config['from']:
             if isinstance(item, dict):
                 plugin_name, plugin_config = item.items()[0]
@@ -130,31 +155,55 @@ class Discover(object):
             search = get_plugin_by_name(plugin_name).instance
             if not callable(getattr(search, 'search')):
                 log.critical('Search plugin %s does not implement search method' % plugin_name)
+            host = search_host(plugin_config)
             for index, entry in enumerate(entries):
-                log.verbose('Searching for `%s` (%i of %i)' % (entry['title'], index + 1, len(entries)))
-                try:
-                    search_results = search.search(entry, plugin_config)
-                    if not search_results:
-                        log.debug('No results from %s' % plugin_name)
-                        entry.complete()
-                        continue
-                    log.debug('Discovered %s entries from %s' % (len(search_results), plugin_name))
-                    if config.get('limit'):
-                        search_results = sorted(search_results, reverse=True,
-                                                key=lambda x: x.get('search_sort'))[:config['limit']]
-                    for e in search_results:
-                        e['discovered_from'] = entry['title']
-                        e['discovered_with'] = plugin_name
-                        e.on_complete(self.entry_complete, query=entry, search_results=search_results)
-
-                    result.extend(search_results)
-
-                except (PluginError, PluginWarning) as err:
-                    log.debug('No results from %s: %s' % (plugin_name, err))
-                    entry.complete()
+                jobs.append({'plugin_name': plugin_name, 'plugin_config': plugin_config, 'search': search,
+                             'host': host, 'entry': entry, 'index': index, 'total': len(entries),
+                             'results': None, 'error': None})
+        self.run_searches(config, jobs, task)
+
+        # Results are handled in the order searches were listed, so they do not depend on which search finished first
+        result = []
+        for job in jobs:
+            entry, plugin_name, search_results = job['entry'], job['plugin_name'], job['results']
+            if job['error']:
+                log.debug('No results from %s: %s' % (plugin_name, job['error']))
+                entry.complete()
+                continue
+            if not search_results:
+                log.debug('No results from %s' % plugin_name)
+                entry.complete()
+                continue
+            log.debug('Discovered %s entries from %s' % (len(search_results), plugin_name))
+            if config.get('limit'):
+                search_results = sorted(search_results, reverse=True,
+                                        key=lambda x: x.get('search_sort'))[:config['limit']]
+            for e in search_results:
+                e['discovered_from'] = entry['title']
+                e['discovered_with'] = plugin_name
+                e.on_complete(self.entry_complete, query=entry, search_results=search_results)
+
+            result.extend(search_results)
 
         return sorted(result, reverse=True, key=lambda x: x.get('search_sort'))
 
+    def run_searches(self, config, jobs, task=None):
+        """
+        Makes the searches described by `jobs`, storing results or errors into them. Runs up to `workers` searches
+        at the same time, within the `workers_per_plugin` and `workers_per_host` limits.
+        """
+        limits = [(lambda job: job['plugin_name'], config.get('workers_per_plugin')),
+                  (lambda job: job['host'], config.get('workers_per_host'))]
+        run_jobs(self.search, jobs, config.get('workers', 1), limits=limits, task=task, name='discover')
+
+    def search(self, job):
+        """Makes one search of :meth:`run_searches`."""
+        log.verbose('Searching for `%s` (%i of %i)' % (job['entry']['title'], job['index'] + 1, job['total']))
+        try:
+            job['results'] = job['search'].search(job['entry'], job['plugin_config'])
+        except (PluginError, PluginWarning) as err:
+            job['error'] = err
+
     def entry_complete(self, entry, query=None, search_results=None, **kwargs):
         if entry.accepted:
             # One of the search results was accepted, transfer the acceptance back to the query entry which generated it
@@ -250,7 +299,7 @@ class Discover(object):
         entries = self.interval_expired(config, task, entries)
         if not config.get('ignore_estimations', False):
             entries = self.estimated(entries)
-        return self.execute_searches(config, entries)
+        return self.execute_searches(config, entries, task)
 
 
 @event('plugin.register')
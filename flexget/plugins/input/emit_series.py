@@ -10,7 +10,7 @@ from flexget.entry import Entry
 log = logging.getLogger('emit_series')
 
 try:
-    from flexget.plugins.filter.series import SeriesTask, Episode, Release, get_latest_download
+    from flexget.plugins.filter.series import SeriesTask, SeriesProgress, Episode, Release
 except ImportError as e:
     log.error(e.message)
     raise plugin.DependencyError(issued_by='emit_series', missing='series')
@@ -36,6 +36,10 @@ class EmitSeries(object):
         ]
     }
 
+    def __init__(self):
+        # Series whose next season should be searched, by task name. Tasks may run concurrently.
+        self.try_next_season = {}
+
     def ep_identifiers(self, season, episode):
         return ['S%02dE%02d' % (season, episode),
                 '%dx%02d' % (season, episode)]
@@ -67,9 +71,13 @@ class EmitSeries(object):
         if isinstance(config, bool):
             config = {}
         if not task.is_rerun:
-            self.try_next_season = {}
+            self.try_next_season[task.name] = {}
+        try_next_season = self.try_next_season.setdefault(task.name, {})
         entries = []
-        for seriestask in task.session.query(SeriesTask).filter(SeriesTask.name == task.name).all():
+        query = (task.session.query(SeriesTask, SeriesProgress).
+                 outerjoin(SeriesProgress, SeriesProgress.series_id == SeriesTask.series_id).
+                 filter(SeriesTask.name == task.name))
+        for seriestask, progress in query.all():
             series = seriestask.series
             if not series:
                 # TODO: How can this happen?
@@ -81,11 +89,11 @@ class EmitSeries(object):
                             (series.name, series.identified_by or 'auto'))
                 continue
 
-            latest = get_latest_download(series)
+            latest = progress.episode if progress else None
             if series.begin and (not latest or latest < series.begin):
                 entries.append(self.search_entry(series, series.begin.season, series.begin.number, task))
             elif latest:
-                if self.try_next_season.get(series.name):
+                if try_next_season.get(series.name):
                     entries.append(self.search_entry(series, latest.season + 1, 1, task))
                 else:
                     start_at_ep = 1
@@ -124,20 +132,21 @@ class EmitSeries(object):
         return entries
 
     def on_search_complete(self, entry, task=None, identified_by=None, **kwargs):
+        try_next_season = self.try_next_season.setdefault(task.name, {})
         if entry.accepted:
             # We accepted a result from this search, rerun the task to look for next ep
-            self.try_next_season.pop(entry['series_name'], None)
+            try_next_season.pop(entry['series_name'], None)
             task.rerun()
         else:
             if identified_by != 'ep':
                 # Do not try next season if this is not an 'ep' show
                 return
-            if entry['series_name'] not in self.try_next_season:
-                self.try_next_season[entry['series_name']] = True
+            if entry['series_name'] not in try_next_season:
+                try_next_season[entry['series_name']] = True
                 task.rerun()
             else:
                 # Don't try a second time
-                self.try_next_season[entry['series_name']] = False
+                try_next_season[entry['series_name']] = False
 
 
 @event('plugin.register')
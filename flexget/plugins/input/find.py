@@ -96,4 +96,4 @@ class InputFind(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputFind, 'find', api_ver=2)
+    plugin.register(InputFind, 'find', groups=['reusable_input'], api_ver=2)
@@ -270,4 +270,4 @@ class InputHtml(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputHtml, 'html', api_ver=2)
+    plugin.register(InputHtml, 'html', groups=['reusable_input'], api_ver=2)
@@ -119,4 +119,4 @@ class ImdbList(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(ImdbList, 'imdb_list', api_ver=2)
+    plugin.register(ImdbList, 'imdb_list', groups=['reusable_input'], api_ver=2)
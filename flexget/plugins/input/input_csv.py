@@ -76,4 +76,4 @@ class InputCSV(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputCSV, 'csv', api_ver=2)
+    plugin.register(InputCSV, 'csv', groups=['reusable_input'], api_ver=2)
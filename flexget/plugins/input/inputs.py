@@ -62,4 +62,4 @@ class PluginInputs(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(PluginInputs, 'inputs', api_ver=2)
+    plugin.register(PluginInputs, 'inputs', groups=['reusable_input'], api_ver=2)
@@ -53,4 +53,4 @@ class Listdir(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(Listdir, 'listdir', api_ver=2)
+    plugin.register(Listdir, 'listdir', groups=['reusable_input'], api_ver=2)
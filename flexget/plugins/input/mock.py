@@ -50,4 +50,4 @@ class Mock(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(Mock, 'mock', api_ver=2)
+    plugin.register(Mock, 'mock', groups=['reusable_input'], api_ver=2)
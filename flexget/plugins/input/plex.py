@@ -262,4 +262,4 @@ class InputPlex(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputPlex, 'plex', api_ver=2)
+    plugin.register(InputPlex, 'plex', groups=['reusable_input'], api_ver=2)
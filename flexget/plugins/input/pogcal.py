@@ -55,4 +55,4 @@ class InputPogDesign(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputPogDesign, 'pogcal', api_ver=2)
+    plugin.register(InputPogDesign, 'pogcal', groups=['reusable_input'], api_ver=2)
@@ -76,9 +76,6 @@ class RegexpParse(object):
                    'VERBOSE': re.VERBOSE
                    }
 
-    def __init__(self):
-        self.required = []
-
     def validator(self):
         from flexget import validator
         root = validator.factory('dict')
@@ -138,9 +135,9 @@ class RegexpParse(object):
             compiled_regexps.append(re.compile(dic['regexp'], flags))
         return compiled_regexps
 
-    def isvalid(self, entry):
-        """checks to make sure that all required fields are present in the entry."""
-        for key in self.required:
+    def isvalid(self, entry, required):
+        """checks to make sure that all `required` fields are present in the entry."""
+        for key in required:
             if key not in entry:
                 return False
         return entry.isvalid()
@@ -175,12 +172,13 @@ class RegexpParse(object):
 
         #holds all the regex in a dict for the field they are trying to fill
         key_to_regexps = {}
+        required = []
 
         #put every key in keys into the rey_to_regexps list
         for key, value in config['keys'].iteritems():
             key_to_regexps[key] = self.compile_regexp_dict_list(value['regexps'])
             if 'required' in value and value['required']:
-                self.required.append(key)
+                required.append(key)
 
         entries = []
         for section in sections:
@@ -191,7 +189,7 @@ class RegexpParse(object):
                     if m:
                         entry[key] = m.group(0)
                         break
-            if self.isvalid(entry):
+            if self.isvalid(entry, required):
                 entries.append(entry)
 
         return entries
@@ -199,4 +197,4 @@ class RegexpParse(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(RegexpParse, 'regexp_parse', api_ver=2)
+    plugin.register(RegexpParse, 'regexp_parse', groups=['reusable_input'], api_ver=2)
@@ -106,4 +106,4 @@ class RlsLog(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(RlsLog, 'rlslog', api_ver=2)
+    plugin.register(RlsLog, 'rlslog', groups=['reusable_input'], api_ver=2)
@@ -450,4 +450,4 @@ class InputRSS(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputRSS, 'rss', api_ver=2)
+    plugin.register(InputRSS, 'rss', groups=['reusable_input'], api_ver=2)
@@ -109,4 +109,4 @@ class InputScenereleases(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputScenereleases, 'scenereleases', api_ver=2)
+    plugin.register(InputScenereleases, 'scenereleases', groups=['reusable_input'], api_ver=2)
@@ -117,4 +117,4 @@ class Text(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(Text, 'text', api_ver=2)
+    plugin.register(Text, 'text', groups=['reusable_input'], api_ver=2)
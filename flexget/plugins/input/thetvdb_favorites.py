@@ -131,4 +131,4 @@ class InputThetvdbFavorites(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputThetvdbFavorites, 'thetvdb_favorites', api_ver=2)
+    plugin.register(InputThetvdbFavorites, 'thetvdb_favorites', groups=['reusable_input'], api_ver=2)
@@ -162,4 +162,4 @@ class TraktList(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(TraktList, 'trakt_list', api_ver=2)
+    plugin.register(TraktList, 'trakt_list', groups=['reusable_input'], api_ver=2)
@@ -46,7 +46,7 @@ class ModifySet(object):
     def on_task_filter(self, task, config):
         """Adds the set dict to all accepted entries."""
         # TODO: This is ugly, maybe we should only run on accepted entries all the time, or have an option to run on all
-        if plugin.get_plugin_by_name('set').phase_handlers['filter'].priority == PRIORITY_LAST:
+        if task.get_priority('set', 'filter') == PRIORITY_LAST:
             # If priority is last only run on accepted entries to prevent unneeded lazy lookups
             log.debug('Set plugin at default priority, only running on accepted entries.')
             entries = task.accepted
@@ -3,6 +3,7 @@ import logging
 
 from flexget import plugin
 from flexget.event import event
+from flexget.task import disabled_builtins
 
 log = logging.getLogger('builtins')
 
@@ -13,11 +14,12 @@ def all_builtins():
 
 
 class PluginDisableBuiltins(object):
-    """Disables all (or specific) builtin plugins from a task."""
+    """
+    Disables all (or specific) builtin plugins from a task.
 
-    def __init__(self):
-        # cannot trust that on_task_start would have been executed
-        self.disabled = []
+    Builtins are left out of the execution plan of the task configuring this plugin (see
+    :func:`flexget.task.get_execution_plan`), so other tasks running at the same time keep them.
+    """
 
     @property
     def schema(self):
@@ -33,27 +35,9 @@ class PluginDisableBuiltins(object):
 
     @plugin.priority(255)
     def on_task_start(self, task, config):
-        self.disabled = []
-        if not config:
-            return
-
-        for plugin in all_builtins():
-            if config is True or plugin.name in config:
-                plugin.builtin = False
-                self.disabled.append(plugin.name)
-        log.debug('Disabled builtin plugin(s): %s' % ', '.join(self.disabled))
-
-    @plugin.priority(-255)
-    def on_task_exit(self, task, config):
-        if not self.disabled:
-            return
-
-        for name in self.disabled:
-            plugin.plugins[name].builtin = True
-        log.debug('Enabled builtin plugin(s): %s' % ', '.join(self.disabled))
-        self.disabled = []
-
-    on_task_abort = on_task_exit
+        if config:
+            log.debug('Disabled builtin plugin(s): %s' % ', '.join(sorted(disabled_builtins(task.config))))
+
 
 @event('plugin.register')
 def register_plugin():
@@ -0,0 +1,28 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from flexget import plugin
+from flexget.config_schema import one_or_more
+from flexget.event import event
+
+log = logging.getLogger('exclusive_group')
+
+
+# The scheduler reads this value directly out of the config when queuing tasks, this plugin does nothing but make the
+# config key valid.
+class ExclusiveGroup(object):
+    """
+    Tasks in the same exclusive group are never executed at the same time, even when the daemon is
+    running with multiple workers. Useful for tasks sharing a download client or database rows.
+
+    Example::
+
+      exclusive_group: transmission
+    """
+
+    schema = one_or_more({'type': 'string'})
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(ExclusiveGroup, 'exclusive_group', api_ver=2)
@@ -14,16 +14,18 @@ class MaxReRuns(object):
     schema = {'type': 'integer'}
 
     def __init__(self):
-        self.default = Task.max_reruns
+        # Values before they were changed, by task name
+        self.default = {}
 
     def on_task_start(self, task, config):
-        self.default = task.max_reruns
+        self.default[task.name] = task.max_reruns
         task.max_reruns = int(config)
         log.debug('changing max task rerun variable to: %s' % config)
 
     def on_task_exit(self, task, config):
-        log.debug('restoring max task rerun variable to: %s' % self.default)
-        task.max_reruns = self.default
+        default = self.default.pop(task.name, Task.max_reruns)
+        log.debug('restoring max task rerun variable to: %s' % default)
+        task.max_reruns = default
 
     on_task_abort = on_task_exit
 
@@ -15,7 +15,7 @@ class MaxReRuns(object):
     def on_task_start(self, task, config):
         task.max_reruns = int(config)
 
-    def on_task_input(self, task, config):
+    def on_task_filter(self, task, config):
         task.rerun()
 
 
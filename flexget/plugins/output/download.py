@@ -1,4 +1,5 @@
 from __future__ import unicode_literals, division, absolute_import
+import errno
 import hashlib
 import logging
 import mimetypes
@@ -11,17 +12,30 @@ import urllib
 import urllib2
 from cgi import parse_header
 from httplib import BadStatusLine
+from urlparse import urlparse
 
 from requests import RequestException
 
 from flexget import options, plugin
+from flexget.entry import DeferredEntry
 from flexget.event import event
+from flexget.utils.pool import run_jobs
 from flexget.utils.tools import decode_html
 from flexget.utils.template import RenderError
 from flexget.utils.pathscrub import pathscrub
 
 log = logging.getLogger('download')
 
+# Entry fields read while downloading, lazy ones are resolved on the task thread before handing entries to workers
+DOWNLOAD_FIELDS = ['title', 'url', 'urls', 'path', 'download_auth', 'content-disposition', 'filename']
+
+
+def download_host(entry):
+    """Returns host name the entry will be downloaded from, None when it only has magnet links."""
+    for url in entry.get('urls') or [entry['url']]:
+        if not url.startswith('magnet:'):
+            return urlparse(url).hostname
+
 
 class PluginDownload(object):
 
@@ -48,6 +62,19 @@ class PluginDownload(object):
         path: ~/something/
         fail_html: no
 
+    Download several entries at once:
+
+    Entries are downloaded one at a time by default. Raise `workers` to
+    download in parallel, `workers_per_host` limits how many of those
+    may talk to the same site at once.
+
+    Example::
+
+      download:
+        path: ~/torrents/
+        workers: 8
+        workers_per_host: 2
+
     You may use commandline parameter --dl-path to temporarily override
     all paths to another location.
     """
@@ -61,7 +88,9 @@ class PluginDownload(object):
                     'path': {'type': 'string', 'format': 'path'},
                     'fail_html': {'type': 'boolean', 'default': True},
                     'overwrite': {'type': 'boolean', 'default': False},
-                    'temp': {'type': 'string', 'format': 'path'}
+                    'temp': {'type': 'string', 'format': 'path'},
+                    'workers': {'type': 'integer', 'minimum': 1, 'default': 1},
+                    'workers_per_host': {'type': 'integer', 'minimum': 1, 'default': 1}
                 },
                 'additionalProperties': False
             },
@@ -79,6 +108,8 @@ class PluginDownload(object):
         if not config.get('path'):
             config['require_path'] = True
         config.setdefault('fail_html', True)
+        config.setdefault('workers', 1)
+        config.setdefault('workers_per_host', 1)
         return config
 
     def on_task_download(self, task, config):
@@ -88,7 +119,7 @@ class PluginDownload(object):
         tmp = config.get('temp', os.path.join(task.manager.config_base, 'temp'))
 
         self.get_temp_files(task, require_path=config.get('require_path', False), fail_html=config['fail_html'],
-                            tmp_path=tmp)
+                            tmp_path=tmp, workers=config['workers'], workers_per_host=config['workers_per_host'])
 
     def get_temp_file(self, task, entry, require_path=False, handle_magnets=False, fail_html=True,
                       tmp_path=tempfile.gettempdir()):
@@ -152,14 +183,19 @@ class PluginDownload(object):
     def save_error_page(self, entry, task, page):
         received = os.path.join(task.manager.config_base, 'received', task.name)
         if not os.path.isdir(received):
-            os.makedirs(received)
+            try:
+                os.makedirs(received)
+            except OSError as e:
+                # another download worker may have created it
+                if e.errno != errno.EEXIST:
+                    raise
         filename = os.path.join(received, '%s.error' % entry['title'].encode(sys.getfilesystemencoding(), 'replace'))
         log.error('Error retrieving %s, the error page has been saved to %s' % (entry['title'], filename))
         with open(filename, 'w') as outfile:
             outfile.write(page)
 
     def get_temp_files(self, task, require_path=False, handle_magnets=False, fail_html=True,
-                       tmp_path=tempfile.gettempdir()):
+                       tmp_path=tempfile.gettempdir(), workers=1, workers_per_host=1):
         """Download all task content and store in temporary folder.
 
         :param bool require_path:
@@ -171,9 +207,31 @@ class PluginDownload(object):
           fail entries which url respond with html content
         :param tmp_path:
           path to use for temporary files while downloading
+        :param int workers:
+          how many entries may be downloaded at the same time
+        :param int workers_per_host:
+          how many of those downloads may be from the same host
         """
+        if workers < 2 or len(task.accepted) < 2:
+            for entry in task.accepted:
+                self.get_temp_file(task, entry, require_path, handle_magnets, fail_html, tmp_path)
+            return
+
+        jobs = []
         for entry in task.accepted:
-            self.get_temp_file(task, entry, require_path, handle_magnets, fail_html, tmp_path)
+            copy = DeferredEntry(entry, DOWNLOAD_FIELDS)
+            jobs.append({'copy': copy, 'host': download_host(copy)})
+
+        def download(job):
+            self.get_temp_file(task, job['copy'], require_path, handle_magnets, fail_html, tmp_path)
+
+        try:
+            run_jobs(download, jobs, workers, limits=[(lambda job: job['host'], workers_per_host)], task=task,
+                     name='download')
+        finally:
+            # Apply results in entry order, so the outcome does not depend on which download finished first
+            for job in jobs:
+                job['copy'].apply()
 
     # TODO: a bit silly method, should be get rid of now with simplier exceptions ?
     def process_entry(self, task, entry, url, tmp_path):
@@ -273,7 +331,12 @@ class PluginDownload(object):
         # create if missing
         if not os.path.isdir(tmp_path):
             log.debug('creating tmp_path %s' % tmp_path)
-            os.mkdir(tmp_path)
+            try:
+                os.mkdir(tmp_path)
+            except OSError as e:
+                # another download worker may have created it
+                if e.errno != errno.EEXIST:
+                    raise
 
         # check for write-access
         if not os.access(tmp_path, os.W_OK):
@@ -65,6 +65,17 @@ class PluginTemplate(object):
             if not config or task.options.template not in config:
                 task.abort('does not use `%s` template' % task.options.template, silent=True)
 
+        self.apply_templates(task.name, task.config, task.manager.config.get('templates', {}), config)
+
+    def apply_templates(self, task_name, task_config, toplevel_templates, config):
+        """
+        Merges the templates named in `config` (this plugin's config) into `task_config`.
+
+        :param task_name: Name of the task, for messages.
+        :param dict task_config: Config of the task, modified in place.
+        :param dict toplevel_templates: All configured templates.
+        :param config: Config of this plugin in the task.
+        """
         config = self.prepare_config(config)
 
         # add global in except when disabled with no_global
@@ -75,18 +86,16 @@ class PluginTemplate(object):
         elif not 'global' in config:
             config.append('global')
 
-        toplevel_templates = task.manager.config.get('templates', {})
-
         # apply templates
         for template in config:
             if template not in toplevel_templates:
                 if template == 'global':
                     continue
-                raise plugin.PluginError('Unable to find template %s for task %s' % (template, task.name), log)
+                raise plugin.PluginError('Unable to find template %s for task %s' % (template, task_name), log)
             if toplevel_templates[template] is None:
                 log.warning('Template `%s` is empty. Nothing to merge.' % template)
                 continue
-            log.debug('Merging template %s into task %s' % (template, task.name))
+            log.debug('Merging template %s into task %s' % (template, task_name))
 
             # We make a copy here because we need to remove
             template_config = toplevel_templates[template]
@@ -105,10 +114,10 @@ class PluginTemplate(object):
 
             # Merge
             try:
-                merge_dict_from_to(template_config, task.config)
+                merge_dict_from_to(template_config, task_config)
             except MergeException as exc:
                 raise plugin.PluginError('Failed to merge template %s to task %s. Error: %s' %
-                                  (template, task.name, exc.value))
+                                  (template, task_name, exc.value))
 
         log.trace('templates: %s' % config)
 
@@ -4,6 +4,7 @@ from datetime import datetime
 from netrc import netrc, NetrcParseError
 import logging
 import base64
+import threading
 
 from flexget import plugin, validator
 from flexget.entry import Entry
@@ -14,6 +15,22 @@ from flexget.utils.tools import parse_timedelta
 
 log = logging.getLogger('transmission')
 
+# Torrent fields used by the transmission plugins, only these are requested instead of every field transmission has
+TORRENT_FIELDS = ['id', 'name', 'hashString', 'torrentFile', 'totalSize', 'comment', 'downloadDir', 'isFinished',
+                  'isPrivate', 'trackers', 'status', 'leftUntilDone', 'uploadRatio', 'doneDate', 'addedDate']
+
+# Clients by connection config, shared by all transmission plugins
+_clients = {}
+# Torrents fetched from transmission during a task run by task name and connection config, shared by the input and
+# clean plugins until torrents are added to transmission
+_snapshots = {}
+# Guards _clients and _snapshots, tasks using transmission may run at the same time
+_lock = threading.Lock()
+
+
+def client_key(config):
+    return config['host'], config['port'], config.get('username'), config.get('password')
+
 
 def save_opener(f):
     """
@@ -36,7 +53,6 @@ def save_opener(f):
 class TransmissionBase(object):
 
     def __init__(self):
-        self.client = None
         self.opener = None
 
     def _validator(self, advanced):
@@ -89,11 +105,38 @@ class TransmissionBase(object):
                 raise plugin.PluginError("Error connecting to transmission: %s" % e.message)
         return cli
 
+    def get_client(self, config):
+        """Returns the client for `config`, connecting to transmission only the first time."""
+        key = client_key(config)
+        with _lock:
+            if key not in _clients:
+                _clients[key] = self.create_rpc_client(config)
+            return _clients[key]
+
+    def get_torrents(self, task, config):
+        """
+        Returns the torrents in transmission, fetched once per task run with only the fields in :data:`TORRENT_FIELDS`.
+        """
+        key = client_key(config)
+        with _lock:
+            torrents = _snapshots.get(task.name, {}).get(key)
+        if torrents is None:
+            torrents = self.get_client(config).info(arguments=TORRENT_FIELDS).values()
+            with _lock:
+                _snapshots.setdefault(task.name, {})[key] = torrents
+        return torrents
+
+    def forget_torrents(self, task, config=None):
+        """Drops torrents fetched during `task`, only those from the transmission in `config` if given."""
+        with _lock:
+            if config is None:
+                _snapshots.pop(task.name, None)
+            else:
+                _snapshots.get(task.name, {}).pop(client_key(config), None)
+
     def torrent_completed(self, torrent):
-        for tf in torrent.files().iteritems():
-            if tf[1]['selected'] and (tf[1]['completed'] < tf[1]['size']):
-                return False
-        return True
+        # leftUntilDone only counts the wanted files, so there is no need to fetch the file list
+        return torrent.leftUntilDone == 0
 
     @save_opener
     def on_task_start(self, task, config):
@@ -105,16 +148,23 @@ class TransmissionBase(object):
             raise plugin.PluginError('Transmissionrpc module version 0.6 or higher required.', log)
         if [int(part) for part in transmissionrpc.__version__.split('.')] < [0, 6]:
             raise plugin.PluginError('Transmissionrpc module version 0.6 or higher required, please upgrade', log)
+        # Torrents fetched on a previous run are stale
+        self.forget_torrents(task)
         config = self.prepare_config(config)
         if config['enabled']:
             if task.options.test:
                 log.info('Trying to connect to transmission...')
-                self.client = self.create_rpc_client(config)
-                if self.client:
+                if self.get_client(config):
                     log.info('Successfully connected to transmission.')
                 else:
                     log.error('It looks like there was a problem connecting to transmission.')
 
+    @plugin.priority(-255)
+    def on_task_exit(self, task, config):
+        self.forget_torrents(task)
+
+    on_task_abort = on_task_exit
+
 
 class PluginTransmissionInput(TransmissionBase):
 
@@ -137,16 +187,20 @@ class PluginTransmissionInput(TransmissionBase):
         if not config['enabled']:
             return
 
-        if not self.client:
-            self.client = self.create_rpc_client(config)
+        client = self.get_client(config)
         entries = []
 
         # Hack/Workaround for http://flexget.com/ticket/2002
         # TODO: Proper fix
         if 'username' in config and 'password' in config:
-            self.client.http_handler.set_authentication(self.client.url, config['username'], config['password'])
+            client.http_handler.set_authentication(client.url, config['username'], config['password'])
+
+        torrents = self.get_torrents(task, config)
+        # File lists are only needed for the location of stopped torrents, get them all in one request
+        stopped = [torrent.id for torrent in torrents if torrent.status == 'stopped' and self.torrent_completed(torrent)]
+        files = client.get_files(stopped) if stopped else {}
 
-        for torrent in self.client.info().values():
+        for torrent in torrents:
             torrentCompleted = self.torrent_completed(torrent)
             if not config['onlycomplete'] or torrentCompleted:
                 entry = Entry(title=torrent.name,
@@ -163,7 +217,7 @@ class PluginTransmissionInput(TransmissionBase):
                 if torrentCompleted and torrent.status == 'stopped':
                     best = None
                     tots = 0
-                    for tf in torrent.files().iteritems():
+                    for tf in files.get(torrent.id, {}).iteritems():
                         tots += tf[1]['size']
                         if tf[1]['selected'] and tf[1]['completed'] == tf[1]['size'] and \
                             (not best or tf[1]['size'] > best[1]):
@@ -242,14 +296,13 @@ class PluginTransmission(TransmissionBase):
         # Do not run if there is nothing to do
         if not task.accepted:
             return
-        if self.client is None:
-            self.client = self.create_rpc_client(config)
-            if self.client:
-                log.debug('Successfully connected to transmission.')
-            else:
-                raise plugin.PluginError("Couldn't connect to transmission.")
+        client = self.get_client(config)
+        if not client:
+            raise plugin.PluginError("Couldn't connect to transmission.")
         if task.accepted:
-            self.add_to_transmission(self.client, task, config)
+            self.add_to_transmission(client, task, config)
+            # Torrents fetched earlier in the task no longer match what is in transmission
+            self.forget_torrents(task, config)
 
     def _make_torrent_options_dict(self, config, entry):
 
@@ -351,6 +404,7 @@ class PluginTransmission(TransmissionBase):
         if not 'download' in task.config:
             download = plugin.get_plugin_by_name('download')
             download.instance.cleanup_temp_files(task)
+        self.forget_torrents(task)
 
     on_task_abort = on_task_exit
 
@@ -392,14 +446,13 @@ class PluginTransmissionClean(TransmissionBase):
         return root
 
     def on_task_exit(self, task, config):
+        config = self.prepare_config(config)
         if not config['enabled']:
             return
-        if not self.client:
-            self.client = self.create_rpc_client(config)
         nrat = float(config['min_ratio']) if 'min_ratio' in config else None
         nfor = parse_timedelta(config['finished_for']) if 'finished_for' in config else None
         remove_ids = []
-        for torrent in self.client.info().values():
+        for torrent in self.get_torrents(task, config):
             log.debug('Torrent "%s": status: "%s" - ratio: %s - date done: %s' %
                       (torrent.name, torrent.status, torrent.ratio, torrent.date_done))
             if self.torrent_completed(torrent) and \
@@ -409,7 +462,8 @@ class PluginTransmissionClean(TransmissionBase):
                 log.info('Removing finished torrent `%s` from transmission' % torrent.name)
                 remove_ids.append(torrent.id)
         if remove_ids:
-            self.client.remove(remove_ids)
+            self.get_client(config).remove(remove_ids)
+        self.forget_torrents(task)
 
 
 @event('plugin.register')
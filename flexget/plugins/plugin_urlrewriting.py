@@ -1,11 +1,17 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
+from urlparse import urlparse
 
 from flexget import plugin, validator
+from flexget.entry import DeferredEntry
 from flexget.event import event
+from flexget.utils.pool import run_jobs
 
 log = logging.getLogger('urlrewriter')
 
+# How many entries may be rewritten at the same time
+REWRITE_THREADS = 4
+
 
 class UrlRewritingError(Exception):
 
@@ -16,33 +22,123 @@ class UrlRewritingError(Exception):
         return repr(self.value)
 
 
+class RewriterIndex(object):
+    """
+    Finds the rewriters which may rewrite an url, using the `url_patterns` rewriters declare. Patterns can be
+    host names, which also match their subdomains, schemes ending with a colon, eg. ``'magnet:'``, or compiled
+    regexps searched from the whole url. Rewriters without `url_patterns` are candidates for every url.
+    """
+
+    def __init__(self, rewriters):
+        """
+        :param rewriters: List of urlrewriter PluginInfos, in the order they should be tried
+        """
+        self.rewriters = rewriters
+        self.any_url = set()
+        self.hosts = {}
+        self.schemes = {}
+        self.regexps = []
+        for rewriter in rewriters:
+            patterns = getattr(rewriter.instance, 'url_patterns', None)
+            if patterns is None:
+                self.any_url.add(rewriter.name)
+                continue
+            for pattern in patterns:
+                if not isinstance(pattern, basestring):
+                    self.regexps.append((pattern, rewriter.name))
+                elif pattern.endswith(':'):
+                    self.schemes.setdefault(pattern[:-1].lower(), set()).add(rewriter.name)
+                else:
+                    self.hosts.setdefault(pattern.lower(), set()).add(rewriter.name)
+
+    def candidates(self, url):
+        """:return: Set of names of the rewriters which may rewrite `url`"""
+        names = set(self.any_url)
+        parsed = urlparse(url)
+        names.update(self.schemes.get(parsed.scheme.lower(), ()))
+        host = parsed.hostname
+        while host:
+            names.update(self.hosts.get(host, ()))
+            host = host.partition('.')[2]
+        for regexp, name in self.regexps:
+            if name not in names and regexp.search(url):
+                names.add(name)
+        return names
+
+
 class PluginUrlRewriting(object):
     """
     Provides URL rewriting framework
+
+    Rewriters may declare `url_patterns` to be asked only about urls matching them, see :class:`RewriterIndex`.
+    Accepted entries are rewritten concurrently, so `url_rewritable` and `url_rewrite` of a rewriter are called from
+    several threads at the same time, and for different tasks. Rewriters must keep any state they change there by
+    task name, and guard it with a lock.
     """
 
     def __init__(self):
-        self.disabled_rewriters = []
+        self._index = None
+        self._index_version = None
+
+    @property
+    def index(self):
+        """:class:`RewriterIndex` of the currently registered rewriters."""
+        version = plugin.get_registry_version(), len(plugin.plugins)
+        if self._index is None or self._index_version != version:
+            self._index = RewriterIndex(list(plugin.get_plugins(group='urlrewriter')))
+            self._index_version = version
+        return self._index
 
     def on_task_urlrewrite(self, task, config):
         log.debug('Checking %s entries' % len(task.accepted))
         # try to urlrewrite all accepted
-        for entry in task.accepted:
+        entries = [entry for entry in task.accepted if self.url_rewritable(task, entry)]
+        if len(entries) < 2 or REWRITE_THREADS < 2:
+            for entry in entries:
+                try:
+                    self.url_rewrite(task, entry)
+                except UrlRewritingError as e:
+                    log.warn(e.value)
+                    entry.fail()
+            return
+
+        jobs = [{'copy': DeferredEntry(entry, ['title', 'url']), 'error': None} for entry in entries]
+
+        def rewrite(job):
             try:
-                self.url_rewrite(task, entry)
+                self.url_rewrite(task, job['copy'])
             except UrlRewritingError as e:
-                log.warn(e.value)
-                entry.fail()
+                job['error'] = e
+
+        try:
+            run_jobs(rewrite, jobs, REWRITE_THREADS, task=task, name='urlrewrite')
+        finally:
+            # Apply results in entry order, so the outcome does not depend on which rewrite finished first
+            for job in jobs:
+                job['copy'].apply()
+                if job['error']:
+                    log.warn(job['error'].value)
+                    job['copy'].original.fail()
+
+    def candidates(self, task, entry):
+        """Yields rewriters enabled in `task` which may rewrite the url of `entry`, in order."""
+        index = self.index
+        names = index.candidates(entry['url'])
+        disabled = task.config.get('disable_urlrewriters') or []
+        for urlrewriter in index.rewriters:
+            if urlrewriter.name not in names:
+                continue
+            if urlrewriter.name in disabled:
+                log.trace('Skipping rewriter %s since it\'s disabled' % urlrewriter.name)
+                continue
+            yield urlrewriter
 
     # API method
     def url_rewritable(self, task, entry):
         """Return True if entry is urlrewritable by registered rewriter."""
-        for urlrewriter in plugin.get_plugins_by_group('urlrewriter'):
-            if urlrewriter.name in self.disabled_rewriters:
-                log.trace('Skipping rewriter %s since it\'s disabled' % urlrewriter.name)
-                continue
+        for urlrewriter in self.candidates(task, entry):
             log.trace('checking urlrewriter %s' % urlrewriter.name)
-            if urlrewriter.instance.url_rewritable(self, entry):
+            if urlrewriter.instance.url_rewritable(task, entry):
                 return True
         return False
 
@@ -56,11 +152,8 @@ class PluginUrlRewriting(object):
             if tries > 20:
                 raise UrlRewritingError('URL rewriting was left in infinite loop while rewriting url for %s, '
                                         'some rewriter is returning always True' % entry)
-            for urlrewriter in plugin.get_plugins_by_group('urlrewriter'):
+            for urlrewriter in self.candidates(task, entry):
                 name = urlrewriter.name
-                if name in self.disabled_rewriters:
-                    log.trace('Skipping rewriter %s since it\'s disabled' % name)
-                    continue
                 try:
                     if urlrewriter.instance.url_rewritable(task, entry):
                         log.debug('Url rewriting %s' % entry['url'])
@@ -79,12 +172,15 @@ class PluginUrlRewriting(object):
 
 
 class DisableUrlRewriter(object):
-    """Disable certain urlrewriters."""
+    """
+    Disable certain urlrewriters.
+
+    Only affects the task it is configured in, the urlrewriting plugin reads it from the task config.
+    """
 
     schema = {'type': 'array', 'items': {'type': 'string'}}
 
     def on_task_start(self, task, config):
-        urlrewrite = plugin.get_plugin_by_name('urlrewriting')['instance']
         for disable in config:
             try:
                 plugin.get_plugin_by_name(disable)
@@ -92,18 +188,6 @@ class DisableUrlRewriter(object):
                 log.critical('Unknown url-rewriter %s' % disable)
                 continue
             log.debug('Disabling url rewriter %s' % disable)
-            urlrewrite.disabled_rewriters.append(disable)
-
-    def on_task_exit(self, task, config):
-        urlrewrite = plugin.get_plugin_by_name('urlrewriting')['instance']
-        for disable in config:
-            log.debug('Enabling url rewriter %s' % disable)
-            try:
-                urlrewrite.disabled_rewriters.remove(disable)
-            except ValueError:
-                log.debug('%s does not exists' % disable)
-
-    on_task_abort = on_task_exit
 
 
 @event('plugin.register')
@@ -14,6 +14,8 @@ log = logging.getLogger('bakabt')
 class UrlRewriteBakaBT(object):
     """BakaBT urlrewriter."""
 
+    url_patterns = ['bakabt.com']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
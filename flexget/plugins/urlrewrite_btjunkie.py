@@ -10,6 +10,8 @@ log = logging.getLogger("btjunkie")
 class UrlRewriteBtJunkie(object):
     """BtJunkie urlrewriter."""
 
+    url_patterns = ['btjunkie.org']
+
     def url_rewritable(self, task, entry):
         return entry['url'].startswith('http://btjunkie.org')
 
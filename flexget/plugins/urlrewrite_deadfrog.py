@@ -15,6 +15,8 @@ log = logging.getLogger('deadfrog')
 class UrlRewriteDeadFrog(object):
     """DeadFrog urlrewriter."""
 
+    url_patterns = ['deadfrog.us']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
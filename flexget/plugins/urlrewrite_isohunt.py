@@ -36,6 +36,8 @@ class UrlRewriteIsoHunt(object):
       12: ALL
     """
 
+    url_patterns = ['isohunt.com']
+
     schema = {
         'type': 'string',
         'enum': ['misc', 'movies', 'audio', 'tv', 'games', 'apps', 'pics', 'anime', 'comics', 'books', 'music video',
@@ -3,6 +3,7 @@ import urllib
 import urllib2
 import logging
 import re
+import threading
 
 from flexget import plugin
 from flexget.entry import Entry
@@ -22,15 +23,22 @@ log = logging.getLogger('newtorrents')
 class NewTorrents:
     """NewTorrents urlrewriter and search plugin."""
 
+    url_patterns = ['newtorrents.info']
+
     def __init__(self):
-        self.resolved = []
+        # Urls already resolved by each task, url_rewrite is called from several threads
+        self.resolved = {}
+        self.resolved_lock = threading.Lock()
 
     # UrlRewriter plugin API
     def url_rewritable(self, task, entry):
         # Return true only for urls that can and should be resolved
         if entry['url'].startswith('http://www.newtorrents.info/down.php?'):
             return False
-        return entry['url'].startswith('http://www.newtorrents.info') and not entry['url'] in self.resolved
+        if not entry['url'].startswith('http://www.newtorrents.info'):
+            return False
+        with self.resolved_lock:
+            return entry['url'] not in self.resolved.get(task.name, ())
 
     # UrlRewriter plugin API
     def url_rewrite(self, task, entry):
@@ -46,7 +54,8 @@ class NewTorrents:
 
         if url:
             entry['url'] = url
-            self.resolved.append(url)
+            with self.resolved_lock:
+                self.resolved.setdefault(task.name, set()).add(url)
         else:
             raise UrlRewritingError('Bug in newtorrents urlrewriter')
 
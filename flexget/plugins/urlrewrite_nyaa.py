@@ -20,6 +20,8 @@ FILTERS = ['all', 'filter remakes', 'trusted only', 'a+ only']
 class UrlRewriteNyaa(object):
     """Nyaa urlrewriter and search plugin."""
 
+    url_patterns = ['nyaa.eu']
+
     def validator(self):
         from flexget import validator
 
@@ -42,6 +42,8 @@ SORT = {
 class UrlRewritePirateBay(object):
     """PirateBay urlrewriter."""
 
+    url_patterns = [URL_MATCH]
+
     schema = {
         'oneOf': [
             {'type': 'boolean'},
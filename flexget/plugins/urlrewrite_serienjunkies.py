@@ -28,6 +28,8 @@ class UrlRewriteSerienjunkies(object):
     hoster: [ul|cz|so] default "ul"
     """
 
+    url_patterns = ['serienjunkies.org']
+
     schema = {
         'type': 'object',
         'properties': {
@@ -51,8 +53,8 @@ class UrlRewriteSerienjunkies(object):
         series_url = entry['url']
         download_title = entry['title']
         search_title = re.sub('\[.*\] ', '', download_title)
-        self.config = task.config.get('serienjunkies')
-        download_url = self.parse_download(series_url, search_title, self.config, entry)
+        config = task.config.get('serienjunkies')
+        download_url = self.parse_download(series_url, search_title, config, entry)
         log.debug('TV Show URL: %s' % series_url)
         log.debug('Episode: %s' % search_title)
         log.debug('Download URL: %s' % download_url)
@@ -15,6 +15,8 @@ log = logging.getLogger('torrent411')
 class UrlRewriteTorrent411(object):
     """torrent411 RSS url_rewrite"""
 
+    url_patterns = ['t411.me']
+
     def url_rewritable(self, feed, entry):
         url = entry['url']
         # match si ce qui suit 'http://www.t411.me/torrents/' ne contient pas
@@ -50,6 +50,8 @@ class UrlRewriteTorrentleech(object):
           Episodes, TV BoxSets, Episodes HD
     """
 
+    url_patterns = ['torrentleech.org']
+
     schema = {
         'type': 'object',
         'properties': {
@@ -24,6 +24,8 @@ REPUTATIONS = {  # Maps reputation name to feed address
 class UrlRewriteTorrentz(object):
     """Torrentz urlrewriter."""
 
+    url_patterns = ['torrentz.eu']
+
     schema = {
         'oneOf' : [
             {
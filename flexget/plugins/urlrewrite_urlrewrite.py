@@ -20,6 +20,7 @@ class UrlRewrite(object):
           format: http://www.demonoid.com/files/download/HTTP/
     """
 
+    # Compiled rewrites by task name
     resolves = {}
 
     # built-in resolves
@@ -45,16 +46,19 @@ class UrlRewrite(object):
     }
 
     def on_task_start(self, task, config):
+        resolves = {}
         for name, rewrite_config in config.iteritems():
             match = re.compile(rewrite_config['regexp'])
             format = rewrite_config['format']
-            self.resolves[name] = {'regexp_compiled': match, 'format': format, 'regexp': rewrite_config['regexp']}
+            resolves[name] = {'regexp_compiled': match, 'format': format, 'regexp': rewrite_config['regexp']}
             log.debug('Added rewrite %s' % name)
+        self.resolves[task.name] = resolves
 
     def url_rewritable(self, task, entry):
         log.trace('running url_rewritable')
-        log.trace(self.resolves)
-        for name, config in self.resolves.iteritems():
+        resolves = self.resolves.get(task.name, {})
+        log.trace(resolves)
+        for name, config in resolves.iteritems():
             regexp = config['regexp_compiled']
             log.trace('testing %s' % config['regexp'])
             if regexp.search(entry['url']):
@@ -62,7 +66,7 @@ class UrlRewrite(object):
         return False
 
     def url_rewrite(self, task, entry):
-        for name, config in self.resolves.iteritems():
+        for name, config in self.resolves.get(task.name, {}).iteritems():
             regexp = config['regexp_compiled']
             format = config['format']
             if regexp.search(entry['url']):
@@ -1,7 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
+from contextlib import contextmanager
 import copy
 from datetime import datetime, timedelta, time as dt_time
 import fnmatch
+import heapq
 from hashlib import md5
 import logging
 import Queue
@@ -10,7 +12,10 @@ import time
 import sys
 
 from sqlalchemy import Column, String, DateTime
+from sqlalchemy import event as sqla_event
+from sqlalchemy.pool import SingletonThreadPool
 
+from flexget import plugin
 from flexget.config_schema import register_config_key, parse_time
 from flexget.db_schema import versioned_base
 from flexget.event import event
@@ -22,6 +27,8 @@ Base = versioned_base('scheduler', 0)
 
 UNITS = ['seconds', 'minutes', 'hours', 'days', 'weeks']
 WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+# Seconds a worker waits for another worker's database transaction to finish before giving up
+BUSY_TIMEOUT = 600
 
 
 yaml_schedule = {
@@ -94,6 +101,10 @@ class Scheduler(threading.Thread):
         self.manager = manager
         self.triggers = []
         self.run_schedules = True
+        #: Number of jobs which are allowed to execute at the same time
+        self.workers = 1
+        #: Jobs currently being executed, you must hold `run_queue.mutex` while using it
+        self.running_jobs = []
         self._shutdown_now = False
         self._shutdown_when_finished = False
 
@@ -147,18 +158,36 @@ class Scheduler(threading.Thread):
 
         finished_events = []
         for task in tasks:
-            job = Job(task, options=options, output=output, priority=priority, trigger_id=trigger_id)
+            groups = self.templated_config(task).get('exclusive_group', [])
+            if not isinstance(groups, list):
+                groups = [groups]
+            job = Job(task, options=options, output=output, priority=priority, trigger_id=trigger_id,
+                      groups=groups)
             self.run_queue.put(job)
             finished_events.append(job.finished_event)
         return finished_events
 
+    def templated_config(self, task):
+        """Returns the config of `task` with its templates applied, as it will be when the task runs."""
+        config = copy.deepcopy(self.manager.config['tasks'][task])
+        if config.get('template') is False:
+            return config
+        try:
+            plugin.get_plugin_by_name('template').instance.apply_templates(
+                task, config, self.manager.config.get('templates', {}), config.get('template'))
+        except plugin.PluginError as e:
+            # The task will fail with the same error when it runs
+            log.debug('Could not apply templates of task %s: %s' % (task, e))
+            return self.manager.config['tasks'][task]
+        return config
+
     def queue_pending_jobs(self):
         # Add pending jobs to the run queue
         with self.triggers_lock:
             for trigger in self.triggers:
                 if trigger.should_run:
                     with self.run_queue.mutex:
-                        if any(j.trigger_id == trigger.uid for j in self.run_queue.queue):
+                        if any(j.trigger_id == trigger.uid for j in self.run_queue.queue + self.running_jobs):
                             log.error('Not firing schedule %r. Tasks from last run have still not finished.' % trigger)
                             log.error('You may need to increase the interval for this schedule.')
                             continue
@@ -170,41 +199,120 @@ class Scheduler(threading.Thread):
                     self.execute(options=options, priority=5, trigger_id=trigger.uid)
                     trigger.trigger()
 
-    def start(self, run_schedules=None):
+    def can_start(self, job):
+        """
+        Returns True if `job` may start now. A job has to wait while another job is running for the same task, or
+        for a task sharing one of its exclusive groups. You must hold `run_queue.mutex` while calling this.
+        """
+        for running in self.running_jobs:
+            if running.task == job.task or running.groups & job.groups:
+                return False
+        return True
+
+    def get_job(self, timeout=0.5):
+        """
+        Removes the first job in priority order which is able to start from the run queue, and marks it as running.
+
+        :param timeout: Seconds to wait for a job to become available.
+        :returns: The :class:`Job`, or None if nothing could be started within `timeout`.
+        """
+        end = time.time() + timeout
+        with self.run_queue.not_empty:
+            while True:
+                for job in sorted(self.run_queue.queue):
+                    if self.can_start(job):
+                        self.run_queue.queue.remove(job)
+                        heapq.heapify(self.run_queue.queue)
+                        self.run_queue.not_full.notify()
+                        self.running_jobs.append(job)
+                        return job
+                remaining = end - time.time()
+                if remaining <= 0:
+                    return None
+                self.run_queue.not_empty.wait(remaining)
+
+    def finish_job(self, job):
+        """Marks a job returned by :meth:`get_job` as done, and wakes up workers waiting for it."""
+        with self.run_queue.not_empty:
+            self.running_jobs.remove(job)
+            # Waiting jobs may have been held back by this one
+            self.run_queue.not_empty.notify_all()
+        self.run_queue.task_done()
+        job.finished_event.set()
+
+    @property
+    def idle(self):
+        """True when there are no jobs running or waiting to be run."""
+        with self.run_queue.mutex:
+            return not self.run_queue.queue and not self.running_jobs
+
+    def run_job(self, job):
+        from flexget.task import Task, TaskAbort
+        try:
+            with capture_output(job.output, job.task):
+                Task(self.manager, job.task, options=job.options).execute()
+        except TaskAbort as e:
+            log.debug('task %s aborted: %r' % (job.task, e))
+        except Exception as e:
+            # Don't let a bug in one task take down the worker
+            log.exception('BUG: Unhandled error while executing task %s: %s' % (job.task, e))
+        finally:
+            self.finish_job(job)
+
+    def work(self):
+        """Main loop of the worker threads when running with more than one worker."""
+        while not self._shutdown_now:
+            job = self.get_job()
+            if job:
+                self.run_job(job)
+
+    def start(self, run_schedules=None, workers=None):
         if run_schedules is not None:
             self.run_schedules = run_schedules
+        if workers is not None:
+            self.workers = workers
         super(Scheduler, self).start()
 
+    def start_workers(self):
+        """Starts the worker threads, and prepares the database connection pool to be shared by them."""
+        engine = self.manager.engine
+        if isinstance(engine.pool, SingletonThreadPool):
+            # SingletonThreadPool closes the connections of other threads when it gets more threads than its size
+            engine.pool.size = max(engine.pool.size, self.workers + 5)
+        if engine.name == 'sqlite':
+            # Concurrent tasks wait for each other to commit, rather than failing with 'database is locked'
+            @sqla_event.listens_for(engine, 'connect')
+            def set_busy_timeout(dbapi_connection, connection_record):
+                dbapi_connection.execute('PRAGMA busy_timeout = %d' % (BUSY_TIMEOUT * 1000))
+
+        workers = []
+        for i in range(self.workers):
+            worker = threading.Thread(target=self.work, name='worker-%d' % (i + 1))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        log.debug('started %d workers' % self.workers)
+        return workers
+
     def run(self):
-        from flexget.task import Task, TaskAbort
+        workers = []
+        if self.workers > 1:
+            workers = self.start_workers()
         while not self._shutdown_now:
             if self.run_schedules:
                 self.queue_pending_jobs()
-            # Grab the first job from the run queue and do it
-            try:
-                job = self.run_queue.get(timeout=0.5)
-            except Queue.Empty:
-                if self._shutdown_when_finished:
-                    self._shutdown_now = True
-                continue
-            if job.output:
-                # Hook up our log and stdout to give back to the requester
-                old_stdout, old_stderr = sys.stdout, sys.stderr
-                sys.stdout, sys.stderr = Tee(job.output, sys.stdout), Tee(job.output, sys.stderr)
-                # TODO: Use a filter to capture only the logging for this execution?
-                streamhandler = logging.StreamHandler(job.output)
-                streamhandler.setFormatter(FlexGetFormatter())
-                logging.getLogger().addHandler(streamhandler)
-            try:
-                Task(self.manager, job.task, options=job.options).execute()
-            except TaskAbort as e:
-                log.debug('task %s aborted: %r' % (job.task, e))
-            finally:
-                self.run_queue.task_done()
-                job.finished_event.set()
-                if job.output:
-                    sys.stdout, sys.stderr = old_stdout, old_stderr
-                    logging.getLogger().removeHandler(streamhandler)
+            if workers:
+                time.sleep(0.5)
+            else:
+                # Without a worker pool, grab the first job from the run queue and do it ourselves
+                job = self.get_job()
+                if job:
+                    self.run_job(job)
+                    continue
+            if self._shutdown_when_finished and self.idle:
+                self._shutdown_now = True
+        for worker in workers:
+            worker.join()
         remaining_jobs = self.run_queue.qsize()
         if remaining_jobs:
             log.warning('Scheduler shut down with %s jobs remaining in the queue to run.' % remaining_jobs)
@@ -220,7 +328,7 @@ class Scheduler(threading.Thread):
 
     def shutdown(self, finish_queue=True):
         """
-        Ends the thread. If a job is running, waits for it to finish first.
+        Ends the thread. If jobs are running, waits for them to finish first.
 
         :param bool finish_queue: If this is True, shutdown will wait until all queued tasks have finished.
         """
@@ -242,12 +350,16 @@ class Job(object):
     options = None
     #: :class:`BufferQueue` to write the task execution output to. '[[END]]' will be sent to the queue when complete
     output = None
+    #: Set of exclusive group names, jobs sharing a group are never run at the same time
+    groups = frozenset()
 
-    def __init__(self, task, options=None, output=None, priority=1, trigger_id=None):
+    def __init__(self, task, options=None, output=None, priority=1, trigger_id=None, groups=None):
         self.task = task
         self.options = options
         self.output = output
         self.priority = priority
+        if groups:
+            self.groups = frozenset(groups)
         self.run_at = datetime.now()
         self.finished_event = threading.Event()
         # Used to make sure a certain trigger doesn't add jobs faster than they can run
@@ -384,20 +496,70 @@ class Trigger(object):
         return 'Trigger(tasks=%r, amount=%r, unit=%r)' % (self.tasks, self.amount, self.unit)
 
 
-class Tee(object):
-    """Used so that output to sys.stdout can be grabbed and still displayed."""
-    def __init__(self, *files):
-        self.files = files
-
-    def __getattr__(self, meth):
-        def method_runner(*args, **kwargs):
-            for f in self.files:
-                try:
-                    getattr(f, meth)(*args, **kwargs)
-                except AttributeError:
-                    # We don't really care if all of our 'files' fully support the file api
-                    pass
-        return method_runner
+class ThreadOutput(object):
+    """
+    Used in place of sys.stdout and sys.stderr so that output can be grabbed and still displayed.
+    Output is copied only to the file registered by the thread which wrote it, so concurrently running jobs each
+    capture just their own output.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, data):
+        self.stream.write(data)
+        output = getattr(self.local, 'output', None)
+        if output is not None:
+            output.write(data)
+
+    def __getattr__(self, attr):
+        return getattr(self.stream, attr)
+
+
+class JobFilter(logging.Filter):
+    """
+    Only lets through log records created by the given thread, or logged for the given task from any thread, so that
+    messages of worker threads started by the task's plugins are included.
+    """
+    def __init__(self, thread_id, task=None):
+        logging.Filter.__init__(self)
+        self.thread_id = thread_id
+        self.task = task
+
+    def filter(self, record):
+        if self.task and getattr(record, 'task', None) == self.task:
+            return True
+        return record.thread == self.thread_id
+
+
+@contextmanager
+def capture_output(output, task=None):
+    """
+    Context manager which copies stdout, stderr and log messages from the current thread into `output`.
+
+    :param output: A file-like object, if None nothing is captured.
+    :param task: Name of the task being run, log messages for it are copied from all threads.
+    """
+    if output is None:
+        yield
+        return
+    if not isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = ThreadOutput(sys.stdout)
+    if not isinstance(sys.stderr, ThreadOutput):
+        sys.stderr = ThreadOutput(sys.stderr)
+    streams = sys.stdout, sys.stderr
+    streamhandler = logging.StreamHandler(output)
+    streamhandler.setFormatter(FlexGetFormatter())
+    streamhandler.addFilter(JobFilter(threading.current_thread().ident, task))
+    for stream in streams:
+        stream.local.output = output
+    logging.getLogger().addHandler(streamhandler)
+    try:
+        yield
+    finally:
+        for stream in streams:
+            stream.local.output = None
+        logging.getLogger().removeHandler(streamhandler)
 
 
 class BufferQueue(Queue.Queue):
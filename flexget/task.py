@@ -9,11 +9,12 @@ from sqlalchemy import Column, Unicode, String, Integer
 
 from flexget import config_schema
 from flexget import db_schema
-from flexget.entry import EntryUnicodeError
+from flexget.entry import Entry, EntryUnicodeError
 from flexget.event import fire_event, event
 from flexget.manager import Session
-from flexget.plugin import (get_plugins_by_phase, task_phases, phase_methods, PluginWarning, PluginError,
-                            DependencyError, plugins as all_plugins, plugin_schemas)
+from flexget.plugin import (get_plugins, get_registry_version, task_phases, phase_methods, PluginWarning,
+                            PluginError, DependencyError, get_plugin_by_name, plugins as all_plugins,
+                            plugin_schemas)
 from flexget.utils import requests
 from flexget.utils.simple_persistence import SimpleTaskPersistence
 
@@ -48,6 +49,62 @@ def config_changed(task):
         session.close()
 
 
+# Plugins of each phase in execution order by priority overrides, and execution plans built from them, valid for one
+# registry version
+_plan_cache = {'version': None, 'phases': {}, 'plans': {}}
+
+
+def disabled_builtins(config):
+    """
+    :param dict config: Task config.
+    :return: Names of the builtin plugins turned off with the `disable_builtins` plugin in `config`.
+    """
+    disabled = config.get('disable_builtins')
+    if not disabled:
+        return frozenset()
+    if disabled is True:
+        return frozenset(p.name for p in all_plugins.itervalues() if p.builtin)
+    return frozenset(disabled)
+
+
+def get_execution_plan(config):
+    """
+    Get the plugins to run in each phase for a task. Plans are shared by all tasks configuring the same plugins,
+    disabled builtins and priority overrides, and only rebuilt after plugins are registered, or their priorities or
+    builtin status are changed.
+
+    Builtins disabled with `disable_builtins` and priorities given with `plugin_priority` only apply to the plan of
+    the task configuring them, so tasks running at the same time do not affect each other.
+
+    :param dict config: Task config.
+    :return: Dict mapping each phase to a tuple of `(order, PluginInfo)` pairs, for the builtin and configured
+      plugins of that phase, in execution order. `order` is the position among all plugins of the phase.
+    """
+    global _plan_cache
+    cache = _plan_cache
+    version = get_registry_version()
+    if cache['version'] != version:
+        cache = _plan_cache = {'version': version, 'phases': {}, 'plans': {}}
+    names = frozenset(config)
+    disabled = disabled_builtins(config)
+    priorities = frozenset((config.get('plugin_priority') or {}).iteritems())
+    key = names, disabled, priorities
+    plan = cache['plans'].get(key)
+    if plan is None:
+        plan = {}
+        for phase in phase_methods:
+            phase_key = phase, priorities
+            if phase_key not in cache['phases']:
+                overrides = dict(priorities)
+                cache['phases'][phase_key] = sorted(
+                    get_plugins(phase=phase), reverse=True,
+                    key=lambda p: overrides.get(p.name, p.phase_handlers[phase].priority))
+            plan[phase] = tuple((order, p) for order, p in enumerate(cache['phases'][phase_key])
+                                if (p.builtin and p.name not in disabled) or p.name in names)
+        cache['plans'][key] = plan
+    return plan
+
+
 def useTaskLogging(func):
 
     @wraps(func)
@@ -168,6 +225,10 @@ class Task(object):
 
     max_reruns = 5
 
+    #: Input plugins in this group produce the same entries on reruns (eg. rss). Reruns of tasks whose inputs are all
+    #: in it reuse the entries from the first run instead of running those inputs again.
+    reusable_input_group = 'reusable_input'
+
     def __init__(self, manager, name, config=None, options=None):
         """
         :param Manager manager: Manager instance.
@@ -194,6 +255,8 @@ class Task(object):
 
         # not to be reset
         self._rerun_count = 0
+        # Snapshots of the entries produced by the input phase, which are used on reruns
+        self._input_snapshots = None
 
         self.config_modified = None
 
@@ -339,12 +402,21 @@ class Task(object):
           An iterator over configured :class:`flexget.plugin.PluginInfo` instances enabled on this task.
         """
         if phase:
-            plugins = sorted(get_plugins_by_phase(phase), key=lambda p: p.phase_handlers[phase], reverse=True)
-        else:
-            plugins = all_plugins.itervalues()
-        return (p for p in plugins if p.name in self.config or p.builtin)
+            return (p for _, p in get_execution_plan(self.config)[phase])
+        disabled = disabled_builtins(self.config)
+        return (p for p in all_plugins.itervalues()
+                if p.name in self.config or (p.builtin and p.name not in disabled))
+
+    def get_priority(self, name, phase):
+        """
+        :return: Priority of the `phase` handler of plugin `name` in this task, as changed with `plugin_priority`.
+        """
+        priorities = self.config.get('plugin_priority') or {}
+        if name in priorities:
+            return priorities[name]
+        return get_plugin_by_name(name).phase_handlers[phase].priority
 
-    def __run_task_phase(self, phase):
+    def __run_task_phase(self, phase, skip_group=None):
         """Executes task phase, ie. call all enabled plugins on the task.
 
         Fires events:
@@ -353,6 +425,7 @@ class Task(object):
         * task.execute.after_plugin
 
         :param string phase: Name of the phase
+        :param string skip_group: Optional, plugins in this group are not run.
         """
         if phase not in phase_methods:
             raise Exception('%s is not a valid task phase' % phase)
@@ -366,7 +439,14 @@ class Task(object):
                 else:
                     log.warning('Task doesn\'t have any %s plugins, you should add (at least) one!' % phase)
 
-        for plugin in self.plugins(phase):
+        names = frozenset(self.config)
+        steps = get_execution_plan(self.config)[phase]
+        position = 0
+        while position < len(steps):
+            order, plugin = steps[position]
+            position += 1
+            if skip_group and skip_group in plugin.groups:
+                continue
             # Abort this phase if one of the plugins disables it
             if phase in self.disabled_phases:
                 return
@@ -397,6 +477,12 @@ class Task(object):
             if self._abort and phase != 'abort':
                 return
 
+            if self.config.viewkeys() != names:
+                # Configured plugins were changed (eg. by template), continue with the ones after this plugin
+                names = frozenset(self.config)
+                steps = [step for step in get_execution_plan(self.config)[phase] if step[0] > order]
+                position = 0
+
     def __run_plugin(self, plugin, phase, args=None, kwargs=None):
         """
         Execute given plugins phase method, with supplied args and kwargs.
@@ -508,15 +594,8 @@ class Task(object):
             else:
                 log.error('BUG: No prepared_config on rerun, please report.')
             self.config_modified = False
-        elif not last_hash:
-            self.config_modified = True
-            last_hash = TaskConfigHash(task=self.name, hash=config_hash)
-            self.session.add(last_hash)
-        elif last_hash.hash != config_hash:
-            self.config_modified = True
-            last_hash.hash = config_hash
         else:
-            self.config_modified = False
+            self.config_modified = not last_hash or last_hash.hash != config_hash
 
         # run phases
         try:
@@ -530,6 +609,12 @@ class Task(object):
                     continue
                 if phase == 'start' and self.is_rerun:
                     log.debug('skipping task_start during rerun')
+                elif phase == 'input' and self.is_rerun and self._input_snapshots is not None:
+                    log.debug('restoring %s entries from the first run instead of running inputs' %
+                              len(self._input_snapshots))
+                    self.all_entries.extend(self._restore_input())
+                    # Builtins like remember_rejected still need to see the restored entries
+                    self.__run_task_phase(phase, skip_group=self.reusable_input_group)
                 elif phase == 'exit' and self._rerun:
                     log.debug('not running task_exit yet because task will rerun')
                 else:
@@ -538,12 +623,16 @@ class Task(object):
                     if phase == 'start':
                         # Store a copy of the config state after start phase to restore for reruns
                         self.prepared_config = copy.deepcopy(self.config)
+                    elif phase == 'input' and not self.is_rerun:
+                        self._snapshot_input()
         except TaskAbort:
             # Roll back the session before calling abort handlers
             self.session.rollback()
+            self.simple_persistence.rollback()
             try:
                 self.__run_task_phase('abort')
                 # Commit just the abort handler changes if no exceptions are raised there
+                self.simple_persistence.flush()
                 self.session.commit()
             except TaskAbort:
                 log.exception('abort handlers aborted!')
@@ -551,7 +640,15 @@ class Task(object):
         else:
             for entry in self.all_entries:
                 entry.complete()
+            # The new config hash is only written now, so that the task does not hold a database write lock while
+            # running phases which don't otherwise write
+            if not self.is_rerun:
+                if not last_hash:
+                    self.session.add(TaskConfigHash(task=self.name, hash=config_hash))
+                elif last_hash.hash != config_hash:
+                    last_hash.hash = config_hash
             log.debug('committing session')
+            self.simple_persistence.flush()
             self.session.commit()
             fire_event('task.execute.completed', self)
         finally:
@@ -562,10 +659,45 @@ class Task(object):
         if self._rerun:
             log.info('Rerunning the task in case better resolution can be achieved.')
             self._rerun_count += 1
-            # TODO: Potential optimization is to take snapshots (maybe make the ones backlog uses built in instead of
-            # taking another one) after input and just inject the same entries for the rerun
             self.execute()
 
+    def _snapshot_input(self):
+        """
+        Keep the `after_input` snapshots of all entries, so reruns can restore them instead of running the inputs
+        again. Only done if all configured input plugins, including the ones under `inputs`, are in
+        :attr:`.reusable_input_group`.
+        """
+        self._input_snapshots = None
+        names = set(self.config)
+        for item in self.config.get('inputs') or []:
+            names.update(item)
+        for name in names:
+            p = all_plugins.get(name)
+            if p and 'input' in p.phase_handlers and not p.builtin and self.reusable_input_group not in p.groups:
+                log.debug('%s may produce different entries on reruns, inputs will be run again' % name)
+                return
+        snapshots = []
+        for entry in self.all_entries:
+            # backlog may have taken it already
+            if 'after_input' not in entry.snapshots:
+                entry.take_snapshot('after_input')
+            snapshot = entry.snapshots.get('after_input')
+            if not snapshot or snapshot.get('title') is None:
+                log.debug('Unable to snapshot `%s`, inputs will be run again on rerun' % entry['title'])
+                return
+            snapshots.append(snapshot)
+        self._input_snapshots = snapshots
+
+    def _restore_input(self):
+        """Create fresh entries from the snapshots taken by :meth:`_snapshot_input`."""
+        entries = []
+        for snapshot in self._input_snapshots:
+            entry = Entry(copy.deepcopy(snapshot))
+            entry.snapshots['after_input'] = snapshot
+            entry.task = self
+            entries.append(entry)
+        return entries
+
     def __eq__(self, other):
         if hasattr(other, 'name'):
             return self.name == other.name
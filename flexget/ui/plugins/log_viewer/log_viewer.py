@@ -1,14 +1,33 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
+import threading
+import time
 from datetime import datetime
+from Queue import Queue, Empty, Full
 from flask import render_template, Blueprint, jsonify, request
-from sqlalchemy import Column, DateTime, Integer, Unicode, String, asc, desc, or_, and_
+from sqlalchemy import Column, DateTime, Integer, Unicode, String, Index, asc, desc, or_, and_, select, func
 from flexget.ui.webui import register_plugin, db_session
 from flexget.manager import Base, Session
 from flexget.event import event
+from flexget.utils.sqlalchemy_utils import create_index
+
+log = logging.getLogger('log_viewer')
 
 log_viewer = Blueprint('log_viewier', __name__, url_prefix='/log')
 
+# Records are written in batches of at most this many
+BATCH_SIZE = 500
+# Seconds a record may wait for its batch to fill up
+FLUSH_INTERVAL = 2
+# Records waiting to be written, more are dropped instead of slowing down logging
+QUEUE_SIZE = 10000
+# Most records kept in the log table, older ones are removed
+MAX_RECORDS = 100000
+# Seconds between removing records over MAX_RECORDS
+PRUNE_INTERVAL = 60
+# Pages past the requested one whose records are counted
+COUNT_AHEAD = 10
+
 
 class LogEntry(Base):
     __tablename__ = 'log'
@@ -29,17 +48,93 @@ class LogEntry(Base):
         self.task = getattr(record, 'task', u'')
         self.execution = getattr(record, 'execution', '')
 
+Index('ix_log_feed_execution_created', LogEntry.task, LogEntry.execution, LogEntry.created)
+
 
 class DBLogHandler(logging.Handler):
+    """
+    Stores log records into the log table. Records are queued and written in batches by a background thread, so
+    logging does not wait for the database, and a run logging thousands of messages does not commit thousands of
+    times.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, queue_size=QUEUE_SIZE,
+                 max_records=MAX_RECORDS):
+        logging.Handler.__init__(self)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_records = max_records
+        self.queue = Queue(queue_size)
+        self.dropped = 0
+        self.next_prune = 0
+        self.writer = threading.Thread(target=self.write_loop, name='log_writer')
+        self.writer.daemon = True
+        self.writer.start()
 
     def emit(self, record):
+        if threading.current_thread() is self.writer:
+            # Records about writing records would keep the writer busy forever
+            return
+        try:
+            row = {'created': datetime.fromtimestamp(record.created),
+                   'logger': record.name,
+                   'levelno': record.levelno,
+                   'message': unicode(record.getMessage()),
+                   'feed': getattr(record, 'task', u''),
+                   'execution': getattr(record, 'execution', '')}
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self.queue.put_nowait(row)
+        except Full:
+            self.dropped += 1
+
+    def write_loop(self):
+        """Writes queued records until None is received from the queue."""
+        while True:
+            row = self.queue.get()
+            if row is None:
+                return
+            rows = [row]
+            deadline = time.time() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    row = self.queue.get(timeout=max(deadline - time.time(), 0))
+                except Empty:
+                    break
+                if row is None:
+                    self.write(rows)
+                    return
+                rows.append(row)
+            self.write(rows)
+
+    def write(self, rows):
+        table = LogEntry.__table__
         session = Session()
         try:
-            session.add(LogEntry(record))
+            if self.dropped:
+                log.warning('Log queue was full, %s records were not stored.' % self.dropped)
+                self.dropped = 0
+            session.execute(table.insert(), rows)
+            if time.time() >= self.next_prune:
+                # Remove everything older than the newest max_records records
+                cutoff = select([table.c.id]).order_by(table.c.id.desc()).offset(self.max_records).limit(1)
+                session.execute(table.delete().where(table.c.id <= cutoff.as_scalar()))
+                self.next_prune = time.time() + PRUNE_INTERVAL
             session.commit()
+        except Exception:
+            log.exception('Error storing log records.')
         finally:
             session.close()
 
+    def close(self):
+        """Writes the records still queued and stops the writer."""
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        logging.Handler.close(self)
+
 
 @log_viewer.context_processor
 def update_menus():
@@ -65,10 +160,12 @@ def get_logdata():
     task = request.args.get('task')
     execution = request.args.get('exec')
     page = int(request.args.get('page'))
-    limit = int(request.args.get('rows', 0))
-    sidx = request.args.get('sidx')
+    limit = int(request.args.get('rows', 0)) or 50
     sord = request.args.get('sord')
-    sord = desc if sord == 'desc' else asc
+    # Page loaded before this one, and the keys of its first and last rows
+    cursor_page = request.args.get('cursor_page', type=int)
+    first = request.args.get('first', type=int)
+    last = request.args.get('last', type=int)
     # Generate the filtered query
     query = db_session.query(LogEntry)
     if log_type == 'webui':
@@ -79,17 +176,43 @@ def get_logdata():
         query = query.filter(LogEntry.task == task)
     if execution:
         query = query.filter(LogEntry.execution == execution)
-    count = query.count()
+    # An exact count would go through every matching row on each request, only count as far as a few pages past
+    # the requested one. The grid learns about later pages as it gets closer to them.
+    counted = query.with_entities(LogEntry.id).limit(limit * (page + COUNT_AHEAD)).subquery()
+    count = db_session.query(func.count()).select_from(counted).scalar()
     # Use a trick to do ceiling division
-    total_pages = 0 - ((0 - count) / limit)
-    if page > total_pages:
-        page = total_pages
+    total_pages = 0 - ((0 - count) // limit)
+    page = max(1, min(page, total_pages))
     start = limit * page - limit
+    # Only date is sortable, keep the order stable for rows logged at the same time
+    descending = sord == 'desc'
+    if cursor_page and page > 1 and (page == cursor_page + 1 and last or page == cursor_page - 1 and first):
+        # Neighbouring page of the one loaded before, continue from its first or last row instead of skipping all
+        # rows before this page
+        start = 0
+        if page == cursor_page - 1:
+            key, descending = first, not descending
+        else:
+            key = last
+        created = select([LogEntry.created]).where(LogEntry.id == key).as_scalar()
+        if descending:
+            query = query.filter(or_(LogEntry.created < created, and_(LogEntry.created == created, LogEntry.id < key)))
+        else:
+            query = query.filter(or_(LogEntry.created > created, and_(LogEntry.created == created, LogEntry.id > key)))
+    if descending:
+        query = query.order_by(desc(LogEntry.created), desc(LogEntry.id))
+    else:
+        query = query.order_by(asc(LogEntry.created), asc(LogEntry.id))
+    result = query.offset(start).limit(limit).all()
+    if descending != (sord == 'desc'):
+        # Previous page was read in reverse order
+        result.reverse()
     json = {'total': total_pages,
             'page': page,
             'records': count,
+            'first': result[0].id if result else None,
+            'last': result[-1].id if result else None,
             'rows': []}
-    result = query.order_by(sord(sidx))[start:start + limit]
     for entry in result:
         json['rows'].append({'id': entry.id,
                              'created': entry.created.strftime('%Y-%m-%d %H:%M'),
@@ -100,11 +223,28 @@ def get_logdata():
     return jsonify(json)
 
 
+handler = None
+
+
 @event('webui.start')
 def initialize():
+    global handler
+    # Log tables created before the index was added do not have it yet
+    session = Session()
+    try:
+        create_index('log', session, 'feed', 'execution', 'created')
+    finally:
+        session.close()
     # Register db handler with base logger
     logger = logging.getLogger()
     handler = DBLogHandler()
     logger.addHandler(handler)
 
+
+@event('webui.stop')
+def finish():
+    if handler:
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+
 register_plugin(log_viewer, menu='Log', order=256)
@@ -10,7 +10,8 @@ from flexget.ui.webui import register_plugin, db_session, app
 from flexget.ui.utils import pretty_date
 
 try:
-    from flexget.plugins.filter.series import Series, Episode, Release, forget_series, forget_series_episode
+    from flexget.plugins.filter.series import (Series, Episode, Release, SeriesProgress, forget_series,
+                                               forget_series_episode)
 except ImportError:
     raise DependencyError(issued_by='ui.series', missing='series')
 
@@ -49,7 +50,9 @@ def index():
 @series_module.context_processor
 def series_list():
     """Add series list to all pages under series"""
-    return {'report': db_session.query(Series).order_by(asc(Series.name)).all()}
+    query = (db_session.query(Series).join(SeriesProgress, SeriesProgress.series_id == Series.id).
+             filter(SeriesProgress.last_seen != None))
+    return {'report': query.order_by(asc(Series.name)).all()}
 
 
 @series_module.route('/<name>')
@@ -2,18 +2,36 @@ from __future__ import unicode_literals, division, absolute_import
 import copy
 import logging
 import hashlib
+import pickle
+import sys
+import threading
+import zlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, DateTime, PickleType, Unicode, ForeignKey
-from sqlalchemy.orm import relation
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Unicode
 from flexget import db_schema
-from flexget.utils.database import safe_pickle_synonym
+from flexget.utils.database import only_builtins
+from flexget.utils.sqlalchemy_utils import drop_tables
 from flexget.utils.tools import parse_timedelta, TimedDict
-from flexget.entry import Entry
+from flexget.entry import Entry, LazyField, IMMUTABLE_TYPES
 from flexget.event import event
 from flexget.plugin import PluginError
+from flexget.plugins.cli.performance import increment_counter, set_counter
 
 log = logging.getLogger('input_cache')
-Base = db_schema.versioned_base('input_cache', 0)
+Base = db_schema.versioned_base('input_cache', 1)
+
+# Memory the in memory cache may use for entries, least recently used results are dropped when it's exceeded
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+
+@db_schema.upgrade('input_cache')
+def upgrade(ver, session):
+    if ver is None or ver == 0:
+        # Entries used to be stored in own table, it's only a cache so old data can just be removed
+        drop_tables(['input_cache_entry'], session)
+        raise db_schema.UpgradeImpossible
+    return ver
 
 
 class InputCache(Base):
@@ -24,19 +42,18 @@ class InputCache(Base):
     name = Column(Unicode)
     hash = Column(String)
     added = Column(DateTime, default=datetime.now)
+    _entries = Column('entries', LargeBinary)
 
-    entries = relation('InputCacheEntry', backref='cache', cascade='all, delete, delete-orphan')
-
-
-class InputCacheEntry(Base):
-
-    __tablename__ = 'input_cache_entry'
-
-    id = Column(Integer, primary_key=True)
-    _entry = Column('entry', PickleType)
-    entry = safe_pickle_synonym('_entry')
+    @property
+    def entries(self):
+        """List of entry fields, stored as one compressed pickle."""
+        if not self._entries:
+            return []
+        return pickle.loads(zlib.decompress(self._entries))
 
-    cache_id = Column(Integer, ForeignKey('input_cache.id'), nullable=False)
+    @entries.setter
+    def entries(self, entries):
+        self._entries = zlib.compress(pickle.dumps(only_builtins(list(entries)), pickle.HIGHEST_PROTOCOL))
 
 
 @event('manager.db_cleanup')
@@ -47,6 +64,108 @@ def db_cleanup(session):
         log.verbose('Removed %s old input caches.' % result)
 
 
+def freeze_entry(entry):
+    """
+    Copies `entry` fields for the in memory cache. Immutable values are shared with the entry, lazy fields are kept.
+
+    :raises TypeError: If a field value cannot be copied
+    """
+    fields = {}
+    for key, value in entry.iteritems():
+        if isinstance(value, LazyField):
+            lazy = LazyField(None, key, None)
+            lazy.funcs = list(value.funcs)
+            value = lazy
+        elif type(value) not in IMMUTABLE_TYPES:
+            value = copy.deepcopy(value)
+        fields[key] = value
+    return fields
+
+
+def thaw_entry(fields):
+    """Creates a new Entry from fields of :func:`freeze_entry`. Only mutable values are copied."""
+    entry = Entry()
+    for key, value in fields.iteritems():
+        if isinstance(value, LazyField):
+            lazy = LazyField(entry, key, None)
+            lazy.funcs = list(value.funcs)
+            value = lazy
+        elif type(value) not in IMMUTABLE_TYPES:
+            value = copy.deepcopy(value)
+        # Values were validated when they were set into the original entry
+        dict.__setitem__(entry, key, value)
+    return entry
+
+
+def estimate_size(value):
+    """Rough estimate of memory used by `value` and the containers and values within it, in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.iteritems())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class InputCacheStore(TimedDict):
+    """
+    TimedDict for lists of frozen entries, which also drops the least recently used lists when all of them together
+    would use more than `max_bytes` of memory.
+    """
+
+    def __init__(self, cache_time='5 minutes', max_bytes=MEMORY_CACHE_BYTES):
+        super(InputCacheStore, self).__init__(cache_time)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._store = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            add_time, value = self._store[key]
+            # Prune data and raise KeyError when expired
+            if add_time < datetime.now() - self.cache_time:
+                self._remove(key)
+                raise KeyError(key, 'cache time expired')
+            # Move the key to the most recently used end
+            self._store[key] = self._store.pop(key)
+            return value
+
+    def __setitem__(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            if size > self.max_bytes:
+                log.warning('Not caching %s, it would use more memory than the whole cache may' % key)
+                return
+            self._store[key] = (datetime.now(), value)
+            self._sizes[key] = size
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._store))
+                log.debug('dropping %s from cache to free memory' % oldest)
+                self._remove(oldest)
+                increment_counter('input_cache evicted')
+            set_counter('input_cache bytes', self.bytes)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __iter__(self):
+        # Skip expired items, without changing the order of use like our getitem would
+        with self._lock:
+            expires = datetime.now() - self.cache_time
+            return iter([key for key, (add_time, value) in self._store.iteritems() if add_time >= expires])
+
+    def _remove(self, key):
+        del self._store[key]
+        self.bytes -= self._sizes.pop(key)
+        set_counter('input_cache bytes', self.bytes)
+
+
 def config_hash(config):
     """
     :param dict config: Configuration
@@ -72,7 +191,7 @@ class cached(object):
     .. note:: Configuration assumptions may make this unusable in some (future) inputs
     """
 
-    cache = TimedDict(cache_time='5 minutes')
+    cache = InputCacheStore(cache_time='5 minutes')
 
     def __init__(self, name, persist=None):
         # Cast name to unicode to prevent sqlalchemy warnings when filtering
@@ -105,17 +224,17 @@ class cached(object):
             cache_name = self.name + '_' + hash
             log.debug('cache name: %s (has: %s)' % (cache_name, ', '.join(self.cache.keys())))
 
-            if cache_name in self.cache:
+            frozen = self.cache.get(cache_name)
+            if frozen is not None:
                 # return from the cache
                 log.trace('cache hit')
-                entries = []
-                for entry in self.cache[cache_name]:
-                    fresh = copy.deepcopy(entry)
-                    entries.append(fresh)
+                increment_counter('input_cache hit')
+                entries = [thaw_entry(fields) for fields in frozen]
                 if entries:
                     log.verbose('Restored %s entries from cache' % len(entries))
                 return entries
             else:
+                increment_counter('input_cache miss')
                 if self.persist and not task.options.nocache:
                     # Check database cache
                     db_cache = task.session.query(InputCache).filter(InputCache.name == self.name).\
@@ -123,10 +242,10 @@ class cached(object):
                         filter(InputCache.added > datetime.now() - self.persist).\
                         first()
                     if db_cache:
-                        entries = [Entry(e.entry) for e in db_cache.entries]
+                        entries = [Entry(fields) for fields in db_cache.entries]
                         log.verbose('Restored %s entries from db cache' % len(entries))
                         # Store to in memory cache
-                        self.cache[cache_name] = copy.deepcopy(entries)
+                        self.cache[cache_name] = [freeze_entry(entry) for entry in entries]
                         return entries
 
                 # Nothing was restored from db or memory cache, run the function
@@ -139,13 +258,14 @@ class cached(object):
                     if self.persist and not task.options.nocache:
                         db_cache = task.session.query(InputCache).filter(InputCache.name == self.name).\
                             filter(InputCache.hash == hash).first()
-                        if db_cache and db_cache.entries:
+                        entries = db_cache and db_cache.entries
+                        if entries:
                             log.error('There was an error during %s input (%s), using cache instead.' %
                                     (self.name, e))
-                            entries = [Entry(e.entry) for e in db_cache.entries]
+                            entries = [Entry(fields) for fields in entries]
                             log.verbose('Restored %s entries from db cache' % len(entries))
                             # Store to in memory cache
-                            self.cache[cache_name] = copy.deepcopy(entries)
+                            self.cache[cache_name] = [freeze_entry(entry) for entry in entries]
                             return entries
                     # If there was nothing in the db cache, re-raise the error.
                     raise
@@ -157,7 +277,7 @@ class cached(object):
                 # store results to cache
                 log.debug('storing to cache %s %s entries' % (cache_name, len(response)))
                 try:
-                    self.cache[cache_name] = copy.deepcopy(response)
+                    self.cache[cache_name] = [freeze_entry(entry) for entry in response]
                 except TypeError:
                     # might be caused because of backlog restoring some idiotic stuff, so not neccessarily a bug
                     log.critical('Unable to save task content into cache, if problem persists longer than a day please report this as a bug')
@@ -168,7 +288,7 @@ class cached(object):
                         filter(InputCache.hash == hash).first()
                     if not db_cache:
                         db_cache = InputCache(name=self.name, hash=hash)
-                    db_cache.entries = [InputCacheEntry(entry=e) for e in response]
+                    db_cache.entries = response
                     db_cache.added = datetime.now()
                     task.session.merge(db_cache)
                 return response
@@ -0,0 +1,98 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+import sys
+import threading
+from collections import defaultdict
+
+from flexget import logger
+
+log = logging.getLogger('utils.pool')
+
+
+def run_jobs(func, jobs, workers, limits=(), task=None, name='worker'):
+    """
+    Calls `func` with each of `jobs` from a pool of at most `workers` threads, and returns when all are done.
+
+    Jobs are started in order, skipping over jobs which would go over one of the `limits` until a running job of the
+    same key finishes. With less than two workers or jobs everything is run in the calling thread, as is when no
+    thread could be started.
+
+    :param func: Function called with each job.
+    :param list jobs: Jobs to run.
+    :param int workers: Most jobs run at the same time.
+    :param limits: List of `(key, limit)` pairs, at most `limit` jobs with the same `key(job)` run at the same time.
+      Jobs whose key is None, and limits which are None, are not limited.
+    :param task: Task the jobs are run for, worker threads log for it.
+    :param name: Prefix of the worker thread names.
+    :raises: First exception raised by `func`, in job order, once all jobs have finished.
+    """
+    jobs = list(jobs)
+    limits = [(key, limit) for key, limit in limits if limit is not None]
+    workers = min(workers, len(jobs))
+    if workers < 2:
+        for job in jobs:
+            func(job)
+        return
+
+    pending = list(enumerate(jobs))
+    active = [defaultdict(int) for _ in limits]
+    errors = [None] * len(jobs)
+    condition = threading.Condition()
+
+    def startable(job):
+        for (key, limit), counts in zip(limits, active):
+            value = key(job)
+            if value is not None and counts[value] >= limit:
+                return False
+        return True
+
+    def count(job, change):
+        for (key, limit), counts in zip(limits, active):
+            counts[key(job)] += change
+
+    def next_job():
+        """Hands out the first pending job within the limits and its index, None when all are taken."""
+        with condition:
+            while pending:
+                for item in pending:
+                    if startable(item[1]):
+                        pending.remove(item)
+                        count(item[1], 1)
+                        return item
+                condition.wait()
+
+    def work():
+        if task:
+            logger.set_task(task.name)
+        while True:
+            item = next_job()
+            if item is None:
+                return
+            index, job = item
+            try:
+                func(job)
+            except Exception:
+                errors[index] = sys.exc_info()
+            finally:
+                with condition:
+                    count(job, -1)
+                    condition.notify_all()
+
+    log.debug('Running %s jobs with %s %s threads' % (len(jobs), workers, name))
+    threads = []
+    for i in range(workers):
+        thread = threading.Thread(target=work, name='%s-%d' % (name, i + 1))
+        thread.daemon = True
+        try:
+            thread.start()
+        except threading.ThreadError:
+            log.debug('Reached max threads, running with %s threads.' % len(threads))
+            break
+        threads.append(thread)
+    if not threads:
+        work()
+    for thread in threads:
+        thread.join()
+    for exc_info in errors:
+        if exc_info:
+            raise exc_info[0], exc_info[1], exc_info[2]
@@ -3,8 +3,13 @@ import re
 import copy
 import logging
 
+from flexget.utils.tools import LRUDict
+
 log = logging.getLogger('utils.qualities')
 
+# How many parsed quality texts are remembered
+PARSE_CACHE_SIZE = 2000
+
 
 class QualityComponent(object):
     """"""
@@ -29,6 +34,7 @@ class QualityComponent(object):
         # compile regexp
         if regexp is None:
             regexp = re.escape(name)
+        self.pattern = regexp
         self.regexp = re.compile('(?<![^\W_])(' + regexp + ')(?![^\W_])', re.IGNORECASE)
 
     def matches(self, text):
@@ -190,6 +196,71 @@ def all_components():
     return _registry.itervalues()
 
 
+def _any_of(items):
+    """Compiles one regexp that matches wherever any of the `items` would match."""
+    return re.compile('(?<![^\W_])(?:' + '|'.join(item.pattern for item in items) + ')(?![^\W_])', re.IGNORECASE)
+
+_scanners = [(items[0].type, items, _any_of(items)) for items in (_resolutions, _sources, _codecs, _audios)]
+
+_parse_cache = LRUDict(PARSE_CACHE_SIZE)
+
+
+def _find_best(qlist, text):
+    """
+    Finds the highest matching quality component from `qlist`.
+
+    :returns: tuple (component or None, remaining text without quality data)
+    """
+    result = None
+    for item in qlist:
+        match = item.matches(text)
+        if match[0]:
+            result = item
+            text = match[1]
+            if item.modifier is not None:
+                # If this item has a modifier, do not proceed to check higher qualities in the list
+                break
+    return result, text
+
+
+def _scan(text):
+    """
+    Finds quality components from `text`.
+
+    :returns: tuple (dict of components by type, remaining text without quality data)
+    """
+    found = {}
+    for type, items, any_item in _scanners:
+        result = None
+        # One search tells whether any component of this type is present, most titles lack some of them
+        if any_item.search(text):
+            result, text = _find_best(items, text)
+        found[type] = result or _UNKNOWNS[type]
+    # If any of the matched components have defaults, set them now.
+    for component in [found[type] for type, items, any_item in _scanners]:
+        for default in component.defaults:
+            default = _registry[default]
+            if not found[default.type]:
+                found[default.type] = default
+    return found, text
+
+
+def _parse(text):
+    """
+    Returns a parsed :class:`Quality` for `text`. The same texts are parsed over and over again while filtering,
+    so results are remembered. The returned instance is shared, it must not be modified or handed out.
+    """
+    quality = _parse_cache.get(text)
+    if quality is None:
+        found, clean_text = _scan(text)
+        quality = Quality.__new__(Quality)
+        quality.__dict__.update(found, text=text, clean_text=clean_text)
+        # Calculate comparator now, so copies do not need to
+        quality._comparator
+        _parse_cache[text] = quality
+    return quality
+
+
 class Quality(object):
     """Parses and stores the quality of an entry in the four component categories."""
 
@@ -207,36 +278,18 @@ class Quality(object):
             self.codec = _UNKNOWNS['codec']
             self.audio = _UNKNOWNS['audio']
 
+    def __setattr__(self, name, value):
+        if name in _UNKNOWNS:
+            # Components changed, comparator must be calculated again
+            object.__setattr__(self, '_key', None)
+        object.__setattr__(self, name, value)
+
     def parse(self, text):
         """Parses a string to determine the quality in the four component categories.
 
         :param text: The string to parse
         """
-        self.text = text
-        self.clean_text = text
-        self.resolution = self._find_best(_resolutions, _UNKNOWNS['resolution'])
-        self.source = self._find_best(_sources, _UNKNOWNS['source'])
-        self.codec = self._find_best(_codecs, _UNKNOWNS['codec'])
-        self.audio = self._find_best(_audios, _UNKNOWNS['audio'])
-        # If any of the matched components have defaults, set them now.
-        for component in self.components:
-            for default in component.defaults:
-                default = _registry[default]
-                if not getattr(self, default.type):
-                    setattr(self, default.type, default)
-
-    def _find_best(self, qlist, default=None):
-        """Finds the highest matching quality component from `qlist`"""
-        result = None
-        for item in qlist:
-            match = item.matches(self.clean_text)
-            if match[0]:
-                result = item
-                self.clean_text = match[1]
-                if item.modifier is not None:
-                    # If this item has a modifier, do not proceed to check higher qualities in the list
-                    break
-        return result or default
+        self.__dict__.update(_parse(text).__dict__)
 
     @property
     def name(self):
@@ -249,12 +302,19 @@ class Quality(object):
 
     @property
     def _comparator(self):
-        modifier = sum(c.modifier for c in self.components if c.modifier)
-        return [modifier] + self.components
+        """Integer that sorts like [modifier sum, resolution, source, codec, audio] values would."""
+        key = self.__dict__.get('_key')
+        if key is None:
+            modifier = sum(c.modifier for c in self.components if c.modifier)
+            key = modifier + 256
+            for component in self.components:
+                key = (key << 8) | component.value
+            object.__setattr__(self, '_key', key)
+        return key
 
     def __contains__(self, other):
         if isinstance(other, basestring):
-            other = Quality(other)
+            other = _parse(other)
         if not other or not self:
             return False
         for cat in ('resolution', 'source', 'audio', 'codec'):
@@ -264,11 +324,11 @@ class Quality(object):
         return True
 
     def __nonzero__(self):
-        return any(self._comparator)
+        return self._comparator != _UNKNOWN_KEY
 
     def __eq__(self, other):
         if isinstance(other, basestring):
-            other = Quality(other)
+            other = _parse(other)
             if not other:
                 raise TypeError('`%s` does not appear to be a valid quality string.' % other.text)
         if not isinstance(other, Quality):
@@ -282,7 +342,7 @@ class Quality(object):
 
     def __lt__(self, other):
         if isinstance(other, basestring):
-            other = Quality(other)
+            other = _parse(other)
             if not other:
                 raise TypeError('`%s` does not appear to be a valid quality string.' % other.text)
         if not isinstance(other, Quality):
@@ -310,6 +370,9 @@ class Quality(object):
         return hash(self.name)
 
 
+_UNKNOWN_KEY = Quality()._comparator
+
+
 def get(quality_name):
     """Returns a quality object based on canonical quality name."""
 
@@ -449,7 +512,7 @@ class Requirements(object):
         :returns: True if given quality passes all component requirements.
         """
         if isinstance(qual, basestring):
-            qual = Quality(qual)
+            qual = _parse(qual)
             if not qual:
                 raise TypeError('`%s` does not appear to be a valid quality string.' % qual.text)
         for r_component, q_component in zip(self.components, qual.components):
@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 import urllib2
 import time
 import logging
+import threading
 from datetime import timedelta, datetime
 from urlparse import urlparse
 import requests
@@ -29,7 +30,7 @@ def is_unresponsive(url):
     :rtype: bool
     """
     host = urlparse(url).hostname
-    if host in unresponsive_hosts and unresponsive_hosts[host] + WAIT_TIME < datetime.now():
+    if host in unresponsive_hosts and unresponsive_hosts[host] + WAIT_TIME > datetime.now():
         return True
     return False
 
@@ -83,6 +84,8 @@ class Session(requests.Session):
         self.adapters['http://'].max_retries = max_retries
         # Stores min intervals between requests for certain sites
         self.domain_delay = {}
+        # Guards domain_delay bookkeeping when the session is shared between threads
+        self._delay_lock = threading.Lock()
 
     def add_cookiejar(self, cookiejar):
         """
@@ -102,6 +105,27 @@ class Session(requests.Session):
         """
         self.domain_delay[domain] = {'delay': parse_timedelta(delay)}
 
+    def _reserve_request(self, url):
+        """
+        Reserves the next allowed request slot for the domain of `url`, so concurrent requests through this
+        session still honor `domain_delay`.
+
+        :return: Seconds to wait before the request may be made.
+        """
+        with self._delay_lock:
+            for domain, domain_dict in self.domain_delay.iteritems():
+                if domain in url:
+                    now = datetime.now()
+                    start = max(now, domain_dict.get('next_req') or now)
+                    # Record the next allowable request time for this domain
+                    domain_dict['next_req'] = start + domain_dict['delay']
+                    wait_time = start - now
+                    seconds = wait_time.seconds + (wait_time.microseconds / 1000000.0)
+                    if seconds:
+                        log.debug('Waiting %.2f seconds until next request to %s' % (seconds, domain))
+                    return seconds
+        return 0
+
     def request(self, method, url, *args, **kwargs):
         """
         Does a request, but raises Timeout immediately if site is known to timeout, and records sites that timeout.
@@ -113,18 +137,10 @@ class Session(requests.Session):
             raise requests.Timeout('Requests to this site are known to timeout.')
 
         # Check if we need to add a delay before request to this site
-        for domain, domain_dict in self.domain_delay.iteritems():
-            if domain in url:
-                next_req = domain_dict.get('next_req')
-                if next_req and datetime.now() < next_req:
-                    wait_time = next_req - datetime.now()
-                    seconds = wait_time.seconds + (wait_time.microseconds / 1000000.0)
-                    log.debug('Waiting %.2f seconds until next request to %s' % (seconds, domain))
-                    # Sleep until it is time for the next request
-                    time.sleep(seconds)
-                # Record the next allowable request time for this domain
-                domain_dict['next_req'] = datetime.now() + domain_dict['delay']
-                break
+        wait_time = self._reserve_request(url)
+        if wait_time:
+            # Sleep until it is time for the next request
+            time.sleep(wait_time)
 
         kwargs.setdefault('timeout', self.timeout)
         raise_status = kwargs.pop('raise_status', True)
@@ -22,6 +22,9 @@ from flexget.utils.database import safe_pickle_synonym
 from flexget.utils.sqlalchemy_utils import table_schema, create_index
 
 log = logging.getLogger('util.simple_persistence')
+
+# Marks deleted keys in CachedPersistence
+_DELETED = object()
 Base = db_schema.versioned_base('simple_persistence', 2)
 
 
@@ -136,10 +139,96 @@ class SimplePersistence(MutableMapping):
                 filter(SimpleKeyValue.plugin == self.plugin).count()
 
 
-class SimpleTaskPersistence(SimplePersistence):
+class CachedPersistence(SimplePersistence):
+    """
+    SimplePersistence which loads all keys of a plugin with one query on first access and keeps them in memory.
+
+    Changes are written immediately, unless `write_back` is set. Then they are kept in memory until :meth:`flush`
+    writes all of them at once, or :meth:`rollback` discards them.
+    """
+
+    def __init__(self, plugin, session=None, write_back=False):
+        super(CachedPersistence, self).__init__(plugin, session=session)
+        self.write_back = write_back
+        self._cache = {}
+        self._dirty = {}
+
+    @property
+    def _values(self):
+        """All values of the current plugin, by key."""
+        plugin = self.plugin
+        if plugin not in self._cache:
+            with self.session_manager() as session:
+                query = session.query(SimpleKeyValue).filter(SimpleKeyValue.task == self.taskname).\
+                    filter(SimpleKeyValue.plugin == plugin)
+                self._cache[plugin] = dict((skv.key, skv.value) for skv in query)
+            log.debug('loaded %s keys of %s' % (len(self._cache[plugin]), plugin))
+        return self._cache[plugin]
+
+    def _change(self, key, value):
+        self._dirty.setdefault(self.plugin, {})[key] = value
+        if not self.write_back:
+            self.flush()
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+        self._change(key, value)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            raise KeyError('%s is not contained in the simple_persistence table.' % key)
+
+    def __delitem__(self, key):
+        self._values.pop(key, None)
+        self._change(key, _DELETED)
+
+    def __iter__(self):
+        return iter(list(self._values))
+
+    def __len__(self):
+        return len(self._values)
+
+    def flush(self):
+        """Writes all changed keys to the database."""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        with self.session_manager() as session:
+            for plugin, changes in dirty.iteritems():
+                existing = dict((skv.key, skv) for skv in session.query(SimpleKeyValue).
+                                filter(SimpleKeyValue.task == self.taskname).filter(SimpleKeyValue.plugin == plugin).
+                                filter(SimpleKeyValue.key.in_(changes.keys())))
+                for key, value in changes.iteritems():
+                    skv = existing.get(key)
+                    if value is _DELETED:
+                        if skv:
+                            session.delete(skv)
+                    elif skv:
+                        log.debug('updating key %s value %s' % (key, repr(value)))
+                        skv.value = value
+                    else:
+                        log.debug('adding key %s value %s' % (key, repr(value)))
+                        session.add(SimpleKeyValue(self.taskname, plugin, key, value))
+
+    def rollback(self):
+        """Discards changes which are not yet written, values are loaded again on next access."""
+        self._dirty = {}
+        self._cache = {}
+
+
+class SimpleTaskPersistence(CachedPersistence):
+    """
+    Persistence of the task's plugins. Changes are written in the task session when :class:`~flexget.task.Task`
+    commits it, and discarded when the task aborts.
+    """
 
     def __init__(self, task):
         self.task = task
+        self.write_back = True
+        self._cache = {}
+        self._dirty = {}
 
     @property
     def plugin(self):
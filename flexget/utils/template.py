@@ -3,7 +3,6 @@ import logging
 import os
 import re
 import sys
-from copy import copy
 from datetime import datetime, date, time
 import locale
 from email.utils import parsedate
@@ -15,12 +14,18 @@ from jinja2 import (Environment, StrictUndefined, ChoiceLoader,
 
 from flexget.event import event
 from flexget.utils.pathscrub import pathscrub
+from flexget.utils.tools import LayeredDict, LRUDict
 
 log = logging.getLogger('utils.template')
 
 # The environment will be created after the manager has started
 environment = None
 
+# How many compiled template strings are remembered
+TEMPLATE_CACHE_SIZE = 500
+# Compiled templates by source, plain strings without any jinja syntax are stored as they render
+_template_cache = LRUDict(TEMPLATE_CACHE_SIZE)
+
 
 class RenderError(Exception):
     """Error raised when there is a problem with jinja rendering."""
@@ -122,6 +127,8 @@ def make_environment(manager):
     for name, filt in globals().items():
         if name.startswith('filter_'):
             environment.filters[name.split('_', 1)[1]] = filt
+    # Templates compiled by the previous environment must not be used anymore
+    _template_cache.clear()
 
 
 # TODO: list_templates function
@@ -147,6 +154,27 @@ def get_template(templatename, pluginname=None):
         raise ValueError('Template not found: %s (%s)' % (templatename, pluginname))
 
 
+def compile_template(template_string):
+    """
+    Returns a compiled Template for `template_string`. Compiled templates are remembered, as the same ones are
+    rendered for every entry on every run.
+
+    :return: Template, or the rendered text itself if `template_string` does not contain any jinja syntax.
+    :raises TemplateSyntaxError: If there is an error in template syntax.
+    """
+    template = _template_cache.get(template_string)
+    if template is None:
+        if '{' in template_string or '\r' in template_string:
+            template = environment.from_string(template_string)
+        else:
+            # Nothing to render, except jinja strips a single trailing newline
+            template = unicode(template_string)
+            if template.endswith('\n'):
+                template = template[:-1]
+        _template_cache[template_string] = template
+    return template
+
+
 def render(template, context):
     """
     Renders a Template with `context` as its context.
@@ -156,7 +184,9 @@ def render(template, context):
     :return: The rendered template text.
     """
     if isinstance(template, basestring):
-        template = environment.from_string(template)
+        template = compile_template(template)
+        if isinstance(template, unicode):
+            return template
     try:
         result = template.render(context)
     except Exception as e:
@@ -171,17 +201,18 @@ def render_from_entry(template_string, entry):
     # If a plain string was passed, turn it into a Template
     if isinstance(template_string, basestring):
         try:
-            template = environment.from_string(template_string)
+            template = compile_template(template_string)
         except TemplateSyntaxError as e:
             raise RenderError('Error in template syntax: ' + e.message)
+        if isinstance(template, unicode):
+            return template
     else:
         # We can also support an actual Template being passed in
         template = template_string
-    # Make a copy of the Entry so we can add some more fields
-    variables = copy(entry)
-    variables['now'] = datetime.now()
+    # Add some more fields on top of the Entry, without copying it
+    variables = LayeredDict(entry, {'now': datetime.now()})
     # Add task name to variables, usually it's there because metainfo_task plugin, but not always
-    if 'task' not in variables and hasattr(entry, 'task'):
+    if 'task' not in entry and getattr(entry, 'task', None):
         variables['task'] = entry.task.name
     # We use the lower level render function, so that our Entry is not cast into a dict (and lazy loading lost)
     try:
@@ -207,7 +238,9 @@ def render_from_task(template, task):
     :return: The rendered template text.
     """
     if isinstance(template, basestring):
-        template = environment.from_string(template)
+        template = compile_template(template)
+        if isinstance(template, unicode):
+            return template
     try:
         result = template.render({'task': task})
     except Exception as e:
@@ -1,4 +1,5 @@
 from __future__ import unicode_literals, division, absolute_import
+import copy
 import logging
 import re
 from datetime import datetime, timedelta
@@ -7,7 +8,7 @@ from dateutil.parser import parse as parsedate
 
 from flexget.utils.titles.parser import TitleParser, ParseWarning
 from flexget.utils import qualities
-from flexget.utils.tools import ReList
+from flexget.utils.tools import ReList, LRUDict
 
 log = logging.getLogger('seriesparser')
 
@@ -175,6 +176,21 @@ class SeriesParser(TitleParser):
         res = '^' + ignore + blank + '*' + '(' + res + ')(?:\\b|_)' + blank + '*'
         return res
 
+    def generate_name_regexps(self):
+        """Generates name regexps from name and alternate names."""
+        self.name_regexps = ReList(self.name_to_re(name) for name in [self.name] + self.alternate_names)
+        # With auto regex generation, the first regex group captures the name
+        self.re_from_name = True
+
+    def compile(self):
+        """Generates name regexps if needed and compiles all regexps, so that parsing does not need to."""
+        if not self.name_regexps:
+            self.generate_name_regexps()
+        for regexps in (self.name_regexps, self.ep_regexps, self.date_regexps, self.sequence_regexps,
+                        self.id_regexps, self.unwanted_ep_regexps, self.unwanted_id_regexps):
+            for _ in regexps:
+                pass
+
     def parse(self, data=None, field=None, quality=None):
         # Clear the output variables before parsing
         self._reset()
@@ -200,10 +216,7 @@ class SeriesParser(TitleParser):
 
         # regexp name matching
         if not self.name_regexps:
-            # if we don't have name_regexps, generate one from the name
-            self.name_regexps = ReList(self.name_to_re(name) for name in [self.name] + self.alternate_names)
-            # With auto regex generation, the first regex group captures the name
-            self.re_from_name = True
+            self.generate_name_regexps()
         # try all specified regexps on this data
         for name_re in self.name_regexps:
             match = re.search(name_re, self.data)
@@ -584,3 +597,90 @@ class SeriesParser(TitleParser):
 
     def __eq__(self, other):
         return self is other
+
+
+# Compiled parsers by their init arguments, shared by the whole process
+_parser_cache = LRUDict(1000)
+
+
+def get_parser(**kwargs):
+    """
+    Returns a new :class:`SeriesParser` for given init arguments. Parsers are copied from a cached template which
+    has all its regexps compiled, so the regexps are only generated and compiled once per series configuration.
+
+    :param kwargs: Same as for :class:`SeriesParser`
+    """
+    key = tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                       for name, value in kwargs.iteritems()))
+    template = _parser_cache.get(key)
+    if template is None:
+        template = SeriesParser(**kwargs)
+        template.compile()
+        _parser_cache[key] = template
+    return copy.copy(template)
+
+
+class SeriesNameIndex(object):
+    """
+    Index for quickly finding which series a title could belong to.
+
+    A name regexp generated by :meth:`SeriesParser.name_to_re` is anchored to the start of the data, optionally
+    after one of the :attr:`SeriesParser.ignore_prefixes`, and begins with the first word of the name as literal
+    text. Titles are looked up by the prefixes of their first word, so only the candidate series need to run their
+    full parser. Series with custom name regexps can match anywhere and are candidates for every title.
+    """
+
+    # Same definitions of word and blank as used by SeriesParser.name_to_re
+    word_re = re.compile(r'(?:[^\W_]|&)+', re.UNICODE)
+    blank_re = re.compile(r'(?:[^\w&]|_)*', re.UNICODE)
+    prefix_re = re.compile('(?:%s)' % '|'.join(SeriesParser.ignore_prefixes), re.IGNORECASE | re.UNICODE)
+
+    def __init__(self):
+        self.words = {}
+        self.always = set()
+
+    def add(self, key, names, name_regexps=None):
+        """
+        :param key: Returned from :meth:`candidates` for titles this series could match, eg. the series name.
+        :param list names: Series name and alternate names.
+        :param list name_regexps: Custom name regexps, if given series is a candidate for all titles.
+        """
+        if name_regexps:
+            self.always.add(key)
+            return
+        for name in names:
+            word = self.first_word(name)
+            if not word:
+                # generated regexp would not require any text
+                self.always.add(key)
+                return
+            self.words.setdefault(word, set()).add(key)
+
+    def first_word(self, name):
+        """Returns the lowercase first word the regexp generated from `name` would require."""
+        if name.endswith(')'):
+            p_start = name.rfind('(')
+            if p_start != -1:
+                name = name[:p_start - 1]
+        match = self.word_re.search(name)
+        if match:
+            return match.group().lower()
+
+    def candidates(self, data):
+        """Returns set of keys for series whose name regexps might match `data`."""
+        found = set(self.always)
+        starts = [0]
+        prefix = self.prefix_re.match(data)
+        if prefix:
+            starts.append(prefix.end())
+        for start in starts:
+            start = self.blank_re.match(data, start).end()
+            word = self.word_re.match(data, start)
+            if not word:
+                continue
+            word = word.group().lower()
+            for end in xrange(1, len(word) + 1):
+                keys = self.words.get(word[:end])
+                if keys:
+                    found.update(keys)
+        return found
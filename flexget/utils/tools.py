@@ -9,7 +9,8 @@ import time
 import re
 import sys
 import locale
-from collections import MutableMapping
+import threading
+from collections import Mapping, MutableMapping, OrderedDict
 from urlparse import urlparse
 from htmlentitydefs import name2codepoint
 from datetime import timedelta, datetime
@@ -337,6 +338,11 @@ def multiply_timedelta(interval, number):
     total_seconds = interval.seconds + interval.days * 24 * 3600
     return timedelta(seconds=total_seconds*number)
 
+def chunked(seq, limit=900):
+    """Divides `seq` into lists small enough for sqlite to handle in one IN query. (<1000 variables)"""
+    for i in xrange(0, len(seq), limit):
+        yield seq[i:i + limit]
+
 if os.name == 'posix':
     def pid_exists(pid):
         """Check whether pid exists in the current process table."""
@@ -401,3 +407,72 @@ class TimedDict(MutableMapping):
 
     def __repr__(self):
         return '%s(%r)' % (self.__class__.__name__, dict(zip(self._store, (v[1] for v in self._store.values()))))
+
+
+class LRUDict(MutableMapping):
+    """Acts like a normal dict, but only keeps :max_size: most recently used keys."""
+    def __init__(self, max_size=100):
+        self.max_size = max_size
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            # Move the key to the most recently used end
+            value = self._store.pop(key)
+            self._store[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._store.pop(key, None)
+            self._store[key] = value
+            while len(self._store) > self.max_size:
+                self._store.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._store[key]
+
+    def __iter__(self):
+        return iter(self._store.keys())
+
+    def __len__(self):
+        return len(self._store)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict(self._store))
+
+
+class LayeredDict(Mapping):
+    """
+    Read-only view of `base` with the keys of `layer` on top of it. Assignments only go to `layer`. Avoids copying
+    `base`, and lookups go through its own __getitem__ and __contains__, so lazy fields of an Entry keep working.
+    """
+    def __init__(self, base, layer=None):
+        self.base = base
+        self.layer = {} if layer is None else layer
+
+    def __getitem__(self, key):
+        if key in self.layer:
+            return self.layer[key]
+        return self.base[key]
+
+    def __setitem__(self, key, value):
+        self.layer[key] = value
+
+    def __contains__(self, key):
+        return key in self.layer or key in self.base
+
+    def __iter__(self):
+        return iter(set(self.layer).union(self.base))
+
+    def __len__(self):
+        return len(set(self.layer).union(self.base))
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (self.__class__.__name__, self.base, self.layer)
@@ -38,7 +38,8 @@ def setup_once():
     if not plugins_loaded:
         flexget.logger.initialize(True)
         setup_logging_level()
-        load_plugins()
+        # Set FLEXGET_TEST_LAZY_PLUGINS to load plugins through the plugin manifest, like the CLI does
+        load_plugins(lazy=bool(os.environ.get('FLEXGET_TEST_LAZY_PLUGINS')))
         # store options for MockManager
         test_arguments = get_parser().parse_args(['execute'])
         plugins_loaded = True
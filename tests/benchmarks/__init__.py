@@ -0,0 +1,59 @@
+"""
+Benchmarks for performance sensitive code paths.
+
+These are not collected by nose, run them directly from the source root, eg.::
+
+    python -m tests.benchmarks.bench_seen
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import logging
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from tests import setup_once, MockManager
+
+
+class QueryCounter(object):
+    """Counts the statements executed on `engine` while used as a context manager."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+@contextmanager
+def timed(results, name):
+    """Stores wall time spent inside the block into `results[name]`."""
+    start = time.time()
+    yield
+    results[name] = time.time() - start
+
+
+def make_manager(config_text='tasks: {}', db_uri=None):
+    """Returns a manager with all plugins loaded, like the unit tests use."""
+    setup_once()
+    # debug logging would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    return MockManager(config_text, 'benchmark', db_uri=db_uri)
+
+
+def report(title, rows):
+    """Prints (label, value) rows as a simple aligned table."""
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print('  %s  %s' % (label.ljust(width), value))
@@ -0,0 +1,94 @@
+"""
+Compares the bulk archive writer against the old one-query-per-entry Archive.on_task_exit.
+
+    python -m tests.benchmarks.bench_archive [archived rows] [task entries]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import sys
+from datetime import datetime
+
+from flexget.entry import Entry
+from flexget.manager import Session
+from flexget.plugins.generic.archive import Archive, ArchiveEntry, get_source, get_tag
+from flexget.task import Task
+from tests.benchmarks import QueryCounter, timed, make_manager, report
+
+
+def populate(session, rows):
+    now = datetime.now()
+    session.execute(ArchiveEntry.__table__.insert(),
+                    [{'id': i, 'title': 'Archived %s' % i, 'url': 'http://localhost/%s' % i, 'feed': 'bench',
+                      'added': now} for i in xrange(1, rows + 1)])
+    session.commit()
+
+
+def make_task(manager, entries, offset):
+    task = Task(manager, 'bench', config={'mock': []})
+    task.session = Session()
+    # every other entry has been archived before
+    for i in xrange(entries):
+        n = i * 2 if i % 2 else offset - i
+        task.all_entries.append(Entry('Archived %s' % n, 'http://localhost/%s' % n))
+    return task
+
+
+def legacy_exit(task, tag_names):
+    """What Archive.on_task_exit used to do."""
+    tags = [get_tag(tag_name, task.session) for tag_name in set(tag_names)]
+    processed = []
+    for entry in task.entries + task.rejected + task.failed:
+        if entry in processed:
+            continue
+        processed.append(entry)
+        ae = task.session.query(ArchiveEntry).filter(ArchiveEntry.title == entry['title']).\
+            filter(ArchiveEntry.url == entry['url']).first()
+        if ae:
+            source = get_source(task.name, task.session)
+            if source not in ae.sources:
+                ae.sources.append(source)
+            for tag_name in tag_names:
+                atag = get_tag(tag_name, task.session)
+                if atag not in ae.tags:
+                    ae.tags.append(atag)
+        else:
+            ae = ArchiveEntry()
+            ae.title = entry['title']
+            ae.url = entry['url']
+            ae.task = task.name
+            ae.sources.append(get_source(task.name, task.session))
+            ae.tags.extend(tags)
+            task.session.add(ae)
+
+
+def main(rows=100000, entries=2000):
+    manager = make_manager()
+    session = Session()
+    populate(session, rows)
+    session.close()
+
+    results = {}
+    counts = {}
+    archived = {}
+    # Both variants archive the same number of new entries, with different titles
+    for offset, (name, run) in enumerate([('per entry', lambda task: legacy_exit(task, ['tv'])),
+                                          ('bulk', lambda task: Archive().on_task_exit(task, ['tv']))]):
+        task = make_task(manager, entries, -(offset + 1) * entries * 2)
+        before = task.session.query(ArchiveEntry).count()
+        with QueryCounter(manager.engine) as counter:
+            with timed(results, name):
+                run(task)
+                task.session.commit()
+        counts[name] = counter.count
+        archived[name] = task.session.query(ArchiveEntry).count() - before
+        task.session.close()
+
+    assert archived['per entry'] == archived['bulk'], 'bulk writer archived a different number of entries'
+    report('archive exit, %s archived rows, %s entries' % (rows, entries),
+           [(name, '%6d queries  %.3fs  %d archived' % (counts[name], results[name], archived[name]))
+            for name in ('per entry', 'bulk')])
+    manager.shutdown()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,60 @@
+"""
+Compares sequential discover searches against searching with a pool of workers, using stub search plugins which sleep
+like a slow search site would. Verifies both produce the same results in the same order.
+
+    python -m tests.benchmarks.bench_discover [queries] [delay_ms] [workers]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import sys
+import time
+
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.plugins.input.discover import Discover
+from tests.benchmarks import make_manager, timed, report
+
+BACKENDS = ['bench_newznab', 'bench_search_rss', 'bench_kat']
+
+
+class SleepingSearch(object):
+    """Stub search plugin, returns three results for each query after `delay` seconds."""
+
+    delay = 0.05
+
+    def search(self, entry, config=None):
+        time.sleep(self.delay)
+        return [Entry(title='%s result %s' % (entry['title'], i), url='http://localhost/%s/%s' % (entry['title'], i),
+                      search_sort=(entry['search_sort'] * 7 + i) % 10) for i in range(3)]
+
+for name in BACKENDS:
+    plugin.register(SleepingSearch, name, groups=['search'], debug=True, api_ver=2)
+
+
+def make_queries(count):
+    return [Entry(title='Some Show S01E%02d' % (i + 1), url='', search_sort=i) for i in xrange(count)]
+
+
+def search(count, workers):
+    config = {'from': [{name: {'url': 'http://%s.test/' % name}} for name in BACKENDS], 'workers': workers,
+              'workers_per_plugin': max(1, workers // len(BACKENDS))}
+    return [entry['title'] for entry in Discover().execute_searches(config, make_queries(count))]
+
+
+def main(queries=40, delay_ms=50, workers=12):
+    manager = make_manager()
+    SleepingSearch.delay = delay_ms / 1000
+    results = {}
+    with timed(results, 'sequential'):
+        expected = search(queries, 1)
+    with timed(results, '%s workers' % workers):
+        found = search(queries, workers)
+    assert found == expected, 'concurrent searches should give the same results in the same order'
+    manager.shutdown()
+    report('%s queries to %s search plugins taking %sms each, results verified identical' %
+           (queries, len(BACKENDS), delay_ms),
+           [(name, '%.2fs' % value) for name, value in sorted(results.items(), reverse=True)])
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
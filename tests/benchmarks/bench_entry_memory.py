@@ -0,0 +1,85 @@
+"""
+Measures memory used by entries, against the bookkeeping Entry used to allocate for every instance and snapshots
+copying every value. Each variant is measured in a fresh interpreter.
+
+    python -m tests.benchmarks.bench_entry_memory [entries]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import copy
+import gc
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from flexget.entry import Entry
+
+
+class LegacyEntry(Entry):
+    """Allocates traces, snapshots and hooks up front, and deep copies every value into snapshots."""
+
+    def __init__(self, *args, **kwargs):
+        Entry.__init__(self, *args, **kwargs)
+        self._traces = []
+        self._snapshots = {}
+        self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
+
+    def take_snapshot(self, name):
+        self.snapshots[name] = dict((field, copy.deepcopy(value)) for field, value in self.iteritems())
+
+
+def rss():
+    """Current resident memory in KiB."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except IOError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def build(cls, count):
+    now = datetime.now()
+    entries = []
+    for i in xrange(count):
+        entry = cls('Some.Show.S01E%02d.720p.HDTV.x264-GRP' % (i % 100), 'http://localhost/torrents/%s.torrent' % i,
+                    description='Episode %s of some show' % i, content_size=i % 2000, rss_pubdate=now,
+                    tags=['tv', 'hd'])
+        entry.take_snapshot('after_input')
+        entries.append(entry)
+    # Like a typical filter, decide about a small part of the entries
+    for entry in entries[::20]:
+        entry.accept('matched')
+    return entries
+
+
+def child(variant, count):
+    cls = {'legacy': LegacyEntry, 'compact': Entry}[variant]
+    gc.collect()
+    before = rss()
+    start = time.time()
+    entries = build(cls, count)
+    elapsed = time.time() - start
+    gc.collect()
+    print(json.dumps({'kib': rss() - before, 'time': elapsed, 'count': len(entries)}))
+
+
+def main(count=100000):
+    rows = []
+    for variant in ('legacy', 'compact'):
+        output = subprocess.check_output([sys.executable, '-m', 'tests.benchmarks.bench_entry_memory', 'child',
+                                          variant, str(count)])
+        result = json.loads(output.strip().splitlines()[-1])
+        rows.append((variant, '%7.1f MiB  %4d bytes per entry  %.2fs' %
+                     (result['kib'] / 1024, result['kib'] * 1024 // count, result['time'])))
+    from tests.benchmarks import report
+    report('%s entries with an after_input snapshot' % count, rows)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['child']:
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
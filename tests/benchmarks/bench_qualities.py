@@ -0,0 +1,136 @@
+"""
+Compares quality parsing and comparison against the previous uncached implementation, verifying both agree.
+
+    python -m tests.benchmarks.bench_qualities [runs]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import itertools
+import sys
+
+from flexget.utils import qualities
+from flexget.utils.qualities import Quality
+from tests.benchmarks import timed, report
+
+TITLES = [
+    'Some.Show.S01E02.720p.HDTV.x264-FlexGet',
+    'Some.Show.S01E02.HDTV.XviD-FlexGet',
+    'Some.Show.S01E02.1080i.HDTV.DD5.1.MPEG2-FlexGet',
+    'Some.Show.S01E02.1080p.WEB-DL.DD5.1.H.264-FlexGet',
+    'Some.Show.S01E02.720p.WEB-DL.AAC2.0.H264-FlexGet',
+    'Some.Show.S01E02.WEBRip.x264-FlexGet',
+    'Some.Show.S01E02.PDTV.XviD-FlexGet',
+    'Some.Show.S01E02.DSR.XviD-FlexGet',
+    'Some.Show.S01E02.480p.HDTV.x264-FlexGet',
+    'Some.Show.2013.10.05.720p.HDTV.x264-FlexGet',
+    'Some Show - 1x02 - Episode Name [HDTV-720p]',
+    'Some Show S01E02 [1080p] [BluRay] [x264] [DTS-HD MA 5.1]',
+    'Some.Show.S01E02.PREAIR.XviD-FlexGet',
+    'Some.Show.S01.COMPLETE.BDRip.XviD-FlexGet',
+    'Some.Show.S01E02.10bit.1080p.BluRay.FLAC2.0.x264-FlexGet',
+    'Some.Movie.2012.720p.BluRay.x264.DTS-FlexGet',
+    'Some.Movie.2012.1080p.BluRay.REMUX.AVC.DTS-HD.MA.5.1-FlexGet',
+    'Some.Movie.2012.1080p.BluRay.TrueHD.5.1.x264-FlexGet',
+    'Some.Movie.2012.DVDRip.XviD.AC3-FlexGet',
+    'Some.Movie.2012.DVDSCR.XviD-FlexGet',
+    'Some.Movie.2012.BDSCR.x264-FlexGet',
+    'Some.Movie.2012.R5.LINE.XviD-FlexGet',
+    'Some.Movie.2012.TS.XviD-FlexGet',
+    'Some.Movie.2012.HDTS.x264-FlexGet',
+    'Some.Movie.2012.CAM.XviD.MP3-FlexGet',
+    'Some.Movie.2012.TELECINE.XviD-FlexGet',
+    'Some.Movie.2012.HDRip.XviD.AC3-FlexGet',
+    'Some.Movie.2012.PPVRip.x264-FlexGet',
+    'Some.Movie.2012.WORKPRINT.XviD-FlexGet',
+    'Some.Movie.2012.576p.BDRip.x264-FlexGet',
+    'Some.Movie.2012.1280x720.WEB-DL.AAC.5.1-FlexGet',
+    'Some.Movie.2012.1920x1080.BluRay.DD5.1.x264-FlexGet',
+    'Some.Movie.2012.TVRip.DivX-FlexGet',
+    'Some.Movie.2012.DVB.x264-FlexGet',
+    'Some.Movie (2012) 720p HDRip x264 AAC',
+    'Some Movie 2012 360p web hi10p mp3',
+    'Some Movie 2012 368 dvdrip',
+    'Some.Movie.2012.iNTERNAL.HR.HDTV.XviD-FlexGet',
+    'Some.Movie.2012.PROPER.720i.aHDTV.x264-FlexGet',
+    'Some.Movie.2012-FlexGet',
+]
+
+
+def all_titles():
+    """Real world titles, plus combinations of component names for coverage."""
+    titles = list(TITLES)
+    resolutions, sources, codecs, audios = [[None] + [c.name for c in items] for items in
+                                            (qualities._resolutions, qualities._sources, qualities._codecs,
+                                             qualities._audios)]
+    for combination in itertools.chain(itertools.product(resolutions, sources, ['x264']),
+                                       itertools.product(['720p'], codecs, audios)):
+        titles.append('Some.Title.%s-FlexGet' % '.'.join(part for part in combination if part))
+    return titles
+
+
+def reference_parse(text):
+    """Parses `text` the way Quality did before parsing was memoized, without any shortcuts."""
+    result = {}
+    for type, items in (('resolution', qualities._resolutions), ('source', qualities._sources),
+                        ('codec', qualities._codecs), ('audio', qualities._audios)):
+        best = None
+        for item in items:
+            matched, remaining = item.matches(text)
+            if matched:
+                best = item
+                text = remaining
+                if item.modifier is not None:
+                    break
+        result[type] = best or qualities._UNKNOWNS[type]
+    return result, text
+
+
+def reference_comparator(parsed):
+    components = [parsed[type] for type in ('resolution', 'source', 'codec', 'audio')]
+    return [sum(c.modifier for c in components if c.modifier)] + components
+
+
+def verify(titles):
+    references = [reference_parse(title) for title in titles]
+    for title, (found, clean_text) in zip(titles, references):
+        quality = Quality(title)
+        assert quality.clean_text == clean_text, title
+        for type in found:
+            assert getattr(quality, type) is found[type], title
+    # Comparator ordering must not change, check all pairs of a sample
+    sample = range(0, len(titles), max(1, len(titles) // 300))
+    for i, j in itertools.product(sample, sample):
+        expected = reference_comparator(references[i][0]) < reference_comparator(references[j][0])
+        assert (Quality(titles[i]) < Quality(titles[j])) == expected, (titles[i], titles[j])
+
+
+def run_reference(titles, runs):
+    # Comparators were built on every comparison, and strings parsed every time they were compared against
+    for _ in xrange(runs):
+        parsed = [reference_parse(title)[0] for title in titles]
+        sorted(parsed, cmp=lambda a, b: cmp(reference_comparator(a), reference_comparator(b)))
+        [reference_comparator(found) >= reference_comparator(reference_parse('720p hdtv')[0]) for found in parsed]
+
+
+def run_quality(titles, runs):
+    for _ in xrange(runs):
+        parsed = [Quality(title) for title in titles]
+        sorted(parsed)
+        [quality >= '720p hdtv' for quality in parsed]
+
+
+def main(runs=5):
+    titles = all_titles()
+    verify(titles)
+    results = {}
+    with timed(results, 'reference parsing'):
+        run_reference(titles, runs)
+    qualities._parse_cache.clear()
+    with timed(results, 'memoized parsing'):
+        run_quality(titles, runs)
+    report('%s titles parsed and sorted on %s runs, results verified identical' % (len(titles), runs),
+           [(name, '%.3fs' % results[name]) for name in ('reference parsing', 'memoized parsing')])
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,87 @@
+"""
+Compares the batched seen lookup against the old one-query-per-entry filtering.
+
+    python -m tests.benchmarks.bench_seen [seen rows] [task entries]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import sys
+from datetime import datetime
+
+from flexget.entry import Entry
+from flexget.manager import Session
+from flexget.plugins.filter.seen import FilterSeen, SeenEntry, SeenField
+from flexget.task import Task
+from tests.benchmarks import QueryCounter, timed, make_manager, report
+
+
+def populate(session, rows):
+    now = datetime.now()
+    session.execute(SeenEntry.__table__.insert(),
+                    [{'id': i, 'title': 'Seen %s' % i, 'feed': 'bench', 'added': now, 'local': False}
+                     for i in xrange(1, rows + 1)])
+    fields = []
+    for i in xrange(1, rows + 1):
+        fields.append({'seen_entry_id': i, 'field': 'title', 'value': 'Seen %s' % i, 'added': now})
+        fields.append({'seen_entry_id': i, 'field': 'url', 'value': 'http://localhost/%s' % i, 'added': now})
+    session.execute(SeenField.__table__.insert(), fields)
+    session.commit()
+
+
+def make_task(manager, entries):
+    task = Task(manager, 'bench', config={'mock': []})
+    task.session = Session()
+    # every other entry has been seen before
+    for i in xrange(entries):
+        n = i * 2 if i % 2 else -i
+        task.all_entries.append(Entry('Seen %s' % n, 'http://localhost/%s' % n))
+    return task
+
+
+def legacy_filter(task, fields):
+    """The per entry lookup FilterSeen.on_task_filter used to do."""
+    for entry in task.entries:
+        values = []
+        for field in fields:
+            if field not in entry:
+                continue
+            if entry[field] not in values and entry[field]:
+                values.append(unicode(entry[field]))
+        if values:
+            found = task.session.query(SeenField).join(SeenEntry).filter(SeenField.value.in_(values))
+            found = found.filter(SeenEntry.local == False).first()
+            if found:
+                se = task.session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
+                entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
+                             (found.field, found.value, se.task, se.added.strftime('%Y-%m-%d %H:%M')))
+
+
+def main(rows=100000, entries=2000):
+    manager = make_manager()
+    session = Session()
+    populate(session, rows)
+    session.close()
+
+    seen = FilterSeen()
+    results = {}
+    counts = {}
+    rejected = {}
+    for name, run in [('per entry', lambda task: legacy_filter(task, seen.fields)),
+                      ('batched', lambda task: seen.on_task_filter(task, True))]:
+        task = make_task(manager, entries)
+        with QueryCounter(manager.engine) as counter:
+            with timed(results, name):
+                run(task)
+        counts[name] = counter.count
+        rejected[name] = len(task.rejected)
+        task.session.close()
+
+    assert rejected['per entry'] == rejected['batched'], 'batched lookup rejected different entries'
+    report('seen filter, %s seen rows, %s entries' % (rows, entries),
+           [(name, '%6d queries  %.3fs  %d rejected' % (counts[name], results[name], rejected[name]))
+            for name in ('per entry', 'batched')])
+    manager.shutdown()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,37 @@
+"""
+Compares creating fresh SeriesParsers every run against copying cached compiled parsers.
+
+    python -m tests.benchmarks.bench_seriesparser [series] [runs]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import sys
+
+from flexget.utils.titles import SeriesParser, ParseWarning, get_parser
+from tests.benchmarks import timed, report
+
+
+def run(factory, series, runs):
+    for _ in xrange(runs):
+        for name in series:
+            parser = factory(name=name, identified_by='auto', alternate_names=['%s alt' % name], strict_name=False)
+            try:
+                parser.parse('%s.S01E02.720p.HDTV.x264-FlexGet' % name.replace(' ', '.'))
+            except ParseWarning:
+                pass
+            assert parser.valid
+
+
+def main(series=400, runs=10):
+    names = ['Series Number %s' % i for i in xrange(series)]
+    results = {}
+    with timed(results, 'fresh parsers'):
+        run(SeriesParser, names, runs)
+    with timed(results, 'cached parsers'):
+        run(get_parser, names, runs)
+    report('%s series parsed on %s runs' % (series, runs),
+           [(name, '%.3fs' % results[name]) for name in ('fresh parsers', 'cached parsers')])
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,55 @@
+"""
+Measures CLI startup, importing all plugins against loading them lazily from the plugin manifest.
+Each measurement is a fresh interpreter loading plugins and parsing the command line.
+
+    python -m tests.benchmarks.bench_startup [runs] [command ...]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = """
+import json, resource, sys, time
+start = time.time()
+from flexget import logger, plugin
+from flexget.options import get_parser
+logger.initialize(True)
+plugin.load_plugins(lazy=%r)
+get_parser().parse_args(%r)
+print(json.dumps({'time': time.time() - start, 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'modules': len(sys.modules)}))
+"""
+
+
+def startup(lazy, args, manifest):
+    env = dict(os.environ, FLEXGET_PLUGIN_MANIFEST=manifest)
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT % (lazy, args)], env=env,
+                                     stderr=open(os.devnull, 'w'))
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs=5, *args):
+    args = list(args) or ['series', 'list']
+    tmp = tempfile.mkdtemp()
+    manifest = os.path.join(tmp, 'plugin_manifest.json')
+    try:
+        results = [('import all', [startup(False, args, manifest) for _ in xrange(runs)]),
+                   ('build manifest', [startup(True, args, manifest)]),
+                   ('lazy', [startup(True, args, manifest) for _ in xrange(runs)])]
+    finally:
+        shutil.rmtree(tmp)
+    rows = []
+    for name, samples in results:
+        best = min(samples, key=lambda s: s['time'])
+        rows.append((name, '%.3fs  %6d KiB maxrss  %4d modules' % (best['time'], best['rss'], best['modules'])))
+    from tests.benchmarks import report
+    report('Startup of `flexget %s`, best of %s runs' % (' '.join(args), runs), rows)
+
+
+if __name__ == '__main__':
+    main(*([int(sys.argv[1])] + sys.argv[2:]) if len(sys.argv) > 1 else [])
@@ -0,0 +1,70 @@
+"""
+Measures the overhead of Task.execute with cached execution plans, against sorting plugins and event handlers on every
+phase and every fired event like it used to.
+
+    python -m tests.benchmarks.bench_task_overhead [tasks] [rounds]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import sys
+import warnings
+
+from flexget import event, task as task_module
+from flexget.plugin import get_plugins_by_phase
+from flexget.task import Task
+from tests.benchmarks import timed, make_manager, report
+
+
+class legacy_plan(object):
+    """Sorts the plugins of a phase each time they are asked for, like Task.plugins used to."""
+
+    def __init__(self, names):
+        self.names = names
+
+    def __getitem__(self, phase):
+        plugins = sorted(get_plugins_by_phase(phase), key=lambda p: p.phase_handlers[phase], reverse=True)
+        return tuple((order, p) for order, p in enumerate(plugins) if p.builtin or p.name in self.names)
+
+
+def legacy_fire_event(name, *args, **kwargs):
+    """Sorts handlers on every fire, like fire_event used to."""
+    if name not in event._events:
+        return
+    event._events[name].sort(reverse=True)
+    for handler in event._events[name]:
+        handler(*args, **kwargs)
+
+
+def run(manager, rounds):
+    for _ in xrange(rounds):
+        for name in manager.config['tasks']:
+            Task(manager, name).execute()
+
+
+def main(tasks=50, rounds=5):
+    config = 'tasks:\n' + ''.join('  task_%s:\n    mock: []\n' % i for i in xrange(tasks))
+    manager = make_manager(config)
+    warnings.simplefilter('ignore', DeprecationWarning)
+    # Get creating the config hashes out of the way
+    run(manager, 1)
+
+    results = {}
+    planned = task_module.get_execution_plan, task_module.fire_event
+    try:
+        task_module.get_execution_plan, task_module.fire_event = legacy_plan, legacy_fire_event
+        with timed(results, 'sorted each time'):
+            run(manager, rounds)
+    finally:
+        task_module.get_execution_plan, task_module.fire_event = planned
+    with timed(results, 'cached plan'):
+        run(manager, rounds)
+
+    executions = tasks * rounds
+    report('Task.execute overhead, %s no-op tasks, %s rounds' % (tasks, rounds),
+           [(name, '%.3fs  %.2fms per task' % (results[name], results[name] / executions * 1000))
+            for name in ('sorted each time', 'cached plan')])
+    manager.shutdown()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
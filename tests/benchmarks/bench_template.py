@@ -0,0 +1,43 @@
+"""
+Compares compiling templates on every render against the compiled template cache, for a typical `set: path:` template.
+
+    python -m tests.benchmarks.bench_template [entries]
+"""
+
+from __future__ import unicode_literals, division, absolute_import, print_function
+import sys
+
+from flexget.entry import Entry
+from flexget.utils import template
+from tests.benchmarks import make_manager, timed, report
+
+PATH = '/storage/series/{{series_name}}/Season {{series_season|pad(2)}}'
+PLAIN = '/storage/movies/'
+
+
+def make_entries(count):
+    return [Entry(title='Series %s S01E%02d 720p HDTV' % (i % 50, i % 30), url='http://localhost/%s' % i,
+                  series_name='Series %s' % (i % 50), series_season=i % 10) for i in xrange(count)]
+
+
+def render_uncached(text, entry):
+    # How templates were rendered before, compiled for every render
+    return template.render_from_entry(template.environment.from_string(text), entry)
+
+
+def main(count=10000):
+    manager = make_manager()
+    entries = make_entries(count)
+    results = {}
+    for name, text in (('path template', PATH), ('plain path', PLAIN)):
+        with timed(results, '%s, uncached' % name):
+            expected = [render_uncached(text, entry) for entry in entries]
+        with timed(results, '%s, cached' % name):
+            rendered = [template.render_from_entry(text, entry) for entry in entries]
+        assert rendered == expected, 'cached templates should render the same'
+    manager.shutdown()
+    report('%s entries rendered' % count, [(name, '%.3fs' % value) for name, value in sorted(results.items())])
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,126 @@
+from __future__ import unicode_literals, division, absolute_import
+
+from flexget.manager import Session
+from flexget.plugins.generic.archive import ArchiveEntry, search, fts_module, backfill_index, FTS_TABLE
+from flexget.utils.simple_persistence import SimplePersistence
+from tests import FlexGetBase
+
+
+class TestArchive(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/1'}
+              - {title: 'Some.Show.S01E02.720p.HDTV-FlexGet', url: 'http://localhost/2'}
+              - {title: 'Other Show S01E01', url: 'http://localhost/3'}
+            archive: [tv]
+          test_other:
+            mock:
+              - {title: 'Some.Show.S02E01.720p.HDTV-FlexGet', url: 'http://localhost/4'}
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/1'}
+            archive: yes
+          test_tags:
+            mock:
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/1'}
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/1'}
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/mirror/1'}
+            archive: [tv, hd]
+          test_matching:
+            mock:
+              - {title: 'Foo Bar', url: 'http://localhost/foo/1'}
+              - {title: 'Foo_Bar', url: 'http://localhost/foo/2'}
+              - {title: 'Foo-Bar', url: 'http://localhost/foo/3'}
+              - {title: 'Foo.Barista', url: 'http://localhost/foo/4'}
+              - {title: 'FooXBar', url: 'http://localhost/foo/5'}
+              - {title: 'Foo  Bar', url: 'http://localhost/foo/6'}
+              - {title: 'Bar Foo', url: 'http://localhost/foo/7'}
+            archive: yes
+    """
+
+    def search(self, text, **kwargs):
+        session = Session()
+        try:
+            return sorted(ae.title for ae in search(session, text, **kwargs))
+        finally:
+            session.close()
+
+    def test_search(self):
+        self.execute_task('test')
+        self.execute_task('test_other')
+        session = Session()
+        try:
+            assert fts_module(session), 'archive should have a full text index'
+            assert session.query(ArchiveEntry).count() == 4
+        finally:
+            session.close()
+        assert self.search('some show s01') == ['Some.Show.S01E01.720p.HDTV-FlexGet',
+                                                'Some.Show.S01E02.720p.HDTV-FlexGet']
+        assert self.search('Some.Show.S01E01') == ['Some.Show.S01E01.720p.HDTV-FlexGet']
+        assert self.search('other show') == ['Other Show S01E01']
+        assert self.search('show') == [], 'titles should start with the search text'
+        assert self.search('some show', tags=['tv']) == ['Some.Show.S01E01.720p.HDTV-FlexGet',
+                                                         'Some.Show.S01E02.720p.HDTV-FlexGet']
+        assert self.search('some show', sources=['test_other']) == ['Some.Show.S01E01.720p.HDTV-FlexGet',
+                                                                    'Some.Show.S02E01.720p.HDTV-FlexGet']
+
+    def test_matching(self):
+        self.execute_task('test_matching')
+        expected = ['Foo Bar', 'Foo-Bar', 'Foo.Barista', 'Foo_Bar']
+        assert self.search('foo bar') == expected, \
+            'words should be separated by exactly one character that is not a letter or a digit'
+        assert self.search('Foo.Bar') == expected
+        assert self.search('foo ba') == expected, 'last word may be incomplete'
+        assert self.search('fo bar') == [], 'only the last word may be incomplete'
+        # Searches without the full text index should find the same titles
+        session = Session()
+        try:
+            SimplePersistence('archive', session=session)['fts_backfill'] = (0, 1)
+            session.commit()
+        finally:
+            session.close()
+        assert self.search('foo bar') == expected
+
+    def test_backfill(self):
+        self.execute_task('test')
+        # Simulate a database archived to before the index existed
+        session = Session()
+        try:
+            session.execute('DELETE FROM %s' % FTS_TABLE)
+            SimplePersistence('archive', session=session)['fts_backfill'] = (0, 3)
+            session.commit()
+            assert not fts_module(session), 'incomplete index should not be used'
+        finally:
+            session.close()
+        assert len(self.search('some show')) == 2, 'search should work while index is incomplete'
+
+        session = Session()
+        try:
+            backfill_index(session, limit=2)
+            assert SimplePersistence('archive', session=session)['fts_backfill'] == (2, 3)
+            backfill_index(session, limit=2)
+            assert 'fts_backfill' not in SimplePersistence('archive', session=session)
+            session.commit()
+            assert fts_module(session)
+        finally:
+            session.close()
+        assert len(self.search('some show')) == 2
+        assert self.search('other') == ['Other Show S01E01']
+
+    def test_existing_entries(self):
+        self.execute_task('test')
+        self.execute_task('test')
+        self.execute_task('test_tags')
+        session = Session()
+        try:
+            assert session.query(ArchiveEntry).count() == 4, 'entries should have been archived once by title and url'
+            ae = session.query(ArchiveEntry).filter(ArchiveEntry.url == 'http://localhost/1').one()
+            assert sorted(s.name for s in ae.sources) == ['test', 'test_tags']
+            assert sorted(t.name for t in ae.tags) == ['hd', 'tv']
+            ae = session.query(ArchiveEntry).filter(ArchiveEntry.url == 'http://localhost/mirror/1').one()
+            assert [s.name for s in ae.sources] == ['test_tags']
+            assert sorted(t.name for t in ae.tags) == ['hd', 'tv']
+        finally:
+            session.close()
+        assert len(self.search('Some.Show.S01E01')) == 2
@@ -58,3 +58,34 @@ class TestInputCache(FlexGetBase):
         assert self.task.entries, 'should have created entries at the start'
         self.execute_task('test_db')
         assert self.task.entries, 'should have created entries from the cache'
+
+
+class TestInputCacheStore(object):
+
+    def test_size_limit(self):
+        from flexget.utils.cached_input import InputCacheStore, estimate_size
+        value = [{'title': 'x' * 100}]
+        store = InputCacheStore(max_bytes=estimate_size(value) * 2)
+        store['a'] = value
+        store['b'] = value
+        assert store['a'] is value
+        store['c'] = value
+        assert 'b' not in store, 'least recently used value should have been dropped'
+        assert 'a' in store and 'c' in store
+        assert store.bytes == estimate_size(value) * 2
+        del store['a']
+        assert store.bytes == estimate_size(value)
+
+    def test_frozen_entries(self):
+        from flexget.utils.cached_input import freeze_entry, thaw_entry
+        entry = Entry(title='Test', url='http://test.com', tags=['a'])
+        entry.register_lazy_fields(['lazy'], lambda e, field: e.update({'lazy': e['title']}) or e[field])
+        frozen = freeze_entry(entry)
+        entry['tags'].append('b')
+        first = thaw_entry(frozen)
+        first['tags'].append('c')
+        first['title'] = 'Changed'
+        second = thaw_entry(frozen)
+        assert second['tags'] == ['a'] and second['title'] == 'Test', 'cached values should not change'
+        assert second['title'] is frozen['title'], 'immutable values should be shared'
+        assert first['lazy'] == 'Changed' and second['lazy'] == 'Test', 'lazy fields should be evaluated per entry'
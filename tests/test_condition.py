@@ -1,4 +1,8 @@
 from __future__ import unicode_literals, division, absolute_import
+from nose.tools import assert_raises
+
+from flexget.entry import Entry
+from flexget.plugins.filter.if_condition import compile_statement, safer_eval
 from tests import FlexGetBase
 
 
@@ -40,6 +44,11 @@ class TestCondition(FlexGetBase):
                   set:
                     some_field: some value
                   accept_all: yes
+
+          test_unsafe:
+            if:
+              - "title.__class__": accept
+              - "title == 'test'": accept
     """
 
     def test_reject(self):
@@ -68,6 +77,30 @@ class TestCondition(FlexGetBase):
         assert entry
         assert len(self.task.accepted) == 1
 
+    def test_unsafe(self):
+        self.execute_task('test_unsafe')
+        assert [e['title'] for e in self.task.accepted] == ['test'], 'unsafe rule should have been skipped'
+
+
+class TestSaferEval(object):
+
+    def test_compiled_once(self):
+        assert compile_statement('year < 2011') is compile_statement('year < 2011')
+        assert compile_statement('  year < 2011') is not None, 'leading whitespace should be ignored'
+
+    def test_unsafe(self):
+        for statement in ('title.__class__', '__import__("os")', 'sorted(title, key=lambda x: x)',
+                          'str(__class__=1)', "'{0.__class__.__mro__}'.format(title)"):
+            assert_raises(ValueError, compile_statement, statement)
+        assert_raises(SyntaxError, compile_statement, 'year <')
+        assert safer_eval("title == 'a_b'", {'title': 'a_b'})
+
+    def test_lazy_fields(self):
+        entry = Entry('title', 'url')
+        entry.register_lazy_fields(['year'], lambda e, field: e.update({'year': 2000}) or e[field])
+        assert safer_eval('year == 2000 and len(title) == 5', entry)
+        assert entry['year'] == 2000, 'lazy field should have been evaluated on the entry itself'
+
 
 class TestQualityCondition(FlexGetBase):
 
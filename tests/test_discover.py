@@ -1,4 +1,6 @@
 from __future__ import unicode_literals, division, absolute_import
+import threading
+import time
 from datetime import datetime, timedelta
 
 from flexget.entry import Entry
@@ -19,6 +21,28 @@ class SearchPlugin(object):
 plugin.register(SearchPlugin, 'test_search', groups=['search'], api_ver=2)
 
 
+class SlowSearchPlugin(object):
+    """Fake search plugin which takes its time, returns two results for the entry it was given."""
+
+    schema = {'type': 'object', 'properties': {'url': {'type': 'string'}}}
+    lock = threading.Lock()
+    active = 0
+    most_active = 0
+
+    def search(self, entry, config=None):
+        cls = SlowSearchPlugin
+        with cls.lock:
+            cls.active += 1
+            cls.most_active = max(cls.most_active, cls.active)
+        time.sleep(0.1)
+        with cls.lock:
+            cls.active -= 1
+        return [Entry(title='%s %s' % (entry['title'], i), url='http://localhost/%s/%s' % (entry['title'], i),
+                      search_sort=entry['search_sort'] - i) for i in range(2)]
+
+plugin.register(SlowSearchPlugin, 'test_slow_search', groups=['search'], api_ver=2)
+
+
 class EstRelease(object):
     """Fake release estimate plugin. Just returns 'est_release' entry field."""
 
@@ -95,3 +119,59 @@ class TestDiscover(FlexGetBase):
         mock_config[0]['est_release'] = datetime.now()
         self.execute_task('test_estimates')
         assert len(self.task.entries) == 1
+
+
+class TestDiscoverConcurrent(FlexGetBase):
+    __yaml__ = """
+        templates:
+          global:
+            disable_builtins: [seen]
+        tasks:
+          sequential:
+            discover:
+              ignore_estimations: yes
+              what:
+              - mock: &queries
+                - {title: A, search_sort: 10}
+                - {title: B, search_sort: 30}
+                - {title: C, search_sort: 20}
+                - {title: D, search_sort: 30}
+                - {title: E, search_sort: 50}
+                - {title: F, search_sort: 40}
+              from:
+              - test_slow_search: {}
+          concurrent:
+            discover:
+              ignore_estimations: yes
+              what:
+              - mock: *queries
+              from:
+              - test_slow_search: {}
+              workers: 6
+          limited:
+            discover:
+              ignore_estimations: yes
+              what:
+              - mock: *queries
+              from:
+              - test_slow_search: {url: 'http://search.test/'}
+              workers: 6
+              workers_per_host: 2
+    """
+
+    def run(self, name):
+        SlowSearchPlugin.most_active = 0
+        self.execute_task(name, options={'discover_now': True})
+        return [e['title'] for e in self.task.entries]
+
+    def test_concurrent(self):
+        expected = self.run('sequential')
+        assert SlowSearchPlugin.most_active == 1, 'searches should be sequential by default'
+        titles = self.run('concurrent')
+        assert SlowSearchPlugin.most_active > 1, 'searches should have been made concurrently'
+        assert titles == expected, 'results should be in the same order as when searching sequentially'
+
+    def test_host_limit(self):
+        titles = self.run('limited')
+        assert SlowSearchPlugin.most_active == 2
+        assert len(titles) == 12
@@ -1,6 +1,12 @@
 from __future__ import unicode_literals, division, absolute_import
+import os
 import sys
 import tempfile
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from collections import defaultdict
+from SocketServer import ThreadingMixIn
 
 from nose.plugins.attrib import attr
 from nose.plugins.skip import SkipTest
@@ -52,6 +58,103 @@ class TestDownload(FlexGetBase):
         assert not self.task.aborted, 'Task should not have aborted'
 
 
+class StandInServer(ThreadingMixIn, HTTPServer):
+    """Local http server standing in for trackers, records how many requests each host served at once."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.active = defaultdict(int)
+        self.most_active = defaultdict(int)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        host = self.headers['host'].split(':')[0]
+        with self.server.lock:
+            self.server.active[host] += 1
+            self.server.most_active[host] = max(self.server.most_active[host], self.server.active[host])
+        try:
+            time.sleep(0.2)
+            if 'missing' in self.path:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-bittorrent')
+            self.end_headers()
+            self.wfile.write(b'content of %s' % self.path.encode('ascii'))
+        finally:
+            with self.server.lock:
+                self.server.active[host] -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadConcurrent(FlexGetBase):
+    __tmp__ = True
+    __yaml__ = """
+        templates:
+          global:
+            mock:
+              - {title: 'a1', url: 'http://localhost:__port__/a1.torrent'}
+              - {title: 'a2', url: 'http://localhost:__port__/a2.torrent'}
+              - {title: 'a3', url: 'http://localhost:__port__/missing.torrent'}
+              - {title: 'a4', url: 'http://localhost:__port__/a4.torrent'}
+              - {title: 'b1', url: 'http://127.0.0.1:__port__/b1.torrent'}
+              - {title: 'b2', url: 'http://127.0.0.1:__port__/b2.torrent'}
+              - {title: 'b3', url: 'http://127.0.0.1:__port__/b3.torrent'}
+            accept_all: yes
+            disable_builtins: yes
+        tasks:
+          sequential:
+            download:
+              path: __tmp__sequential
+              temp: __tmp__temp
+          concurrent:
+            download:
+              path: __tmp__concurrent
+              temp: __tmp__temp
+              workers: 4
+              workers_per_host: 2
+    """
+
+    def setup(self):
+        self.server = StandInServer()
+        threading.Thread(target=self.server.serve_forever).start()
+        self.__yaml__ = self.__yaml__.replace('__port__', str(self.server.server_port))
+        super(TestDownloadConcurrent, self).setup()
+
+    def teardown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super(TestDownloadConcurrent, self).teardown()
+
+    def test_concurrent(self):
+        self.execute_task('concurrent')
+        assert [e['title'] for e in self.task.failed] == ['a3']
+        assert sorted(os.listdir(os.path.join(self.__tmp__, 'concurrent'))) == \
+            ['a1.torrent', 'a2.torrent', 'a4.torrent', 'b1.torrent', 'b2.torrent', 'b3.torrent']
+        with open(os.path.join(self.__tmp__, 'concurrent', 'b2.torrent')) as f:
+            assert f.read() == 'content of /b2.torrent'
+        assert self.server.most_active == {'localhost': 2, '127.0.0.1': 2}, \
+            'downloads should run in parallel within the per host limit'
+
+    def test_same_as_sequential(self):
+        def outcome():
+            return [(e['title'], e.accepted, e.failed, e.get('filename'), e.get('mime-type')) for e in self.task.all_entries]
+
+        self.execute_task('sequential')
+        sequential = outcome()
+        assert self.server.most_active == {'localhost': 1, '127.0.0.1': 1}
+        self.execute_task('concurrent')
+        assert outcome() == sequential
+
+
 class TestDownloadTemp(FlexGetBase):
     __yaml__ = """
         tasks:
@@ -161,6 +161,85 @@ class TestEntryUnicodeError(object):
         e['invalid'] = b'\x8e'
 
 
+class TestEntry(object):
+
+    def test_snapshot(self):
+        e = Entry('title', 'url', tags=['a'])
+        e.take_snapshot('before')
+        snapshot = e.snapshots['before']
+        assert snapshot['title'] is e['title'], 'immutable values should be shared'
+        assert snapshot['tags'] == ['a'] and snapshot['tags'] is not e['tags'], 'mutable values should be copied'
+        e['tags'].append('b')
+        e['title'] = 'changed'
+        assert snapshot == {'title': 'title', 'url': 'url', 'original_url': 'url', 'tags': ['a']}
+
+    def test_copy_and_pickle(self):
+        import copy
+        import pickle
+        e = Entry('title', 'url')
+        e.accept('reason')
+        for other in (copy.copy(e), copy.deepcopy(e), pickle.loads(pickle.dumps(e)),
+                      pickle.loads(pickle.dumps(e, pickle.HIGHEST_PROTOCOL))):
+            assert other == e
+            assert other.accepted
+            assert other.traces == [(None, 'accept', 'reason')]
+
+    def test_unpickle_legacy(self):
+        import pickle
+        # Rejected entry with a trace and a snapshot, pickled before Entry had __slots__
+        legacy = [
+            b"ccopy_reg\n_reconstructor\np0\n(cflexget.entry\nEntry\np1\nc__builtin__\ndict\np2\n(dp3\nVurl\np4\nVurl\n"
+            b"p5\nsVoriginal_url\np6\ng5\nsVtitle\np7\nVtitle\np8\nstp9\nRp10\n(dp11\nS'_state'\np12\nVrejected\np13\n"
+            b"sS'task'\np14\nNsS'traces'\np15\n(lp16\n(NNS'traced'\np17\ntp18\na(NVreject\np19\nS'reason'\np20\ntp21\n"
+            b"asS'snapshots'\np22\n(dp23\nS'after_input'\np24\n(dp25\ng4\ng5\nsg6\ng5\nsg7\ng8\nsssS'_hooks'\np26\n"
+            b"(dp27\nVfail\np28\n(lp29\nsVcomplete\np30\n(lp31\nsVaccept\np32\n(lp33\nsVreject\np34\n(lp35\nssb.",
+            b"\x80\x02cflexget.entry\nEntry\nq\x00)\x81q\x01(X\x03\x00\x00\x00urlq\x02X\x03\x00\x00\x00urlq\x03X\x05"
+            b"\x00\x00\x00titleq\x04X\x05\x00\x00\x00titleq\x05X\x0c\x00\x00\x00original_urlq\x06h\x03u}q\x07(U\x06"
+            b"_stateq\x08X\x08\x00\x00\x00rejectedq\tU\x04taskq\nNU\x06tracesq\x0b]q\x0c(NNU\x06tracedq\r\x87q\x0eNX"
+            b"\x06\x00\x00\x00rejectq\x0fU\x06reasonq\x10\x87q\x11eU\tsnapshotsq\x12}q\x13U\x0bafter_inputq\x14}q\x15"
+            b"(h\x02h\x03h\x06h\x03h\x04h\x05usU\x06_hooksq\x16}q\x17(X\x04\x00\x00\x00failq\x18]q\x19X\x08\x00\x00\x00"
+            b"completeq\x1a]q\x1bX\x06\x00\x00\x00acceptq\x1c]q\x1dX\x06\x00\x00\x00rejectq\x1e]q\x1fuub."]
+        for data in legacy:
+            e = pickle.loads(data)
+            assert e == Entry('title', 'url')
+            assert e.rejected
+            assert e.traces == [(None, None, 'traced'), (None, 'reject', 'reason')]
+            assert e.snapshots == {'after_input': {'title': 'title', 'url': 'url', 'original_url': 'url'}}
+            e.accept('again')
+            assert e.rejected, 'hooks and state should work on the unpickled entry'
+
+    def test_setstate_unknown(self):
+        e = Entry('title', 'url')
+        e.__setstate__({'_state': 'accepted', 'removed_attribute': 1})
+        assert e.accepted
+        assert e.traces == []
+
+    def test_render_lazy(self):
+        e = Entry('title', 'url')
+        e.register_lazy_fields(['lazy'], lambda entry, field: entry.update({'lazy': 'value'}) or entry[field])
+        assert e.render('{{title}} {{lazy}}') == 'title value'
+        assert e['lazy'] == 'value', 'lazy field should have been evaluated on the entry itself'
+        assert 'now' not in e
+
+
+class TestRenderCache(FlexGetBase):
+
+    __yaml__ = """
+        tasks: {}
+    """
+
+    def test_render_cached(self):
+        from flexget.utils import template
+        e = Entry('title', 'url')
+        for text in ('plain', '/path/with spaces/', 'trailing newline\n', 'two newlines\n\n', '# comment', ''):
+            assert e.render(text) == template.environment.from_string(text).render(), repr(text)
+        compiled = template.compile_template('{{title}}')
+        assert template.compile_template('{{title}}') is compiled, 'compiled template should have been reused'
+        assert e.render('{{title}}') == 'title'
+        template.make_environment(self.manager)
+        assert template.compile_template('{{title}}') is not compiled, 'new environment should compile again'
+
+
 class TestFilterRequireField(FlexGetBase):
 
     __yaml__ = """
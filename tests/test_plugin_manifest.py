@@ -0,0 +1,122 @@
+from __future__ import unicode_literals, division, absolute_import
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PLUGIN = """
+from flexget import options, plugin
+from flexget.event import event
+
+
+class LazyTest(object):
+    schema = {'type': 'boolean'}
+
+    @plugin.priority(42)
+    def on_task_filter(self, task, config):
+        pass
+
+
+def do_cli(manager, options):
+    pass
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(LazyTest, 'lazy_test', api_ver=2)
+
+
+@event('options.register')
+def register_parser_arguments():
+    parser = options.register_command('lazy-test', do_cli, help='lazy test command')
+    parser.add_argument('--flag', action='store_true')
+"""
+
+SCRIPT = """
+import json, sys
+from flexget import logger, plugin
+logger.initialize(True)
+plugin.load_plugins()
+module = 'flexget.plugins.lazy_plugin_test'
+result = {'imported': module in sys.modules, 'lazy': isinstance(plugin.plugins['lazy_test'], plugin.LazyPluginInfo)}
+from flexget.options import get_parser
+options = get_parser().parse_args(['lazy-test', '--flag'])
+result['flag'] = getattr(options, 'lazy-test').flag
+result['imported_by_command'] = module in sys.modules
+info = plugin.get_plugin_by_name('lazy_test')
+result['priority'] = info.phase_handlers['filter'].priority
+result['instance'] = type(info.instance).__name__
+print(json.dumps(result))
+"""
+
+
+class TestPluginManifest(object):
+
+    def setup(self):
+        self.tmp = tempfile.mkdtemp()
+        self.plugin_dir = os.path.join(self.tmp, 'plugins')
+        os.mkdir(self.plugin_dir)
+        self.plugin_file = os.path.join(self.plugin_dir, 'lazy_plugin_test.py')
+        with open(self.plugin_file, 'w') as f:
+            f.write(PLUGIN)
+        self.manifest = os.path.join(self.tmp, 'manifest.json')
+        self.root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def teardown(self):
+        shutil.rmtree(self.tmp)
+
+    def load(self, **env):
+        env = dict(os.environ, FLEXGET_PLUGIN_PATH=self.plugin_dir, FLEXGET_PLUGIN_MANIFEST=self.manifest, **env)
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT], env=env, cwd=self.root,
+                                         stderr=subprocess.STDOUT)
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_lazy_loading(self):
+        # First run imports everything and writes the manifest
+        result = self.load()
+        assert result['imported'] and not result['lazy']
+        with open(self.manifest) as f:
+            record = json.load(f)['modules']['flexget.plugins.lazy_plugin_test']
+        assert not record['eager']
+        assert record['commands'] == {'lazy-test': 'lazy test command'}
+        assert record['plugins']['lazy_test']['phases'] == {'filter': 42}
+
+        # Second run only imports the module once it is needed
+        result = self.load()
+        assert not result['imported'] and result['lazy']
+        assert result['imported_by_command'], 'invoking the command should import its module'
+        assert result['flag'], 'options of the real command parser should be parsed'
+        assert result['priority'] == 42
+        assert result['instance'] == 'LazyTest'
+
+    def test_invalidated_by_mtime(self):
+        self.load()
+        mtime = os.path.getmtime(self.plugin_file) + 10
+        os.utime(self.plugin_file, (time.time(), mtime))
+        result = self.load()
+        assert result['imported'], 'modified plugin should cause all plugins to be imported'
+        result = self.load()
+        assert not result['imported'], 'manifest should have been rebuilt'
+
+    def test_default_location(self):
+        home = os.path.join(self.tmp, 'home')
+        os.mkdir(home)
+        env = dict(os.environ, FLEXGET_PLUGIN_PATH=self.plugin_dir, HOME=home)
+        env.pop('FLEXGET_PLUGIN_MANIFEST', None)
+        subprocess.check_output([sys.executable, '-c', SCRIPT], env=env, cwd=self.root, stderr=subprocess.STDOUT)
+        assert os.path.isfile(os.path.join(home, '.flexget', 'plugin_manifest.json')), \
+            'manifest should be written even if ~/.flexget did not exist'
+
+    def test_tests_with_manifest(self):
+        # Build the manifest, then run plugin and cli related tests against plugins loaded from it
+        self.load()
+        env = dict(os.environ, FLEXGET_PLUGIN_PATH=self.plugin_dir, FLEXGET_PLUGIN_MANIFEST=self.manifest,
+                   FLEXGET_TEST_LAZY_PLUGINS='1')
+        process = subprocess.Popen([sys.executable, '-m', 'nose', 'test_pluginapi', 'test_task', 'test_seen'],
+                                   env=env, cwd=os.path.join(self.root, 'tests'),
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+        assert process.returncode == 0, 'tests failed with lazily loaded plugins:\n%s' % output[-3000:]
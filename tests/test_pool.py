@@ -0,0 +1,64 @@
+from __future__ import unicode_literals, division, absolute_import
+import threading
+import time
+from collections import defaultdict
+
+from nose.tools import raises
+
+from flexget.utils.pool import run_jobs
+
+
+class Recorder(object):
+    """Job function which records how many jobs of each key ran at the same time."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = defaultdict(int)
+        self.most_active = defaultdict(int)
+        self.done = []
+
+    def __call__(self, job):
+        with self.lock:
+            self.active[job['key']] += 1
+            self.active['all'] += 1
+            for key in (job['key'], 'all'):
+                self.most_active[key] = max(self.most_active[key], self.active[key])
+        time.sleep(0.02)
+        with self.lock:
+            self.active[job['key']] -= 1
+            self.active['all'] -= 1
+            self.done.append(job['id'])
+        if job.get('fail'):
+            raise ValueError(job['id'])
+
+
+class TestRunJobs(object):
+
+    def jobs(self, keys):
+        return [{'id': i, 'key': key} for i, key in enumerate(keys)]
+
+    def test_limits(self):
+        recorder = Recorder()
+        run_jobs(recorder, self.jobs(['a'] * 6 + ['b'] * 6 + [None] * 3), 5, limits=[(lambda job: job['key'], 2)])
+        assert sorted(recorder.done) == range(15), 'all jobs should have run'
+        assert recorder.most_active['a'] == 2
+        assert recorder.most_active['b'] == 2
+        assert recorder.most_active['all'] <= 5
+
+    def test_sequential(self):
+        recorder = Recorder()
+        run_jobs(recorder, self.jobs(['a', 'b', 'c']), 1)
+        assert recorder.done == [0, 1, 2]
+        assert recorder.most_active['all'] == 1
+
+    @raises(ValueError)
+    def test_error(self):
+        recorder = Recorder()
+        jobs = self.jobs(['a'] * 4)
+        jobs[1]['fail'] = jobs[3]['fail'] = True
+        try:
+            run_jobs(recorder, jobs, 4)
+        except ValueError as e:
+            assert sorted(recorder.done) == range(4), 'other jobs should have finished first'
+            assert e.args == (1,), 'error of the first failed job should be raised'
+            raise
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals, division, absolute_import
 from tests import FlexGetBase
+from flexget.utils import qualities
 from flexget.utils.qualities import Quality
 
 
@@ -14,6 +15,22 @@ class TestQualityModule(object):
             got_val = Quality(test_val).name
             assert got_val == '720p', got_val
 
+    def test_memoized(self):
+        first = Quality('Test.File.720p.hdtv')
+        second = Quality('Test.File.720p.hdtv')
+        assert first is not second, 'parsed qualities should not be shared'
+        second.resolution = qualities.get('1080p').resolution
+        assert second > first, 'changing a component should change ordering'
+        assert Quality('Test.File.720p.hdtv') == '720p hdtv', 'cached result should not be modified'
+        assert Quality('Test.File.720p.hdtv').clean_text == 'Test.File..'
+
+    def test_comparator(self):
+        assert Quality('720p cam') < '480p hdtv', 'modifiers should sort before everything else'
+        assert Quality('720p hdtv') < '720p hdtv ac3'
+        assert Quality('720p hdtv ac3') < '720p hdtv h264'
+        assert '720p' in Quality('720p hdtv ac3')
+        assert qualities.get('720p') == '720p'
+
 
 class TestQualityParser(object):
 
@@ -18,3 +18,32 @@ class TestRememberRejected(FlexGetBase):
         self.execute_task('test')
         assert self.task.find_entry('rejected', title='title 1', rejected_by='remember_rejected'),\
             'remember_rejected should have rejected'
+
+
+
+class TestRememberRejectedBatch(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'title 1', url: 'http://localhost/title1'}
+              - {title: 'title 1', url: 'http://localhost/title1'}
+              - {title: 'title 2', url: 'http://localhost/title2'}
+            only_new: yes
+    """
+
+    def test_remember_once(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.remember_rejected import RememberEntry
+        self.execute_task('test')
+        session = Session()
+        try:
+            assert session.query(RememberEntry).count() == 2, 'duplicate rejections should be remembered once'
+        finally:
+            session.close()
+        self.execute_task('test')
+        assert len(self.task.rejected) == 3
+        for entry in self.task.rejected:
+            assert entry['rejected_by'] == 'remember_rejected', '%s should have been rejected by remember_rejected' % \
+                entry['title']
@@ -0,0 +1,208 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from StringIO import StringIO
+
+from flexget import plugin
+from flexget.event import event
+from flexget.scheduler import capture_output
+from tests import FlexGetBase
+
+runs = []
+urls = {}
+
+
+class SlowPlugin(object):
+    """Records when each task ran, and in which thread."""
+
+    def on_task_input(self, task, config):
+        start = time.time()
+        time.sleep(config)
+        runs.append((task.name, threading.current_thread().name, start, time.time()))
+
+
+class UrlRecorder(object):
+    """Records the urls of accepted entries of each task."""
+
+    def on_task_output(self, task, config):
+        urls[task.name] = [entry['url'] for entry in task.accepted]
+
+
+class PrefixRewriter(object):
+
+    def url_rewritable(self, task, entry):
+        return entry['url'].startswith('http://prefix.test/page/')
+
+    def url_rewrite(self, task, entry):
+        entry['url'] = entry['url'].replace('/page/', '/download/')
+
+
+@event('plugin.register')
+def register():
+    plugin.register(SlowPlugin, 'slow', debug=True, api_ver=2)
+    plugin.register(UrlRecorder, 'record_urls', debug=True, api_ver=2)
+
+
+def overlap(first, second):
+    return first[2] < second[3] and second[2] < first[3]
+
+
+class SchedulerTestBase(FlexGetBase):
+    """Runs tasks from worker threads, which needs a database file."""
+
+    def setup(self):
+        # Each worker thread gets its own connection, which would be a separate in-memory database
+        self.db_dir = tempfile.mkdtemp()
+        self.database_uri = 'sqlite:///%s' % os.path.join(self.db_dir, 'test.sqlite').replace('\\', '\\\\')
+        del runs[:]
+        urls.clear()
+        super(SchedulerTestBase, self).setup()
+
+    def teardown(self):
+        try:
+            super(SchedulerTestBase, self).teardown()
+        finally:
+            shutil.rmtree(self.db_dir, ignore_errors=True)
+
+    def run_workers(self, workers=2):
+        # First runs write the new config to the database, which serializes tasks. Get that out of the way.
+        for task in self.manager.tasks:
+            self.execute_task(task)
+        del runs[:]
+        urls.clear()
+        scheduler = self.manager.scheduler
+        scheduler.execute()
+        scheduler.start(run_schedules=False, workers=workers)
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+
+
+class TestSchedulerWorkers(SchedulerTestBase):
+
+    __yaml__ = """
+        templates:
+          other_group:
+            exclusive_group: [other]
+        tasks:
+          free_1:
+            slow: 0.5
+          free_2:
+            slow: 0.5
+          grouped_1:
+            slow: 0.2
+            exclusive_group: client
+          grouped_2:
+            slow: 0.2
+            exclusive_group: [client]
+            template: other_group
+    """
+
+    def test_get_job(self):
+        scheduler = self.manager.scheduler
+        scheduler.execute()
+        jobs = dict((job.task, job) for job in scheduler.run_queue.queue)
+        assert jobs['grouped_2'].groups == set(['client', 'other']), 'groups from templates should be used'
+        started = [scheduler.get_job(timeout=0) for _ in range(4)]
+        assert None not in started[:3], 'free tasks and one grouped task should start'
+        assert started[3] is None, 'second grouped task must wait for the first'
+        grouped = [job for job in started[:3] if job.groups][0]
+        scheduler.finish_job(grouped)
+        assert grouped.finished_event.is_set()
+        assert scheduler.get_job(timeout=0).task != grouped.task
+        # Same task twice never runs at the same time
+        scheduler.execute(options={'tasks': ['free_1']})
+        assert scheduler.get_job(timeout=0) is None
+
+    def test_workers(self):
+        self.run_workers()
+        assert len(runs) == 4, 'all tasks should have run: %s' % runs
+        by_task = dict((run[0], run) for run in runs)
+        assert overlap(by_task['free_1'], by_task['free_2']), 'free tasks should have run at the same time'
+        assert by_task['free_1'][1] != by_task['free_2'][1]
+        assert not overlap(by_task['grouped_1'], by_task['grouped_2']), 'grouped tasks must not run together'
+
+
+class TestSchedulerTaskState(SchedulerTestBase):
+
+    __yaml__ = """
+        templates:
+          global:
+            accept_all: yes
+            record_urls: yes
+            disable_builtins: [seen]
+        tasks:
+          disabled:
+            mock:
+              - {title: 'disabled', url: 'http://prefix.test/page/disabled'}
+            disable_urlrewriters: [test_prefix_rewriter]
+            slow: 1
+          enabled:
+            mock:
+              - {title: 'enabled', url: 'http://prefix.test/page/enabled'}
+            slow: 0.2
+    """
+
+    def setup(self):
+        super(TestSchedulerTaskState, self).setup()
+        plugin.register(PrefixRewriter, 'test_prefix_rewriter', groups=['urlrewriter'], debug=True,
+                        api_ver=2).initialize()
+
+    def teardown(self):
+        del plugin.plugins['test_prefix_rewriter']
+        super(TestSchedulerTaskState, self).teardown()
+
+    def test_disable_urlrewriters(self):
+        self.run_workers()
+        by_task = dict((run[0], run) for run in runs)
+        assert overlap(by_task['disabled'], by_task['enabled']), 'tasks should have run at the same time'
+        assert urls['disabled'] == ['http://prefix.test/page/disabled']
+        assert urls['enabled'] == ['http://prefix.test/download/enabled'], \
+            'rewriter disabled in another running task should not be disabled'
+
+
+class TestCaptureOutput(object):
+
+    def test_threads(self):
+        outputs = {}
+
+        def job(name):
+            outputs[name] = StringIO()
+            with capture_output(outputs[name]):
+                for _ in range(20):
+                    sys.stdout.write('%s\n' % name)
+                    time.sleep(0.001)
+
+        old_stdout, old_stderr = sys.stdout, sys.stderr
+        try:
+            threads = [threading.Thread(target=job, args=(name,)) for name in ('a', 'b')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.stdout, sys.stderr = old_stdout, old_stderr
+        assert outputs['a'].getvalue() == 'a\n' * 20
+        assert outputs['b'].getvalue() == 'b\n' * 20
+
+    def test_task_threads(self):
+        from flexget import logger
+        output = StringIO()
+        log = logging.getLogger('test_capture')
+
+        def worker(task):
+            logger.set_task(task)
+            log.info('from %s' % task)
+            logger.set_task('')
+
+        with capture_output(output, 'capture'):
+            for task in ('capture', 'other'):
+                thread = threading.Thread(target=worker, args=(task,))
+                thread.start()
+                thread.join()
+        assert 'from capture' in output.getvalue(), 'messages of worker threads for the task should be captured'
+        assert 'from other' not in output.getvalue()
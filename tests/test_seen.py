@@ -1,4 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
+import os
+import shutil
+import sqlite3
+import tempfile
+
 from tests import FlexGetBase
 
 
@@ -133,3 +138,214 @@ class TestFilterSeenMovies(FlexGetBase):
         self.execute_task('strict')
         assert len(self.task.rejected) == 1, 'Too many movies were rejected'
         assert not self.task.find_entry(title='Seen movie title 10'), 'strict should not have passed movie 10'
+
+
+class TestSeenIndex(FlexGetBase):
+
+    __yaml__ = """
+        seen_index: yes
+        templates:
+          global:
+            accept_all: true
+
+        tasks:
+          test:
+            mock:
+              - {title: 'Seen title 1', url: 'http://localhost/seen1'}
+
+          test2:
+            mock:
+              - {title: 'Seen title 2', url: 'http://localhost/seen1'} # duplicate by url
+              - {title: 'Seen title 3', url: 'http://localhost/seen3'} # new
+    """
+
+    def test_index(self):
+        from flexget.plugins.cli.performance import counters
+        from flexget.plugins.filter.seen import seen_index
+
+        self.execute_task('test')
+        assert self.task.find_entry('accepted', title='Seen title 1'), 'Test entry missing'
+        assert 'Seen title 1' in seen_index, 'learned value should be in the index'
+        misses = counters.get('seen_index miss', 0)
+        self.execute_task('test2')
+        assert self.task.find_entry('rejected', title='Seen title 2'), 'entry with seen url should be rejected'
+        assert self.task.find_entry('accepted', title='Seen title 3'), 'new entry should be accepted'
+        assert counters.get('seen_index miss', 0) == misses + 1, 'new entry should miss the index'
+
+    def test_forget(self):
+        from flexget.plugins.filter.seen import forget
+
+        self.execute_task('test')
+        forget('Seen title 1')
+        self.execute_task('test')
+        assert self.task.find_entry('accepted', title='Seen title 1'), 'forgotten entry should be accepted'
+        self.execute_task('test2')
+        assert self.task.find_entry('rejected', title='Seen title 2'), 'entry with seen url should be rejected'
+
+    def test_snapshot(self):
+        import os
+        import tempfile
+        from flexget.plugins.filter.seen import SeenIndex
+
+        index = SeenIndex()
+        index.add('http://localhost/seen1')
+        index.max_id = index.count = 1
+        handle, filename = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            index.save(filename)
+            loaded = SeenIndex()
+            loaded.load(filename)
+        finally:
+            os.remove(filename)
+        assert 'http://localhost/seen1' in loaded
+        assert 'http://localhost/seen2' not in loaded
+        assert (loaded.max_id, loaded.count) == (1, 1)
+
+    def test_ids_not_reused(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.seen import SeenEntry, SeenField, forget, seen_index
+
+        self.execute_task('test')
+        session = Session()
+        try:
+            highest = session.query(SeenField.id).order_by(SeenField.id.desc()).first()[0]
+            seen_index.sync(self.manager, session)
+        finally:
+            session.close()
+        # Another process forgets the newest rows and adds as many new ones
+        forget('Seen title 1')
+        session = Session()
+        try:
+            for i in range(2):
+                entry = SeenEntry('Other title %s' % i, 'other')
+                entry.fields.append(SeenField('title', 'Other title %s' % i))
+                session.add(entry)
+            session.commit()
+            assert session.query(SeenField.id).order_by(SeenField.id).first()[0] > highest, \
+                'ids of removed fields should not be reused'
+            seen_index.sync(self.manager, session)
+        finally:
+            session.close()
+        assert 'Other title 1' in seen_index, 'value added by another process should be in the index'
+
+
+class SeenFileTestBase(FlexGetBase):
+    """Uses a database file, so the seen index can keep a snapshot next to it."""
+
+    __yaml__ = """
+        seen_index: yes
+        tasks:
+          test:
+            mock:
+              - {title: 'Seen title 1', url: 'http://localhost/seen1'}
+            accept_all: yes
+    """
+
+    def setup(self):
+        self.db_dir = tempfile.mkdtemp()
+        self.db_filename = os.path.join(self.db_dir, 'test.sqlite')
+        self.database_uri = 'sqlite:///%s' % self.db_filename.replace('\\', '\\\\')
+        self.prepare_database()
+        super(SeenFileTestBase, self).setup()
+
+    def prepare_database(self):
+        pass
+
+    def teardown(self):
+        try:
+            super(SeenFileTestBase, self).teardown()
+        finally:
+            shutil.rmtree(self.db_dir, ignore_errors=True)
+
+
+class TestSeenIndexSnapshot(SeenFileTestBase):
+
+    def setup(self):
+        super(TestSeenIndexSnapshot, self).setup()
+        # Snapshots are kept next to the database file, which the manager only knows when it picked the file
+        self.manager.db_filename = self.db_filename
+
+    def restart_index(self, session):
+        from flexget.plugins.filter.seen import SeenIndex, seen_index
+
+        seen_index.sync(self.manager, session)
+        seen_index.save(SeenIndex.snapshot_path(self.manager))
+        # Forget the database, like a new process would
+        seen_index.database_uri = None
+        seen_index.clear()
+        seen_index.sync(self.manager, session)
+        return seen_index
+
+    def test_snapshot_loaded(self):
+        from flexget.manager import Session
+
+        self.execute_task('test')
+        session = Session()
+        try:
+            index = self.restart_index(session)
+        finally:
+            session.close()
+        assert 'Seen title 1' in index, 'snapshot should have been loaded'
+        assert not index.dirty, 'index should not have been rebuilt'
+
+    def test_snapshot_out_of_sync(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.seen import SeenEntry, SeenField
+
+        self.execute_task('test')
+        session = Session()
+        try:
+            self.restart_index(session)
+            # Another process removes the rows while the snapshot is not in use
+            session.query(SeenField).delete()
+            session.query(SeenEntry).delete()
+            session.commit()
+            index = self.restart_index(session)
+        finally:
+            session.close()
+        assert 'Seen title 1' not in index, 'index should have been rebuilt from the database'
+        assert index.count == 0
+
+
+class TestSeenUpgrade(SeenFileTestBase):
+
+    def prepare_database(self):
+        # seen tables as they were at schema version 4
+        db = sqlite3.connect(self.db_filename)
+        db.executescript("""
+            CREATE TABLE plugin_schema (id INTEGER NOT NULL, plugin VARCHAR, version INTEGER, PRIMARY KEY (id));
+            INSERT INTO plugin_schema (plugin, version) VALUES ('seen', 4);
+            CREATE TABLE seen_entry (id INTEGER NOT NULL, title VARCHAR, reason VARCHAR, feed VARCHAR,
+                added DATETIME, local BOOLEAN, PRIMARY KEY (id));
+            CREATE TABLE seen_field (id INTEGER NOT NULL, seen_entry_id INTEGER NOT NULL, field VARCHAR,
+                value VARCHAR, added DATETIME, PRIMARY KEY (id), FOREIGN KEY(seen_entry_id) REFERENCES seen_entry (id));
+            CREATE INDEX ix_seen_field_seen_entry_id ON seen_field (seen_entry_id);
+            CREATE INDEX ix_seen_field_value ON seen_field (value);
+            INSERT INTO seen_entry VALUES (1, 'Seen title 1', NULL, 'test', '2014-01-01 00:00:00.000000', 0);
+            INSERT INTO seen_field VALUES (1, 1, 'title', 'Seen title 1', '2014-01-01 00:00:00.000000');
+            INSERT INTO seen_field VALUES (3, 1, 'url', 'http://localhost/seen1', '2014-01-01 00:00:00.000000');
+        """)
+        db.commit()
+        db.close()
+
+    def test_upgrade(self):
+        from flexget.db_schema import get_version
+
+        assert get_version('seen') == 5
+        db = sqlite3.connect(self.db_filename)
+        try:
+            rows = db.execute('SELECT id, seen_entry_id, field, value FROM seen_field ORDER BY id').fetchall()
+            sql = db.execute("SELECT sql FROM sqlite_master WHERE name = 'seen_field'").fetchone()[0]
+            indexes = set(name for (name,) in db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'seen_field'"))
+            tables = set(name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        finally:
+            db.close()
+        assert rows == [(1, 1, 'title', 'Seen title 1'), (3, 1, 'url', 'http://localhost/seen1')], \
+            'rows should survive the upgrade'
+        assert 'AUTOINCREMENT' in sql
+        assert set(['ix_seen_field_seen_entry_id', 'ix_seen_field_value']) <= indexes, 'indexes should be recreated'
+        assert 'seen_field_old' not in tables
+        self.execute_task('test')
+        assert self.task.find_entry('rejected', title='Seen title 1'), 'upgraded values should still be seen'
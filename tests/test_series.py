@@ -326,6 +326,59 @@ class TestFilterSeries(FlexGetBase):
         assert all(e.accepted for e in self.task.all_entries), 'All releases should have matched a show'
 
 
+class TestSeriesNameRouting(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'The.Show.S01E01.720p.HDTV'}
+              - {title: 'Show.S01E02'}
+              - {title: 'The.Show.US.S01E03'}
+              - {title: '[Group] Foo Bar - 05'}
+              - {title: 'FooBar.S02E01'}
+              - {title: 'Foo.S02E02'}
+              - {title: 'Mike.and.Molly.S04E01'}
+              - {title: 'Unrelated.Title.S01E01'}
+              - {title: 'Useless title', description: 'Described.Show.S03E01'}
+              - {title: 'Weird.Name.Custom.S01E01'}
+            series:
+              - The Show
+              - Show
+              - The Show (US)
+              - Foo Bar
+              - Foo
+              - Mike & Molly
+              - Described Show
+              - Custom:
+                  name_regexp: '^weird.name.custom'
+    """
+
+    def parsed(self):
+        return dict((e['title'], (e.get('series_name'), e.get('series_id'))) for e in self.task.all_entries)
+
+    def test_same_as_full_scan(self):
+        """Series plugin: name index parses the same as trying every series"""
+        from mock import patch
+        from flexget.plugins.filter.series import FilterSeries
+
+        self.execute_task('test')
+        routed = self.parsed()
+        assert routed['Unrelated.Title.S01E01'] == (None, None)
+        assert routed['Weird.Name.Custom.S01E01'] == ('Custom', 'S01E01')
+        assert routed['Useless title'] == ('Described Show', 'S03E01')
+
+        def all_candidates(self, index, entry):
+            return index.always | set(key for keys in index.words.values() for key in keys)
+
+        # run again with a fresh database, trying every series on every entry
+        self.teardown()
+        self.setup()
+        with patch.object(FilterSeries, 'entry_candidates', all_candidates):
+            self.execute_task('test')
+        assert self.parsed() == routed, 'name index changed parsing results'
+
+
 class TestEpisodeAdvancement(FlexGetBase):
 
     __yaml__ = """
@@ -1715,3 +1768,126 @@ class TestReruns(FlexGetBase):
         self.execute_task('one_accept')
         assert len(self.task.mock_output) == 1, \
             'should have accepted once!: %s' % ', '.join(e['title'] for e in self.task.mock_output)
+
+
+class TestSeriesProgress(FlexGetBase):
+    __yaml__ = """
+        templates:
+          global:
+            series:
+              - some show
+            disable_builtins: [seen]
+        tasks:
+          first:
+            mock:
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet'}
+              - {title: 'Some.Show.S01E01.HDTV-FlexGet'}
+          second:
+            mock:
+              - {title: 'Some.Show.S01E02.PROPER.HDTV-FlexGet'}
+          newer:
+            mock:
+              - {title: 'Some.Show.S01E03.HDTV-FlexGet'}
+            series:
+              - some show:
+                  quality: 1080p
+    """
+
+    def get_progress(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.series import Series, SeriesProgress
+        session = Session()
+        try:
+            progress = session.query(SeriesProgress).join(Series, Series.id == SeriesProgress.series_id).\
+                filter(Series.name == 'some show').one()
+            return progress.identifier, progress.status, progress.behind, progress.last_seen is not None
+        finally:
+            session.close()
+
+    def test_progress(self):
+        self.execute_task('first')
+        assert self.get_progress() == ('S01E01', '720p hdtv', 0, True)
+        self.execute_task('second')
+        assert self.get_progress() == ('S01E02', 'hdtv-proper', 0, True)
+        self.execute_task('newer')
+        assert not self.task.accepted
+        assert self.get_progress() == ('S01E02', 'hdtv-proper', 1, True), 'newer episodes should be counted'
+
+    def test_forget(self):
+        from flexget.plugins.filter.series import forget_series_episode
+        self.execute_task('first')
+        self.execute_task('second')
+        forget_series_episode('some show', 'S01E02')
+        assert self.get_progress() == ('S01E01', '720p hdtv', 0, True), 'progress should follow forgotten episodes'
+
+    def test_rebuild(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.series import SeriesProgress, rebuild_progress
+        self.execute_task('first')
+        expected = self.get_progress()
+        session = Session()
+        try:
+            session.query(SeriesProgress).delete()
+            rebuild_progress(session)
+            session.commit()
+        finally:
+            session.close()
+        assert self.get_progress() == expected
+
+
+class TestBulkStore(FlexGetBase):
+    __yaml__ = """
+        tasks: {}
+    """
+
+    def parse(self, name, title):
+        from flexget.utils.titles import SeriesParser
+        parser = SeriesParser(name=name, identified_by='ep')
+        parser.parse(title)
+        return parser
+
+    def store(self, name, count):
+        """
+        Stores `count` releases for series `name`, then stores an existing release, a proper, a new quality and a new
+        episode for each of them through the preloaded maps. Returns the queries taken, the ids of the first releases,
+        and the releases stored through the maps.
+        """
+        from flexget.manager import Session
+        from flexget.plugins.filter.series import load_series, load_episodes, store_parser, normalize_series_name
+        from tests.benchmarks import QueryCounter
+        session = Session()
+        try:
+            existing = [store_parser(session, self.parse(name, '%s S01E%02d 720p' % (name, i + 1)))[0]
+                        for i in range(count)]
+            session.commit()
+            existing_ids = [release.id for release in existing]
+
+            parsers = []
+            for i in range(count):
+                for title in ('S01E%02d 720p', 'S01E%02d 720p PROPER', 'S01E%02d 1080p', 'S02E%02d 720p'):
+                    parsers.append(self.parse(name, '%s %s' % (name, title % (i + 1))))
+            with QueryCounter(self.manager.engine) as counter:
+                series = load_series(session, [name])[normalize_series_name(name)]
+                episodes = load_episodes(session, [(series, parser) for parser in parsers])
+                with session.no_autoflush:
+                    stored = [store_parser(session, parser, series=series, episodes=episodes)[0]
+                              for parser in parsers]
+            session.flush()
+            return counter.count, existing_ids, [(r.id, r.episode.identifier, r.title, r.proper_count) for r in stored]
+        finally:
+            session.close()
+
+    def test_query_count(self):
+        small, _, _ = self.store('Small Show', 3)
+        large, existing_ids, stored = self.store('Large Show', 30)
+        assert small == large, 'store step took %s queries for 3 episodes, but %s for 30' % (small, large)
+
+        ids = set()
+        for i in range(30):
+            existing, proper, quality, new_episode = stored[i * 4:i * 4 + 4]
+            assert existing[0] == existing_ids[i], 'existing release should have been found from the loaded episodes'
+            assert proper[1] == 'S01E%02d' % (i + 1) and proper[3] == 1
+            assert quality[1] == 'S01E%02d' % (i + 1) and quality[3] == 0
+            assert new_episode[1] == 'S02E%02d' % (i + 1)
+            ids.update(release[0] for release in (proper, quality, new_episode))
+        assert len(ids) == 90 and not ids & set(existing_ids), 'propers and new releases should be stored as new rows'
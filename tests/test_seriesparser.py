@@ -2,7 +2,7 @@
 
 from __future__ import unicode_literals, division, absolute_import
 from nose.tools import assert_raises, raises
-from flexget.utils.titles import SeriesParser, ParseWarning
+from flexget.utils.titles import SeriesParser, SeriesNameIndex, ParseWarning, get_parser
 
 #
 # NOTE:
@@ -632,3 +632,71 @@ class TestSeriesParser(object):
         assert s.valid
         s.parse('Not The Show S01E01')
         assert not s.valid
+
+
+class TestParserCache(object):
+
+    def test_get_parser(self):
+        """SeriesParser: cached parsers share compiled regexps but not parse state"""
+        first = get_parser(name='Show (US)', alternate_names=['The Show'])
+        second = get_parser(name='Show (US)', alternate_names=['The Show'])
+        assert first is not second
+        assert first.name_regexps is second.name_regexps, 'compiled regexps should be shared'
+        assert first.strict_name, 'name with parenthetical should enable strict name'
+        first.parse('Show.US.S01E02')
+        second.parse('The.Show.S03E04')
+        assert (first.valid, first.identifier) == (True, 'S01E02')
+        assert (second.valid, second.identifier) == (True, 'S03E04')
+        other = get_parser(name='Show (US)', alternate_names=['Other Show'])
+        assert other.name_regexps is not first.name_regexps, 'different config should not share parser'
+        other.parse('Other.Show.S01E01')
+        assert other.valid
+
+
+class TestSeriesNameIndex(object):
+
+    names = ['The Show', 'Show', 'Foo Bar', 'Foo', 'FlexGet\'s show', 'Mike & Molly', 'Show (US)', 'Show (UK)',
+             'V', '24', 'Doctor Who (2005)', 'CSI: NY', 'Marvel\'s Agents of S.H.I.E.L.D.', 'R\xe9sum\xe9',
+             'AT&T Show']
+    titles = ['The.Show.S01E01.720p.HDTV', 'The Show - 1x02', 'Show.S01E02', 'Show.US.S01E03', 'Show (UK) S01E01',
+              'Foo.Bar.S02E01', 'FooBar.S02E01', 'Foo S02E02', 'Foo_Bar_S02E02', 'Foobar S01E01',
+              'FlexGets.show.s01e01', 'FlexGet.s.show.s01e01', 'Mike.and.Molly.S04E01', 'Mike & Molly 4x01',
+              'V.2009.S01E01', 'V S01E01', '24.S08E01', '[Group] Show - 03 [720p]', 'HD.720p: The Show S01E01',
+              'Doctor.Who.2005.S07E01', 'Doctor Who S07E01', 'CSI.NY.S09E01', 'Marvels.Agents.of.S.H.I.E.L.D.S01E01',
+              'R\xc9SUM\xc9 S01E01', 'The Other Show S01E01', 'Something Else 2013-01-01', 'AT&T.Show.S01E01',
+              '.Show.S01E04', '', 'S01E01']
+
+    def test_candidates(self):
+        """SeriesNameIndex: candidates contain every series parser that matches"""
+        index = SeriesNameIndex()
+        for name in self.names:
+            index.add(name, [name])
+        for title in self.titles:
+            candidates = index.candidates(title)
+            for name in self.names:
+                parser = SeriesParser(name)
+                try:
+                    parser.parse(title or 'x')
+                except ParseWarning:
+                    matched = True
+                else:
+                    matched = parser.valid
+                if matched:
+                    assert name in candidates, '%s should be a candidate for %s' % (name, title)
+
+    def test_pruning(self):
+        """SeriesNameIndex: unrelated series are not candidates"""
+        index = SeriesNameIndex()
+        for name in self.names:
+            index.add(name, [name])
+        assert index.candidates('The Other Show S01E01') == set(['The Show'])
+        assert index.candidates('Something Else 2013-01-01') == set()
+        assert index.candidates('[Group] Show - 03') == set(['Show', 'Show (US)', 'Show (UK)'])
+
+    def test_alternate_names_and_regexps(self):
+        """SeriesNameIndex: alternate names and custom regexps"""
+        index = SeriesNameIndex()
+        index.add('The Show', ['The Show', 'Completely Different'])
+        index.add('Regexp', ['Regexp'], name_regexps=['.*regexp'])
+        assert index.candidates('Completely.Different.S01E01') == set(['The Show', 'Regexp'])
+        assert index.candidates('Unrelated S01E01') == set(['Regexp'])
@@ -1,10 +1,28 @@
 from __future__ import unicode_literals, division, absolute_import
 
+from flexget import plugin
+from flexget.event import event
 from flexget.manager import Session
 from flexget.utils.simple_persistence import SimplePersistence
 from tests import FlexGetBase
 
 
+class PersistCounter(object):
+    """Counts task runs in task.simple_persistence, aborts the task after counting if configured so."""
+
+    schema = {'type': 'string', 'enum': ['count', 'abort']}
+
+    def on_task_input(self, task, config):
+        task.simple_persistence['runs'] = task.simple_persistence.get('runs', 0) + 1
+        if config == 'abort':
+            task.abort('persist_counter abort')
+
+
+@event('plugin.register')
+def register():
+    plugin.register(PersistCounter, 'persist_counter', debug=True, api_ver=2)
+
+
 class TestSimplePersistence(FlexGetBase):
 
     __yaml__ = """
@@ -12,6 +30,10 @@ class TestSimplePersistence(FlexGetBase):
           test:
             mock:
               - {title: 'irrelevant'}
+          count:
+            persist_counter: count
+          abort:
+            persist_counter: abort
     """
 
     def test_setdefault(self):
@@ -40,3 +62,19 @@ class TestSimplePersistence(FlexGetBase):
         # Make sure it didn't commit or close our session
         session.rollback()
         assert 'aoeu' not in persist
+
+    def test_task_commit(self):
+        self.execute_task('count')
+        self.execute_task('count')
+        persist = SimplePersistence('persist_counter')
+        persist.taskname = 'count'
+        assert persist['runs'] == 2, 'values should be written when the task commits'
+
+    def test_task_abort(self):
+        self.execute_task('count')
+        self.execute_task('abort', abort_ok=True)
+        persist = SimplePersistence('persist_counter')
+        persist.taskname = 'abort'
+        assert 'runs' not in persist, 'changes should be discarded when the task aborts'
+        persist.taskname = 'count'
+        assert persist['runs'] == 1
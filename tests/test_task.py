@@ -0,0 +1,153 @@
+from __future__ import unicode_literals, division, absolute_import
+
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.event import event
+from flexget.task import get_execution_plan
+from tests import FlexGetBase
+
+started = []
+inputs = []
+
+
+class StartRecorder(object):
+    """Records tasks in which its start phase ran."""
+
+    @plugin.priority(100)
+    def on_task_start(self, task, config):
+        started.append(task.name)
+
+
+class CountingInput(object):
+    """Produces one entry, and records each time it was run."""
+
+    def on_task_input(self, task, config):
+        inputs.append(task.name)
+        return [Entry('entry %s' % len(inputs), 'http://localhost/%s' % len(inputs))]
+
+
+@event('plugin.register')
+def register():
+    plugin.register(StartRecorder, 'start_recorder', debug=True, api_ver=2)
+    plugin.register(CountingInput, 'counting_input', groups=['reusable_input'], debug=True, api_ver=2)
+    plugin.register(CountingInput, 'changing_input', debug=True, api_ver=2)
+
+
+class TestExecutionPlan(FlexGetBase):
+
+    __yaml__ = """
+        templates:
+          recorded:
+            start_recorder: yes
+        tasks:
+          test:
+            mock:
+              - {title: 'entry'}
+            accept_all: yes
+          template:
+            template: recorded
+            mock:
+              - {title: 'entry'}
+    """
+
+    def setup(self):
+        del started[:]
+        super(TestExecutionPlan, self).setup()
+
+    def test_plan_cached(self):
+        plan = get_execution_plan({'mock': [], 'accept_all': True})
+        assert get_execution_plan({'accept_all': True, 'mock': []}) is plan, 'plan should be shared by equal configs'
+        assert 'accept_all' in [p.name for _, p in plan['filter']]
+        handler = plugin.get_plugin_by_name('accept_all').phase_handlers['filter']
+        original = handler.priority
+        try:
+            handler.priority = original + 1
+            assert get_execution_plan({'mock': [], 'accept_all': True}) is not plan, \
+                'priority change should rebuild plan'
+        finally:
+            handler.priority = original
+        self.execute_task('test')
+        assert self.task.accepted
+
+    def test_per_task_settings(self):
+        plan = get_execution_plan({'mock': [], 'disable_builtins': ['seen'], 'plugin_priority': {'mock': 300}})
+        assert 'seen' not in [p.name for _, p in plan['filter']]
+        assert 'seen' in [p.name for _, p in get_execution_plan({'mock': []})['filter']], \
+            'other tasks should keep the builtin'
+        assert plugin.get_plugin_by_name('seen').builtin
+        assert plan['input'][0][1].name == 'mock'
+        assert plugin.get_plugin_by_name('mock').phase_handlers['input'].priority != 300, \
+            'priority override should not change the plugin'
+
+    def test_plugin_added_during_phase(self):
+        # template runs in start phase before start_recorder, which it adds to the config
+        self.execute_task('template')
+        assert started == ['template'], 'plugin added by template should run in the same phase'
+
+
+class TestRerunInput(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          reuse:
+            counting_input: yes
+            rerun: 2
+            disable_builtins: yes
+            accept_all: yes
+            set:
+              path: /changed
+          rerun_input:
+            changing_input: yes
+            rerun: 2
+          nested_input:
+            inputs:
+              - counting_input: yes
+              - changing_input: yes
+            rerun: 2
+          series_history:
+            mock:
+              - {title: 'Test Series S01E02', url: 'http://localhost/Test.Series.S01E02'}
+            series:
+              - Test Series:
+                  identified_by: ep
+          emit_series:
+            inputs:
+              - emit_series: yes
+            series:
+              - Test Series:
+                  identified_by: ep
+            regexp:
+              reject:
+                - Test Series
+    """
+
+    def setup(self):
+        del inputs[:]
+        super(TestRerunInput, self).setup()
+
+    def test_reuse_input(self):
+        self.execute_task('reuse')
+        assert self.task._rerun_count == 2
+        assert inputs == ['reuse'], 'inputs should not run again on reruns'
+        entry = self.task.find_entry(title='entry 1')
+        assert entry, 'entries from first run should be restored'
+        assert entry['path'] == '/changed'
+        assert entry.snapshots['after_input'].get('path') is None, 'snapshot should not be modified by reruns'
+
+    def test_not_reusable_input(self):
+        self.execute_task('rerun_input')
+        assert self.task._rerun_count == 2
+        assert inputs == ['rerun_input'] * 3, 'input not in reusable_input group should run on every rerun'
+        assert self.task.find_entry(title='entry 3')
+
+    def test_nested_input(self):
+        self.execute_task('nested_input')
+        assert self.task._rerun_count == 2
+        assert inputs == ['nested_input'] * 6, 'inputs should run on every rerun when one under inputs is not reusable'
+
+    def test_emit_series_next_season(self):
+        self.execute_task('series_history')
+        self.execute_task('emit_series')
+        assert self.task._rerun_count == 1
+        assert self.task.find_entry('rejected', title='Test Series S02E01'), \
+            'emit_series should run again on rerun and try the next season'
@@ -1,9 +1,17 @@
 from __future__ import unicode_literals, division, absolute_import
 import os
+import struct
+import threading
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import BaseRequestHandler, UDPServer
+from urlparse import urlparse, parse_qs
 
 from nose.plugins.attrib import attr
 from tests import FlexGetBase, with_filecopy
-from flexget.utils.bittorrent import Torrent
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.plugins.filter.torrent_alive import seed_cache, single_hash_trackers
+from flexget.utils.bittorrent import Torrent, bencode
 
 
 class TestInfoHash(FlexGetBase):
@@ -312,6 +320,139 @@ class TestTorrentAlive(FlexGetBase):
         assert get_udp_seeds('udp://127.0.0.1:PORT/announce','HASH') == 0
         assert get_udp_seeds('udp://127.0.0.1:65536/announce','HASH') == 0
 
+
+def make_torrent(name, trackers):
+    info = {'name': name, 'length': 1, 'piece length': 16384, 'pieces': b'x' * 20}
+    return Torrent(bencode({'announce': trackers[0], 'announce-list': [trackers], 'info': info}))
+
+
+class TrackerTorrents(object):
+    """Emits entries with torrents announced to the trackers given for them in config."""
+
+    def on_task_input(self, task, config):
+        return [Entry(title=name, url='http://localhost/%s' % name, torrent=make_torrent(name, trackers))
+                for name, trackers in config.iteritems()]
+
+plugin.register(TrackerTorrents, 'tracker_torrents', api_ver=2, debug=True)
+
+
+class FakeUDPHandler(BaseRequestHandler):
+
+    def handle(self):
+        data, sock = self.request
+        connection_id, action, transaction_id = struct.unpack(b'>QLL', data[:16])
+        if action == 0:
+            sock.sendto(struct.pack(b'>LLQ', 0, transaction_id, 1234), self.client_address)
+            return
+        info_hashes = [data[i:i + 20] for i in range(16, len(data), 20)]
+        self.server.scrapes.append(info_hashes)
+        if self.server.single_only and len(info_hashes) > 1:
+            sock.sendto(struct.pack(b'>LL', 3, transaction_id) + b'multi-scrape not supported', self.client_address)
+            return
+        response = struct.pack(b'>LL', 2, transaction_id)
+        for info_hash in info_hashes:
+            response += struct.pack(b'>LLL', self.server.seeds.get(info_hash, 0), 0, 0)
+        sock.sendto(response, self.client_address)
+
+
+class FakeHTTPHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        info_hashes = parse_qs(urlparse(self.path).query)['info_hash']
+        self.server.scrapes.append(info_hashes)
+        if self.server.single_only and len(info_hashes) > 1:
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(bencode({'failure reason': 'multi-scrape not supported'}))
+            return
+        if self.server.first_only:
+            # Like trackers which ignore all but the first info_hash parameter
+            info_hashes = info_hashes[:1]
+        files = dict((info_hash, {'complete': self.server.seeds.get(info_hash, 0), 'downloaded': 0, 'incomplete': 0})
+                     for info_hash in info_hashes)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(bencode({'files': files}))
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTorrentAliveScrape(FlexGetBase):
+    __yaml__ = """
+        tasks:
+          test:
+            tracker_torrents:
+              alive: ['udp://127.0.0.1:__udp__/announce', 'http://127.0.0.1:__http__/announce']
+              http_alive: ['udp://127.0.0.1:__udp__/announce', 'http://127.0.0.1:__http__/announce']
+              udp_only: ['udp://127.0.0.1:__udp__/announce']
+              dead: ['udp://127.0.0.1:__udp__/announce', 'http://127.0.0.1:__http__/announce']
+            accept_all: yes
+            disable_builtins: [seen]
+            torrent_alive: 2
+    """
+
+    def setup(self):
+        seed_cache.clear()
+        single_hash_trackers.clear()
+        self.trackers = []
+        for server_class, handler in [(UDPServer, FakeUDPHandler), (HTTPServer, FakeHTTPHandler)]:
+            server = server_class(('127.0.0.1', 0), handler)
+            server.scrapes = []
+            server.seeds = {}
+            server.first_only = False
+            server.single_only = False
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            self.trackers.append(server)
+        self.udp, self.http = self.trackers
+        self.__yaml__ = self.__yaml__.replace('__udp__', str(self.udp.server_address[1]))
+        self.__yaml__ = self.__yaml__.replace('__http__', str(self.http.server_address[1]))
+        super(TestTorrentAliveScrape, self).setup()
+
+    def teardown(self):
+        for server in self.trackers:
+            server.shutdown()
+            server.server_close()
+        seed_cache.clear()
+        super(TestTorrentAliveScrape, self).teardown()
+
+    def info_hash(self, name):
+        return make_torrent(name, ['http://localhost']).info_hash.decode('hex')
+
+    def test_scrape(self):
+        self.udp.seeds = {self.info_hash('alive'): 5, self.info_hash('udp_only'): 2, self.info_hash('dead'): 1}
+        self.http.seeds = {self.info_hash('alive'): 1, self.info_hash('http_alive'): 3}
+        self.execute_task('test')
+        assert sorted(e['title'] for e in self.task.accepted) == ['alive', 'http_alive', 'udp_only']
+        assert self.task.find_entry('rejected', title='dead')
+        assert self.task._rerun_count == 1, 'Task should have been rerun after rejecting dead torrent'
+        # All torrents are scraped from each tracker with one request, the rerun is answered from cache
+        assert [len(scrape) for scrape in self.udp.scrapes] == [4]
+        assert [len(scrape) for scrape in self.http.scrapes] == [3]
+
+    def test_partial_answer(self):
+        self.http.first_only = True
+        self.http.seeds = dict((self.info_hash(name), 3) for name in ('alive', 'http_alive', 'dead'))
+        self.udp.seeds = {self.info_hash('udp_only'): 2}
+        self.execute_task('test')
+        assert sorted(e['title'] for e in self.task.accepted) == ['alive', 'dead', 'http_alive', 'udp_only'], \
+            'torrents missing from a partial answer should have been scraped on their own'
+        assert [len(scrape) for scrape in self.http.scrapes] == [3, 1, 1]
+        assert self.task._rerun_count == 0
+
+    def test_refuse_multi_hash(self):
+        self.udp.single_only = self.http.single_only = True
+        self.udp.seeds = {self.info_hash('alive'): 5, self.info_hash('udp_only'): 2, self.info_hash('dead'): 1}
+        self.http.seeds = {self.info_hash('alive'): 1, self.info_hash('http_alive'): 3}
+        self.execute_task('test')
+        assert sorted(e['title'] for e in self.task.accepted) == ['alive', 'http_alive', 'udp_only'], \
+            'torrents should have been scraped one at a time from trackers refusing multi-hash scrapes'
+        assert [len(scrape) for scrape in self.udp.scrapes] == [4, 1, 1, 1, 1]
+        assert [len(scrape) for scrape in self.http.scrapes] == [3, 1, 1, 1]
+        assert self.task._rerun_count == 1
+
 class TestRtorrentMagnet(FlexGetBase):
     __tmp__ = True
     __yaml__ = """
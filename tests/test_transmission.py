@@ -0,0 +1,121 @@
+from __future__ import unicode_literals, division, absolute_import
+from datetime import datetime
+
+from tests import FlexGetBase
+from flexget.plugin import get_plugin_by_name
+from flexget.plugins import plugin_transmission
+
+
+class StubTorrent(object):
+
+    def __init__(self, id, name, status='stopped', leftUntilDone=0, ratio=0):
+        self.id = id
+        self.name = name
+        self.hashString = '%040d' % id
+        self.torrentFile = '/torrents/%s.torrent' % name
+        self.totalSize = 100 * 1024 * 1024
+        self.comment = ''
+        self.downloadDir = '/downloads'
+        self.isFinished = False
+        self.isPrivate = False
+        self.trackers = [{'announce': 'http://tracker/announce'}]
+        self.status = status
+        self.leftUntilDone = leftUntilDone
+        self.ratio = ratio
+        self.date_done = datetime.now()
+
+
+class StubClient(object):
+    """Stands in for a transmissionrpc client, remembering the requests it got."""
+
+    def __init__(self, torrents, files):
+        self.torrents = torrents
+        self.files = files
+        self.info_calls = 0
+        self.files_calls = []
+        self.removed = []
+
+    def info(self, arguments=None):
+        self.info_calls += 1
+        return dict((torrent.id, torrent) for torrent in self.torrents)
+
+    def get_files(self, ids):
+        self.files_calls.append(sorted(ids))
+        return dict((id, self.files.get(id, {})) for id in ids)
+
+    def remove(self, ids):
+        self.removed.extend(ids)
+
+
+def file_info(name, size, completed=None, selected=True):
+    return {'name': name, 'size': size, 'completed': size if completed is None else completed, 'selected': selected}
+
+
+class TestTransmission(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'placeholder'}
+    """
+
+    config = {'host': 'stub', 'port': 9091}
+
+    def setup(self):
+        FlexGetBase.setup(self)
+        self.execute_task('test')
+        torrents = [
+            # Wanted files are all done, even though unwanted ones are not
+            StubTorrent(1, 'Partly Wanted', leftUntilDone=0),
+            StubTorrent(2, 'Downloading', status='downloading', leftUntilDone=5),
+            # One file is most of the torrent
+            StubTorrent(3, 'Single Big File'),
+            # No file is more than 90% of the torrent
+            StubTorrent(4, 'Even Files'),
+            StubTorrent(5, 'Seeding', status='seeding', ratio=2)]
+        files = {
+            1: {0: file_info('Partly Wanted/movie.mkv', 95), 1: file_info('sample.mkv', 5, 0, selected=False)},
+            3: {0: file_info('Single Big File/movie.mkv', 95), 1: file_info('Single Big File/info.nfo', 5)},
+            4: {0: file_info('Even Files/cd1.avi', 50), 1: file_info('Even Files/cd2.avi', 50)}}
+        self.client = StubClient(torrents, files)
+        plugin_transmission._clients[plugin_transmission.client_key(self.config)] = self.client
+
+    def teardown(self):
+        plugin_transmission._clients.clear()
+        plugin_transmission._snapshots.clear()
+        FlexGetBase.teardown(self)
+
+    def from_transmission(self, **config):
+        instance = get_plugin_by_name('from_transmission').instance
+        return dict((entry['title'], entry) for entry in
+                    instance.on_task_input(self.task, dict(self.config, **config)))
+
+    def test_completed(self):
+        entries = self.from_transmission()
+        assert sorted(entries) == ['Even Files', 'Partly Wanted', 'Seeding', 'Single Big File'], \
+            'torrents with wanted files left should not be completed'
+        assert len(self.from_transmission(onlycomplete=False)) == 5
+
+    def test_location(self):
+        entries = self.from_transmission()
+        assert self.client.files_calls == [[1, 3, 4]], \
+            'files of completed stopped torrents should be fetched in one request'
+        assert entries['Partly Wanted']['location'].endswith('Partly Wanted/movie.mkv')
+        assert entries['Single Big File']['location'].endswith('Single Big File/movie.mkv')
+        assert 'location' not in entries['Even Files']
+        assert 'location' not in entries['Seeding']
+
+    def test_shared_torrents(self):
+        self.from_transmission()
+        clean = get_plugin_by_name('clean_transmission').instance
+        clean.on_task_exit(self.task, dict(self.config, min_ratio=1))
+        assert self.client.info_calls == 1, 'torrents should be fetched once per task run'
+        assert self.client.removed == [5]
+        assert self.task.name not in plugin_transmission._snapshots
+
+    def test_abort(self):
+        self.from_transmission()
+        assert self.task.name in plugin_transmission._snapshots
+        get_plugin_by_name('from_transmission').instance.on_task_abort(self.task, self.config)
+        assert self.task.name not in plugin_transmission._snapshots, 'torrents should be dropped on abort'
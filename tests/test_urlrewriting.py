@@ -1,7 +1,30 @@
 from __future__ import unicode_literals, division, absolute_import
+import threading
+import time
+
 from tests import FlexGetBase
 from nose.tools import assert_true
+from flexget import plugin
 from flexget.plugin import get_plugin_by_name
+from flexget.plugins.plugin_urlrewriting import UrlRewritingError
+
+
+class SlowRewriter(object):
+    """Rewrites slow.test page urls into download urls, taking its time about it."""
+
+    url_patterns = ['slow.test']
+    threads = set()
+
+    def url_rewritable(self, task, entry):
+        return '/page/' in entry['url']
+
+    def url_rewrite(self, task, entry):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        if 'broken' in entry['url']:
+            raise UrlRewritingError('page is broken')
+        entry['url'] = entry['url'].replace('/page/', '/download/')
+        entry['rewritten_by'] = 'slow'
 
 
 class TestURLRewriters(FlexGetBase):
@@ -89,3 +112,48 @@ class TestRegexpurlrewriter(FlexGetBase):
         self.execute_task('test')
         assert self.task.find_entry(url='http://newzleech.com/?m=gen&dl=1&post=123'), \
             'did not url_rewrite properly'
+
+
+class TestRewriterDispatch(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'one', url: 'http://slow.test/page/1'}
+              - {title: 'two', url: 'http://www.slow.test/page/2'}
+              - {title: 'three', url: 'http://slow.test/page/broken'}
+              - {title: 'four', url: 'http://slow.test/page/4'}
+              - {title: 'other', url: 'http://other.test/page/5'}
+            accept_all: yes
+            disable_builtins: [seen, retry_failed]
+    """
+
+    def setup(self):
+        super(TestRewriterDispatch, self).setup()
+        plugin.register(SlowRewriter, 'test_slow_rewriter', groups=['urlrewriter'], debug=True,
+                        api_ver=2).initialize()
+
+    def teardown(self):
+        del plugin.plugins['test_slow_rewriter']
+        super(TestRewriterDispatch, self).teardown()
+
+    def test_candidates(self):
+        index = get_plugin_by_name('urlrewriting').instance.index
+        candidates = index.candidates('http://torrents.thepiratebay.se/8492471/Test.avi')
+        assert 'piratebay' in candidates
+        assert 'nyaa' not in candidates
+        assert 'urlrewrite' in candidates, 'rewriters without url_patterns should always be asked'
+        assert 'test_slow_rewriter' in index.candidates('http://www.slow.test/page/1')
+        assert 'test_slow_rewriter' not in index.candidates('http://notslow.test/page/1')
+
+    def test_concurrent(self):
+        SlowRewriter.threads.clear()
+        self.execute_task('test')
+        assert len(SlowRewriter.threads) > 1, 'entries should have been rewritten concurrently'
+        for title in ('one', 'two', 'four'):
+            entry = self.task.find_entry('accepted', title=title)
+            assert entry, '%s should still be accepted' % title
+            assert '/download/' in entry['url'] and entry['rewritten_by'] == 'slow'
+        assert self.task.find_entry('failed', title='three'), 'failed rewrite should fail the entry'
+        assert self.task.find_entry('accepted', title='other', url='http://other.test/page/5')